@@ -0,0 +1,86 @@
+# Copyright (c) 2025 Zabbix-MCP
+# Licensed under the Apache License, Version 2.0
+
+"""Payload size and serialization time: row JSON vs ``format=columnar``.
+
+Builds synthetic ``AlertResponse`` objects with realistic cardinality (a few
+hundred hosts and alert names) and serializes them the way the API does
+(``JSONResponse``: compact separators, ``ensure_ascii=False``).
+
+    python scripts/bench_columnar.py --sizes 1000 10000 100000
+"""
+
+import argparse
+import gzip
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from typing import Callable, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from zabbix_mcp.columnar import to_columnar  # noqa: E402
+from zabbix_mcp.schemas import AlertItem, AlertResponse  # noqa: E402
+
+
+def _dumps(obj) -> bytes:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _response(n: int, hosts: int, names: int) -> AlertResponse:
+    rnd = random.Random(n)
+    items = []
+    for i in range(n):
+        h = rnd.randrange(hosts)
+        items.append(
+            AlertItem(
+                id=str(10_000_000 + i),
+                name=f"High CPU utilization (over 90% for 5m) #{rnd.randrange(names)}",
+                host=f"app-server-{h:04d}.prod.example.com",
+                host_ip=f"10.{h // 250}.{h % 250}.{10 + h % 200}",
+                severity=rnd.randrange(6),
+                timestamp=1_732_680_000 - i * 7,
+            )
+        )
+    return AlertResponse(items=items, total=n)
+
+
+def _time(fn: Callable[[], bytes], runs: int) -> float:
+    samples = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return statistics.median(samples) * 1000.0
+
+
+def main(argv: List[str]) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    ap.add_argument("--hosts", type=int, default=300)
+    ap.add_argument("--names", type=int, default=200)
+    ap.add_argument("--runs", type=int, default=5)
+    args = ap.parse_args(argv)
+
+    print(f"{'items':>8} {'format':>9} {'bytes':>12} {'gzip':>10} {'ms':>9}")
+    for n in args.sizes:
+        resp = _response(n, args.hosts, args.names)
+        variants = {
+            "row": lambda: _dumps(resp.model_dump()),
+            "columnar": lambda: _dumps(to_columnar(resp)),
+        }
+        sizes = {}
+        for label, fn in variants.items():
+            body = fn()
+            sizes[label] = len(body)
+            ms = _time(fn, max(1, args.runs))
+            print(f"{n:>8} {label:>9} {len(body):>12,} {len(gzip.compress(body, 6)):>10,} {ms:>9.1f}")
+        print(f"{'':>8} {'ratio':>9} {sizes['columnar'] / sizes['row']:>12.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,140 @@
+# Copyright (c) 2025 Zabbix-MCP
+# Licensed under the Apache License, Version 2.0
+
+"""Peak RSS of large event.get responses: whole-body ``resp.json()`` vs streamed parsing.
+
+A mock transport generates the JSON-RPC response lazily in 64 KiB chunks, so
+the server side adds nothing to the measured process. Every (mode, sink)
+pair runs in a fresh interpreter; the figure reported is the growth of peak
+RSS over the interpreter's baseline after imports.
+
+    json    ``_rpc`` -> ``resp.json()`` -> enrich -> transform (the old path)
+    stream  ``iter_events`` -> transform, item by item
+
+Sinks: ``items`` keeps every ``AlertItem`` (what ``/alerts/query`` returns),
+``count`` folds events into per-host counters (what stats scans do).
+
+    python scripts/bench_event_memory.py --events 100000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+from typing import Any, AsyncIterator, Dict, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import httpx  # noqa: E402
+
+from zabbix_mcp.services import _to_item  # noqa: E402
+from zabbix_mcp.zabbix_client import ZabbixClient  # noqa: E402
+
+CHUNK = 64 * 1024
+
+
+def _peak_kib() -> int:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes.
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+async def _body(n: int) -> AsyncIterator[bytes]:
+    parts: List[str] = ['{"jsonrpc":"2.0","result":[']
+    size = len(parts[0])
+    for i in range(n):
+        h = i % 300
+        event = {
+            "eventid": str(50_000_000 - i),
+            "clock": str(1_732_680_000 - i * 7),
+            "name": f"High CPU utilization (over 90% for 5m) on app-server-{h:04d}",
+            "objectid": str(20_000 + i % 2000),
+            "hosts": [{"hostid": str(10_000 + h), "host": f"app-server-{h:04d}.prod.example.com", "name": f"app-{h}"}],
+        }
+        text = ("," if i else "") + json.dumps(event, separators=(",", ":"))
+        parts.append(text)
+        size += len(text)
+        if size >= CHUNK:
+            yield "".join(parts).encode()
+            parts, size = [], 0
+    parts.append('],"id":1}')
+    yield "".join(parts).encode()
+
+
+def _client(n: int) -> ZabbixClient:
+    async def handler(request: httpx.Request) -> httpx.Response:
+        method = json.loads(request.content)["method"]
+        if method == "event.get":
+            return httpx.Response(200, content=_body(n))
+        ids = json.loads(request.content)["params"].get("triggerids") or []
+        result = [{"triggerid": t, "priority": "4", "description": f"trigger {t}"} for t in ids]
+        return httpx.Response(200, json={"jsonrpc": "2.0", "result": result, "id": 1})
+
+    client = ZabbixClient("http://zabbix.invalid", None, None, token="bench")
+    client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return client
+
+
+async def _run(mode: str, sink: str, n: int) -> int:
+    client = _client(n)
+    params: Dict[str, Any] = {"output": ["eventid", "clock", "name", "objectid"], "limit": n}
+    items: List[Any] = []
+    counts: Dict[str, int] = {}
+
+    def take(e: Dict[str, Any]) -> None:
+        if sink == "items":
+            items.append(_to_item(e))
+        else:
+            host = e["hosts"][0]["host"] if e.get("hosts") else ""
+            counts[host] = counts.get(host, 0) + 1
+
+    if mode == "json":
+        for e in await client._enrich(await client._rpc("event.get", params)):
+            take(e)
+    else:
+        async for e in client.iter_events(limit=n):
+            take(e)
+    return len(items) if sink == "items" else sum(counts.values())
+
+
+def _child(mode: str, sink: str, n: int) -> None:
+    base = _peak_kib()
+    t0 = time.perf_counter()
+    seen = asyncio.run(_run(mode, sink, n))
+    elapsed = time.perf_counter() - t0
+    print(json.dumps({"seen": seen, "peak_kib": _peak_kib() - base, "seconds": elapsed}))
+
+
+def main(argv: List[str]) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--events", type=int, default=100_000)
+    ap.add_argument("--child", nargs=2, metavar=("MODE", "SINK"), help=argparse.SUPPRESS)
+    args = ap.parse_args(argv)
+    if args.child:
+        _child(args.child[0], args.child[1], args.events)
+        return 0
+
+    print(f"{'events':>8} {'sink':>6} {'mode':>7} {'peak RSS MiB':>13} {'seconds':>8}")
+    for sink in ("count", "items"):
+        peaks = {}
+        for mode in ("json", "stream"):
+            out = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--events", str(args.events), "--child", mode, sink],
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout
+            res = json.loads(out.strip().splitlines()[-1])
+            peaks[mode] = res["peak_kib"]
+            print(f"{res['seen']:>8} {sink:>6} {mode:>7} {res['peak_kib'] / 1024:>13.1f} {res['seconds']:>8.2f}")
+        if peaks["json"]:
+            print(f"{'':>8} {'':>6} {'ratio':>7} {peaks['stream'] / peaks['json']:>13.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,71 @@
+# Copyright (c) 2025 Zabbix-MCP
+# Licensed under the Apache License, Version 2.0
+
+"""Import-time benchmark for the CLI entry point.
+
+Runs ``python -X importtime -c "import <module>"`` in fresh interpreters and
+reports the median cumulative import time plus the heaviest imports. With
+``--max-ms`` it exits non-zero when the budget is exceeded, so it can gate CI
+alongside the smoke tests.
+
+    python scripts/bench_import.py --runs 5 --max-ms 150
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+
+def _import_times(module: str) -> Dict[str, Tuple[int, int]]:
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    out: Dict[str, Tuple[int, int]] = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        try:
+            self_us, cum_us = int(parts[0]), int(parts[1])
+        except ValueError:
+            continue  # header line
+        out[parts[2].strip()] = (self_us, cum_us)
+    return out
+
+
+def main(argv: List[str]) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--module", default="zabbix_mcp.cli")
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--top", type=int, default=10)
+    ap.add_argument("--max-ms", type=float, default=None)
+    args = ap.parse_args(argv)
+
+    totals: List[float] = []
+    last: Dict[str, Tuple[int, int]] = {}
+    for _ in range(max(1, args.runs)):
+        last = _import_times(args.module)
+        totals.append(last.get(args.module, (0, 0))[1] / 1000.0)
+    median = statistics.median(totals)
+
+    print(f"{args.module}: median cumulative import {median:.1f} ms over {len(totals)} runs")
+    heaviest = sorted(last.items(), key=lambda kv: kv[1][0], reverse=True)[: args.top]
+    for name, (self_us, cum_us) in heaviest:
+        print(f"  {self_us / 1000.0:8.1f} ms self  {cum_us / 1000.0:8.1f} ms cum  {name}")
+    loaded = [m for m in ("rich", "httpx", "pydantic", "zabbix_mcp.services") if m in last]
+    if loaded:
+        print("eagerly imported: " + ", ".join(loaded))
+
+    if args.max_ms is not None and median > args.max_ms:
+        print(f"FAIL: {median:.1f} ms exceeds budget {args.max_ms:.1f} ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,165 @@
+"""
+Copyright (c) 2025 Zabbix-MCP
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import asyncio
+import math
+from typing import Dict, Iterable, Optional
+
+from .metrics import ADMISSION_INFLIGHT, ADMISSION_QUEUED, REQUESTS_SHED
+
+# Never queued or shed: probes, metrics scraping, docs and admin endpoints.
+EXEMPT_PATHS = {"/health", "/ready", "/metrics", "/docs", "/redoc", "/openapi.json", "/docs/oauth2-redirect"}
+EXEMPT_PREFIXES = ("/queue/", "/config/")
+MAX_RETRY_AFTER_SECONDS = 60
+
+
+def parse_route_limits(raw: Optional[str]) -> Dict[str, int]:
+    """Parse ``ADMISSION_ROUTE_LIMITS``: comma-separated ``path=limit`` pairs."""
+    limits: Dict[str, int] = {}
+    for part in (raw or "").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        path, sep, value = part.partition("=")
+        if not sep or not path.strip().startswith("/"):
+            raise ValueError(f"ADMISSION_ROUTE_LIMITS entry must be path=limit: {part!r}")
+        limits[path.strip()] = int(value)
+    return limits
+
+
+def is_exempt(path: str) -> bool:
+    return path in EXEMPT_PATHS or path.startswith(EXEMPT_PREFIXES)
+
+
+class Shed(Exception):
+    """Raised by ``Gate.enter`` when a request must be refused."""
+
+    def __init__(self, reason: str, retry_after: int) -> None:
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class Gate:
+    """In-flight limit with a bounded wait queue for one route.
+
+    Up to ``limit`` requests run at once and up to ``queue_size`` more wait,
+    each for at most the queue timeout; anything beyond is shed straight
+    away. ``Retry-After`` is estimated from a moving average of service time
+    and the current backlog.
+    """
+
+    def __init__(self, route: str, limit: int, queue_size: int) -> None:
+        self.route = route
+        self.limit = max(1, limit)
+        self.queue_size = max(0, queue_size)
+        self.inflight = 0
+        self.waiting = 0
+        self.avg_seconds = 0.0
+        self._sem: Optional[asyncio.Semaphore] = None
+
+    def retry_after(self) -> int:
+        backlog = (self.waiting + self.inflight) / self.limit
+        return int(min(MAX_RETRY_AFTER_SECONDS, max(1, math.ceil(self.avg_seconds * backlog))))
+
+    def _shed(self, reason: str) -> Shed:
+        REQUESTS_SHED.labels(self.route, reason).inc()
+        return Shed(reason, self.retry_after())
+
+    async def enter(self, timeout: float) -> None:
+        if self._sem is None:
+            self._sem = asyncio.Semaphore(self.limit)
+        if self._sem.locked() or self.waiting:
+            if self.waiting >= self.queue_size:
+                raise self._shed("queue_full")
+            self.waiting += 1
+            ADMISSION_QUEUED.labels(self.route).inc()
+            try:
+                await asyncio.wait_for(self._sem.acquire(), timeout=max(0.0, timeout))
+            except asyncio.TimeoutError:
+                raise self._shed("queue_timeout")
+            finally:
+                self.waiting -= 1
+                ADMISSION_QUEUED.labels(self.route).dec()
+        else:
+            await self._sem.acquire()
+        self.inflight += 1
+        ADMISSION_INFLIGHT.labels(self.route).inc()
+
+    def leave(self, seconds: float) -> None:
+        self.inflight -= 1
+        ADMISSION_INFLIGHT.labels(self.route).dec()
+        self.avg_seconds = seconds if not self.avg_seconds else 0.8 * self.avg_seconds + 0.2 * seconds
+        assert self._sem is not None
+        self._sem.release()
+
+
+class AdmissionController:
+    """One ``Gate`` per governed route.
+
+    Only paths registered with ``govern`` get a gate, so unknown URLs cannot
+    grow the table. ``max_inflight <= 0`` turns admission control off; a
+    per-route limit of 0 exempts just that route.
+    """
+
+    def __init__(
+        self,
+        max_inflight: int = 16,
+        queue_size: int = 32,
+        queue_timeout: float = 2.0,
+        route_limits: Optional[Dict[str, int]] = None,
+    ) -> None:
+        self._routes: Optional[set] = None
+        self._gates: Dict[str, Gate] = {}
+        self.configure(max_inflight, queue_size, queue_timeout, route_limits)
+
+    def configure(
+        self,
+        max_inflight: int,
+        queue_size: int,
+        queue_timeout: float,
+        route_limits: Optional[Dict[str, int]] = None,
+    ) -> None:
+        self.max_inflight = max_inflight
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.route_limits = dict(route_limits or {})
+        # Existing gates keep serving their in-flight requests; new limits apply to new gates.
+        self._gates = {}
+
+    def govern(self, paths: Iterable[str]) -> None:
+        self._routes = {p for p in paths if not is_exempt(p)}
+
+    def gate(self, path: str) -> Optional[Gate]:
+        if self.max_inflight <= 0 or self._routes is None or path not in self._routes:
+            return None
+        gate = self._gates.get(path)
+        if gate is None:
+            limit = self.route_limits.get(path, self.max_inflight)
+            if limit <= 0:
+                # A per-route limit of 0 exempts that route.
+                return None
+            gate = self._gates[path] = Gate(path, limit, self.queue_size)
+        return gate
+
+    async def admit(self, path: str, budget: Optional[float] = None) -> Optional[Gate]:
+        """Wait for a slot on ``path``'s gate; raises ``Shed`` when refused."""
+        gate = self.gate(path)
+        if gate is None:
+            return None
+        timeout = self.queue_timeout if budget is None else min(self.queue_timeout, budget)
+        await gate.enter(timeout)
+        return gate
@@ -15,25 +15,48 @@ limitations under the License.
 """
 
 import asyncio
-from fastapi import FastAPI, HTTPException, Depends, WebSocket, Request
+import hashlib
+import json
+import logging
+import time
+from typing import List, Literal, Optional, Set
+from fastapi import FastAPI, HTTPException, Depends, WebSocket, WebSocketDisconnect, Request, Query
 from fastapi.responses import JSONResponse, Response
+from fastapi.routing import APIRoute
 
 from .config import load_settings
-from .schemas import AlertQuery, LogAssociationQuery, AlertItem, AlertResponse, ErrorResponse, NLQuery, TimeRange
+from .schemas import AlertQuery, LogAssociationQuery, AlertItem, AlertResponse, AlertStats, AlertStatsQuery, AlertSummary, BatchQuery, BatchResponse, ErrorResponse, ItemListResponse, ItemSeriesQuery, ItemSeriesResponse, JobInfo, NLQuery, ScheduleInfo, ScheduleSpec, TimeRange
 from .zabbix_client import ZabbixClient, ZabbixAPIError, MockZabbixClient
-from .services import query_alerts, today_alerts, associate_logs
-from .nlp import parse_alert_query
+from .services import query_alerts, alerts_etag, result_etag, etag_of, share_entities, batch_alerts, associate_logs, nl_alerts, alert_stats, active_problems, list_items, item_series
 from .logging import setup as setup_logging
-from .metrics import REQUEST_COUNT, REQUEST_LATENCY
-from .auth import require_role
-from .queue import TaskQueue
+from .metrics import REQUEST_COUNT, REQUEST_LATENCY, REQUEST_CANCELLED, mark_worker_exit, render as render_metrics
+from .auth import require_role, role_for_token
+from .queue import TaskQueue, parse_schedules
+from .logindex import get_correlator
+from .problems import ProblemTracker
+from .rollup import RollupStore
+from .today import TodayCache
+from .federation import build_federated_client, track_failures
+from .metadata import get_cache
+from .sharedstate import SharedSnapshot, get_backend
+from .admission import AdmissionController, Shed, parse_route_limits
+from .mcp import McpSession
+from .columnar import to_columnar
 from .ws import ClientRegistry
+from . import daywindow, deadline
 
 
 setup_logging()
 app = FastAPI(title="Zabbix MCP", version="0.1.0")
 client_registry = ClientRegistry()
 task_queue = TaskQueue(workers=4)
+problem_tracker = ProblemTracker()
+rollup_store = RollupStore()
+today_cache = TodayCache()
+admission = AdmissionController()
+rollup_task: Optional[asyncio.Task] = None
+warmup_task: Optional[asyncio.Task] = None
+warmup_state: dict = {"state": "pending"}
 settings_cache = None
 
 
@@ -49,6 +72,9 @@ async def get_client():
         )
     if s.mock_mode:
         cli = MockZabbixClient()
+    elif s.zabbix_instances:
+        cli = build_federated_client(s)
+        track_failures()
     else:
         cli = ZabbixClient(
             base_url=str(s.zabbix_url),
@@ -58,24 +84,203 @@ async def get_client():
             max_concurrency=s.max_concurrency,
             verify_ssl=s.verify_ssl,
             token=s.zabbix_token.get_secret_value() if s.zabbix_token else None,
+            # Session, names and triggers survive across requests.
+            cache=get_cache(
+                str(s.zabbix_url), s.zabbix_username, s.metadata_ttl_seconds, store=get_backend(s.shared_state_url)
+            ),
+            event_slices=s.event_slices,
+            slice_min_window=s.event_slice_min_window_seconds,
         )
     await cli.login()
     return cli
 
 
+class ClientDisconnected(Exception):
+    pass
+
+
+async def _until_disconnect(request: Request, coro):
+    """Await ``coro``, cancelling it (and its upstream RPCs) if the client goes away."""
+    task = asyncio.ensure_future(coro)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=0.5)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                task.cancel()
+                REQUEST_CANCELLED.inc()
+                await asyncio.wait({task})
+                raise ClientDisconnected()
+    finally:
+        if not task.done():
+            task.cancel()
+
+
+@app.exception_handler(deadline.DeadlineExceeded)
+async def deadline_exceeded_handler(request: Request, exc: deadline.DeadlineExceeded):
+    return JSONResponse(
+        status_code=504,
+        content={"detail": ErrorResponse(i18n_key="error.deadline_exceeded", message=str(exc)).model_dump()},
+    )
+
+
+@app.exception_handler(ClientDisconnected)
+async def client_disconnected_handler(request: Request, exc: ClientDisconnected):
+    # Nobody is listening; 499 only shows up in the audit log.
+    return Response(status_code=499)
+
+
 @app.on_event("startup")
 async def startup_events():
     async def handler(job: dict):
-        # minimal demo: run alerts.query jobs
-        kind = job.get("type")
-        if kind == "alerts.query":
-            payload = job.get("payload") or {}
+        kind, query = _job_query(job, now=int(time.time()))
+        cli = await get_client()
+        try:
+            if kind == "alerts.stats":
+                resp = await alert_stats(cli, query)
+            else:
+                resp = await query_alerts(cli, query)
+        finally:
+            await cli.logout()
+        return resp.model_dump(mode="json")
+    await task_queue.start(handler)
+
+    global rollup_task, settings_cache
+    admission.govern(r.path for r in app.routes if isinstance(r, APIRoute))
+    try:
+        s = settings_cache = settings_cache or load_settings()
+    except Exception as e:
+        warmup_state.update(state="failed", error=str(e))
+        return
+    _configure_admission(s)
+    _configure_queue(s)
+    daywindow.configure(s.day_timezone)
+    _configure_shared_state(s)
+    if s.warmup_enabled:
+        _start_warm_up(s)
+    else:
+        warmup_state["state"] = "disabled"
+    rollup_store.refresh_seconds = s.rollup_refresh_seconds
+    rollup_store.max_events = s.rollup_max_events
+    if s.rollup_poller:
+        rollup_task = asyncio.ensure_future(_rollup_poller(s.rollup_refresh_seconds))
+
+
+def _configure_admission(s) -> None:
+    admission.configure(
+        s.admission_max_inflight,
+        s.admission_queue_size,
+        s.admission_queue_timeout_seconds,
+        parse_route_limits(s.admission_route_limits),
+    )
+
+
+# Job types the task queue runs, with the query model each payload must match.
+JOB_TYPES = {"alerts.query": AlertQuery, "alerts.stats": AlertStatsQuery}
+
+
+def _job_query(job: dict, now: Optional[int] = None):
+    """Validate a queue job; ``window_seconds`` becomes a time range ending at ``now``."""
+    kind = job.get("type")
+    model = JOB_TYPES.get(kind)
+    if model is None:
+        raise ValueError(f"unknown job type: {kind!r} (expected one of {sorted(JOB_TYPES)})")
+    payload = dict(job.get("payload") or {})
+    window = job.get("window_seconds")
+    if window is not None:
+        if int(window) <= 0:
+            raise ValueError("window_seconds must be positive")
+        end = int(time.time()) if now is None else now
+        payload["time_range"] = {"start_ts": end - int(window), "end_ts": end}
+    return kind, model.model_validate(payload)
+
+
+def _configure_queue(s) -> None:
+    specs = parse_schedules(s.queue_schedules)
+    for spec in specs:
+        _job_query(spec.job)
+    task_queue.max_results = s.queue_max_results
+    task_queue.result_ttl = s.queue_result_ttl_seconds
+    task_queue.store = get_backend(s.shared_state_url) if s.shared_state_url else None
+    task_queue.sync_schedules(specs)
+
+
+def _configure_shared_state(s) -> None:
+    """With ``SHARED_STATE_URL``, one worker at a time polls for the rollup, problems, today and NL caches."""
+    if not s.shared_state_url:
+        rollup_store.shared = problem_tracker.shared = today_cache.shared = None
+        share_entities(None)
+        return
+    store = get_backend(s.shared_state_url)
+    # Workers agree on a namespace only when they watch the same Zabbix with the same day boundaries.
+    source = "mock" if s.mock_mode else s.zabbix_instances or f"{s.zabbix_url}|{s.zabbix_username or ''}"
+    digest = hashlib.sha1(f"{source}|{s.day_timezone}".encode()).hexdigest()[:16]
+    ns = f"zabbix_mcp:{digest}"
+    rollup_store.shared = SharedSnapshot(store, f"{ns}:rollup")
+    problem_tracker.shared = SharedSnapshot(store, f"{ns}:problems")
+    today_cache.shared = SharedSnapshot(store, f"{ns}:today")
+    share_entities(SharedSnapshot(store, f"{ns}:entities"))
+
+
+def _start_warm_up(s) -> None:
+    global warmup_task
+    if warmup_task is None or warmup_task.done():
+        warmup_task = asyncio.ensure_future(_warm_up(s.warmup_timeout_seconds))
+
+
+async def _warm_up(budget: float):
+    """Log in, detect the API version and preload metadata before reporting ready."""
+    warmup_state.clear()
+    warmup_state.update(state="warming", started_at=int(time.time()))
+    t0 = time.monotonic()
+    deadline.set_deadline(budget)
+    try:
+        cli = await get_client()
+        try:
+            steps = await cli.prefetch()
+        finally:
+            await cli.logout()
+    except Exception as e:
+        steps = {"login": f"error: {e}"}
+    failed = [k for k, v in steps.items() if v != "ok"]
+    # apiinfo.version needs no credentials, so it alone does not make Zabbix usable.
+    usable = any(v == "ok" for k, v in steps.items() if not k.endswith("api_version"))
+    warmup_state.update(
+        state="ready" if not failed else "degraded" if usable else "failed",
+        steps=steps,
+        duration_ms=int((time.monotonic() - t0) * 1000),
+    )
+    logging.getLogger("warmup").info(f"state={warmup_state['state']} duration_ms={warmup_state['duration_ms']}")
+
+
+async def _rollup_poller(interval: float):
+    log = logging.getLogger("rollup")
+    if warmup_task is not None:
+        # Let the warm-up fill the shared session and metadata first.
+        await asyncio.wait({warmup_task})
+    while True:
+        try:
             cli = await get_client()
             try:
-                await query_alerts(cli, AlertQuery.model_validate(payload))
+                # Not forced: with shared state, a fresh snapshot from another worker is adopted instead.
+                await rollup_store.refresh(cli)
             finally:
                 await cli.logout()
-    await task_queue.start(handler)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            log.warning(f"rollup refresh failed: {e!r}")
+        await asyncio.sleep(max(1.0, interval))
+
+
+@app.on_event("shutdown")
+async def shutdown_events():
+    for task in (rollup_task, warmup_task):
+        if task is not None:
+            task.cancel()
+    await task_queue.stop()
+    mark_worker_exit()
 
 
 @app.middleware("http")
@@ -96,13 +301,35 @@ async def audit_middleware(request: Request, call_next):
             role = "read"
         s = settings_cache or load_settings()
         if s.read_only and method in {"POST", "PUT", "DELETE", "PATCH"}:
-            allowed = {"/alerts/query", "/alerts/nl", "/logs/associate"}
+            allowed = {"/alerts/query", "/alerts/nl", "/alerts/stats", "/alerts/batch", "/logs/associate", "/items/series"}
             if path not in allowed:
                 return JSONResponse(
                     status_code=403,
                     content=ErrorResponse(i18n_key="error.read_only", message="read-only mode").model_dump(),
                 )
-        resp = await call_next(request)
+        deadline.set_deadline(
+            deadline.parse_budget(
+                request.headers.get("X-Request-Timeout") or request.query_params.get("timeout"),
+                s.request_deadline_seconds,
+                s.max_request_deadline_seconds,
+            )
+        )
+        try:
+            # Queue time counts against the request deadline.
+            gate = await admission.admit(path, deadline.remaining())
+        except Shed as e:
+            resp = JSONResponse(
+                status_code=503,
+                content={"detail": ErrorResponse(i18n_key="error.overloaded", message=f"server busy: {e.reason}").model_dump()},
+                headers={"Retry-After": str(e.retry_after)},
+            )
+        else:
+            admitted = asyncio.get_event_loop().time()
+            try:
+                resp = await call_next(request)
+            finally:
+                if gate is not None:
+                    gate.leave(asyncio.get_event_loop().time() - admitted)
         dur = (asyncio.get_event_loop().time() - start) * 1000
         import logging
         logging.getLogger("audit").info(
@@ -113,8 +340,63 @@ async def audit_middleware(request: Request, call_next):
         return await call_next(request)
 
 
+CACHE_CONTROL = "private, no-cache"
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    inm = request.headers.get("if-none-match")
+    if not inm:
+        return False
+    tags = {t.strip() for t in inm.split(",")}
+    # Weak comparison (RFC 9110): a W/ prefix on the client's copy still matches.
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+
+OutputFormat = Literal["json", "columnar"]
+
+
+def _render(resp: AlertResponse, fmt: str = "json", headers: Optional[dict] = None) -> JSONResponse:
+    return JSONResponse(to_columnar(resp) if fmt == "columnar" else resp.model_dump(), headers=headers)
+
+
+def _with_format(etag: str, fmt: str) -> str:
+    return etag if fmt == "json" else f'{etag[:-1]}-{fmt}"'
+
+
+def _not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+
+
+async def _conditional(request: Request, cli, query: AlertQuery, fmt: str = "json"):
+    """Answer 304 when the client's ETag still matches; else run the query with the ETag attached.
+
+    Only requests carrying ``If-None-Match`` pay for the probe; a plain
+    request takes its ETag from the events the query read.
+    """
+    if request.headers.get("if-none-match"):
+        probed = await _until_disconnect(request, alerts_etag(cli, query))
+        if probed is not None and not getattr(cli, "failed_instances", None):
+            if _etag_matches(request, _with_format(probed, fmt)):
+                return _not_modified(_with_format(probed, fmt))
+    event_keys: Set[str] = set()
+    resp = await _until_disconnect(request, query_alerts(cli, query, event_keys))
+    if resp.partial:
+        # A partial federated answer must not be cached under a validator.
+        return _render(resp, fmt)
+    etag = _with_format(result_etag(query, event_keys), fmt)
+    if _etag_matches(request, etag):
+        # Compacted queries have no probe; they still spare the client the body.
+        return _not_modified(etag)
+    return _render(resp, fmt, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+
+
 @app.post("/alerts/query", response_model=AlertResponse)
-async def api_alerts_query(payload: AlertQuery, request: Request, role: str = Depends(require_role("read"))):
+async def api_alerts_query(
+    payload: AlertQuery,
+    request: Request,
+    fmt: OutputFormat = Query("json", alias="format"),
+    role: str = Depends(require_role("read")),
+):
     cli = await get_client()
     try:
         with REQUEST_LATENCY.labels("alerts_query").time():
@@ -149,9 +431,11 @@ async def api_alerts_query(payload: AlertQuery, request: Request, role: str = De
                 severities=payload.severities,
                 limit=eff_limit,
                 sort_by=payload.sort_by,
+                group_by=payload.group_by,
+                compact=payload.compact,
+                compact_window=payload.compact_window,
             )
-            resp = await query_alerts(cli, payload)
-        return JSONResponse(resp.model_dump())
+            return await _conditional(request, cli, payload, fmt=fmt)
     except ZabbixAPIError as e:
         raise HTTPException(
             status_code=502,
@@ -165,15 +449,27 @@ async def api_alerts_query(payload: AlertQuery, request: Request, role: str = De
 
 
 @app.get("/alerts/today", response_model=AlertResponse)
-async def api_alerts_today(limit: int = 100, role: str = Depends(require_role("read"))):
+async def api_alerts_today(
+    request: Request,
+    limit: int = 100,
+    fmt: OutputFormat = Query("json", alias="format"),
+    role: str = Depends(require_role("read")),
+):
     cli = await get_client()
     try:
         with REQUEST_LATENCY.labels("alerts_today").time():
             REQUEST_COUNT.labels("alerts_today").inc()
             s = settings_cache or load_settings()
             eff_limit = min(max(1, limit), s.max_results_limit)
-            resp = await today_alerts(cli, limit=eff_limit)
-        return JSONResponse(resp.model_dump())
+            # The cache tops itself up with one small event.get per instance; its
+            # watermark then stands in for the ETag probe.
+            resp, watermark = await _until_disconnect(request, today_cache.fetch(cli, eff_limit))
+            if resp.partial:
+                return _render(resp, fmt)
+            etag = _with_format(etag_of("today", eff_limit, watermark), fmt)
+            if _etag_matches(request, etag):
+                return _not_modified(etag)
+            return _render(resp, fmt, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
     except ZabbixAPIError as e:
         raise HTTPException(
             status_code=502,
@@ -187,17 +483,114 @@ async def api_alerts_today(limit: int = 100, role: str = Depends(require_role("r
 
 
 @app.get("/alerts/top", response_model=AlertResponse)
-async def api_alerts_top(by: str = "severity", limit: int = 100, role: str = Depends(require_role("read"))):
+async def api_alerts_top(
+    request: Request,
+    by: str = "severity",
+    limit: int = 100,
+    fmt: OutputFormat = Query("json", alias="format"),
+    role: str = Depends(require_role("read")),
+):
     cli = await get_client()
     try:
         REQUEST_COUNT.labels("alerts_top").inc()
         s = settings_cache or load_settings()
         eff_limit = min(max(1, limit), s.max_results_limit)
-        resp = await query_alerts(
-            cli,
-            AlertQuery(limit=eff_limit, sort_by=by if by in {"severity", "frequency", "time"} else "severity"),
+        resp = await _until_disconnect(
+            request,
+            query_alerts(
+                cli,
+                AlertQuery(limit=eff_limit, sort_by=by if by in {"severity", "frequency", "time", "group"} else "severity"),
+            ),
         )
+        return _render(resp, fmt)
+    except ZabbixAPIError as e:
+        raise HTTPException(
+            status_code=502,
+            detail=ErrorResponse(
+                i18n_key="error.zabbix_api",
+                message=str(e),
+            ).model_dump(),
+        )
+    finally:
+        await cli.logout()
+
+
+@app.post("/alerts/stats", response_model=AlertStats)
+async def api_alerts_stats(payload: AlertStatsQuery, request: Request, role: str = Depends(require_role("read"))):
+    cli = await get_client()
+    try:
+        with REQUEST_LATENCY.labels("alerts_stats").time():
+            REQUEST_COUNT.labels("alerts_stats").inc()
+            resp = await _until_disconnect(request, alert_stats(cli, payload))
         return JSONResponse(resp.model_dump())
+    except ValueError as e:
+        raise HTTPException(
+            status_code=400,
+            detail=ErrorResponse(i18n_key="error.invalid_query", message=str(e)).model_dump(),
+        )
+    except ZabbixAPIError as e:
+        raise HTTPException(
+            status_code=502,
+            detail=ErrorResponse(
+                i18n_key="error.zabbix_api",
+                message=str(e),
+            ).model_dump(),
+        )
+    finally:
+        await cli.logout()
+
+
+@app.get("/alerts/summary", response_model=AlertSummary)
+async def api_alerts_summary(request: Request, top: int = 10, refresh: bool = False, role: str = Depends(require_role("read"))):
+    with REQUEST_LATENCY.labels("alerts_summary").time():
+        REQUEST_COUNT.labels("alerts_summary").inc()
+        # Normally the background poller keeps the counters fresh and this is a read.
+        if refresh or rollup_store.stale():
+            cli = await get_client()
+            try:
+                await _until_disconnect(request, rollup_store.refresh(cli, force=refresh))
+            finally:
+                await cli.logout()
+        resp = rollup_store.summary(max(1, top))
+    if resp is None:
+        raise HTTPException(
+            status_code=502,
+            detail=ErrorResponse(i18n_key="error.zabbix_api", message="alert summary unavailable").model_dump(),
+        )
+    return JSONResponse(resp.model_dump())
+
+
+@app.get("/problems/active", response_model=AlertResponse)
+async def api_problems_active(
+    request: Request,
+    limit: int = 100,
+    severity: Optional[List[int]] = Query(None),
+    host: Optional[List[str]] = Query(None),
+    group: Optional[List[str]] = Query(None),
+    refresh: bool = False,
+    fmt: OutputFormat = Query("json", alias="format"),
+    role: str = Depends(require_role("read")),
+):
+    cli = await get_client()
+    try:
+        with REQUEST_LATENCY.labels("problems_active").time():
+            REQUEST_COUNT.labels("problems_active").inc()
+            s = settings_cache or load_settings()
+            problem_tracker.refresh_seconds = s.problems_refresh_seconds
+            eff_limit = min(max(1, limit), s.max_results_limit)
+            resp = await _until_disconnect(
+                request,
+                active_problems(
+                    cli,
+                    problem_tracker,
+                    severities=severity,
+                    host_groups=group,
+                    hosts=host,
+                    limit=eff_limit,
+                    refresh=refresh,
+                ),
+            )
+        return _render(resp, fmt)
     except ZabbixAPIError as e:
         raise HTTPException(
             status_code=502,
@@ -211,22 +604,26 @@ async def api_alerts_top(by: str = "severity", limit: int = 100, role: str = Dep
 
 
 @app.post("/logs/associate", response_model=AlertResponse)
-async def api_logs_associate(payload: LogAssociationQuery, role: str = Depends(require_role("read"))):
+async def api_logs_associate(
+    payload: LogAssociationQuery,
+    request: Request,
+    fmt: OutputFormat = Query("json", alias="format"),
+    role: str = Depends(require_role("read")),
+):
     cli = await get_client()
     try:
         with REQUEST_LATENCY.labels("logs_associate").time():
             REQUEST_COUNT.labels("logs_associate").inc()
             s = settings_cache or load_settings()
             eff_limit = min(max(1, payload.limit), s.max_results_limit)
-            payload = LogAssociationQuery(
-                keywords=payload.keywords,
-                time_range=payload.time_range,
-                host_groups=payload.host_groups,
-                hosts=payload.hosts,
-                limit=eff_limit,
+            payload = payload.model_copy(update={"limit": eff_limit})
+            resp, _ = await _until_disconnect(
+                request,
+                associate_logs(
+                    cli, payload, correlator=get_correlator(s.log_paths, s.log_index_stride_bytes)
+                ),
             )
-            resp, _ = await associate_logs(cli, payload)
-        return JSONResponse(resp.model_dump())
+        return _render(resp, fmt)
     except ZabbixAPIError as e:
         raise HTTPException(
             status_code=502,
@@ -240,13 +637,52 @@ async def api_logs_associate(payload: LogAssociationQuery, role: str = Depends(r
 
 
 @app.post("/alerts/nl", response_model=AlertResponse)
-async def api_alerts_nl(payload: NLQuery, role: str = Depends(require_role("read"))):
+async def api_alerts_nl(
+    payload: NLQuery,
+    request: Request,
+    fmt: OutputFormat = Query("json", alias="format"),
+    role: str = Depends(require_role("read")),
+):
     cli = await get_client()
     try:
         REQUEST_COUNT.labels("alerts_nl").inc()
-        q = parse_alert_query(payload.text)
-        resp = await query_alerts(cli, q)
-        return JSONResponse(resp.model_dump())
+        resp = await _until_disconnect(request, nl_alerts(cli, payload.text))
+        return _render(resp, fmt)
+    except ZabbixAPIError as e:
+        raise HTTPException(
+            status_code=502,
+            detail=ErrorResponse(
+                i18n_key="error.zabbix_api",
+                message=str(e),
+            ).model_dump(),
+        )
+    finally:
+        await cli.logout()
+
+
+@app.post("/alerts/batch", response_model=BatchResponse)
+async def api_alerts_batch(payload: BatchQuery, request: Request, role: str = Depends(require_role("read"))):
+    cli = await get_client()
+    try:
+        with REQUEST_LATENCY.labels("alerts_batch").time():
+            REQUEST_COUNT.labels("alerts_batch").inc()
+            s = settings_cache or load_settings()
+            resp = await _until_disconnect(
+                request,
+                batch_alerts(
+                    cli,
+                    payload.queries,
+                    max_limit=s.max_results_limit,
+                    correlator=get_correlator(s.log_paths, s.log_index_stride_bytes),
+                    concurrency=s.max_concurrency,
+                ),
+            )
+        return JSONResponse(resp.model_dump(mode="json"))
+    except ValueError as e:
+        raise HTTPException(
+            status_code=400,
+            detail=ErrorResponse(i18n_key="error.invalid_query", message=str(e)).model_dump(),
+        )
     except ZabbixAPIError as e:
         raise HTTPException(
             status_code=502,
@@ -259,6 +695,54 @@ async def api_alerts_nl(payload: NLQuery, role: str = Depends(require_role("read
         await cli.logout()
 
 
+@app.get("/items", response_model=ItemListResponse)
+async def api_items(
+    request: Request,
+    host: Optional[List[str]] = Query(None),
+    search: Optional[str] = None,
+    limit: int = 100,
+    role: str = Depends(require_role("read")),
+):
+    s = settings_cache or load_settings()
+    cli = await get_client()
+    try:
+        with REQUEST_LATENCY.labels("items").time():
+            REQUEST_COUNT.labels("items").inc()
+            resp = await _until_disconnect(
+                request, list_items(cli, hosts=host, search=search, limit=min(max(1, limit), s.max_results_limit))
+            )
+        return JSONResponse(resp.model_dump())
+    except ZabbixAPIError as e:
+        raise HTTPException(
+            status_code=502,
+            detail=ErrorResponse(i18n_key="error.zabbix_api", message=str(e)).model_dump(),
+        )
+    finally:
+        await cli.logout()
+
+
+@app.post("/items/series", response_model=ItemSeriesResponse)
+async def api_items_series(payload: ItemSeriesQuery, request: Request, role: str = Depends(require_role("read"))):
+    cli = await get_client()
+    try:
+        with REQUEST_LATENCY.labels("items_series").time():
+            REQUEST_COUNT.labels("items_series").inc()
+            resp = await _until_disconnect(request, item_series(cli, payload))
+        return JSONResponse(resp.model_dump())
+    except ValueError as e:
+        raise HTTPException(
+            status_code=400,
+            detail=ErrorResponse(i18n_key="error.invalid_query", message=str(e)).model_dump(),
+        )
+    except ZabbixAPIError as e:
+        raise HTTPException(
+            status_code=502,
+            detail=ErrorResponse(i18n_key="error.zabbix_api", message=str(e)).model_dump(),
+        )
+    finally:
+        await cli.logout()
+
+
 @app.get("/health")
 async def health():
     try:
@@ -268,6 +752,16 @@ async def health():
         return {"status": "config_missing"}
 
 
+@app.get("/ready")
+async def ready():
+    """Readiness for load balancers: 200 once the warm-up has finished."""
+    if warmup_state.get("state") == "failed" and settings_cache is not None and settings_cache.warmup_enabled:
+        # Zabbix may be back; retry in the background and stay unready meanwhile.
+        _start_warm_up(settings_cache)
+    ok = warmup_state.get("state") in {"ready", "degraded", "disabled"}
+    return JSONResponse(dict(warmup_state), status_code=200 if ok else 503)
+
+
 @app.get("/version")
 async def version(role: str = Depends(require_role("read"))):
     cli = await get_client()
@@ -278,37 +772,121 @@ async def version(role: str = Depends(require_role("read"))):
         await cli.logout()
 @app.get("/metrics")
 async def metrics():
-    from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
-    data = generate_latest()  
-    return Response(content=data, media_type=CONTENT_TYPE_LATEST)
+    data, content_type = render_metrics()
+    return Response(content=data, media_type=content_type)
+
+
+# How long a connection without an Authorization header has to send its token.
+WS_AUTH_TIMEOUT_SECONDS = 10.0
+
+
+async def _ws_first_message_token(ws: WebSocket) -> Optional[str]:
+    """Token from a first ``{"token": "..."}`` message; None on timeout or anything else."""
+    try:
+        msg = json.loads(await asyncio.wait_for(ws.receive_text(), timeout=WS_AUTH_TIMEOUT_SECONDS))
+    except (asyncio.TimeoutError, ValueError):
+        return None
+    token = msg.get("token") if isinstance(msg, dict) else None
+    return token if isinstance(token, str) else None
 
 
 @app.websocket("/mcp/ws")
 async def mcp_ws(ws: WebSocket):
-    await client_registry.connect(ws)
+    if "token" in ws.query_params:
+        # Query strings end up in access and proxy logs; refuse instead of honoring a leaked token.
+        await ws.close(code=1008)
+        return
+    auth = ws.headers.get("authorization")
+    if auth and role_for_token(auth.split(" ")[-1]) not in {"admin", "read"}:
+        await ws.close(code=1008)
+        return
     try:
-        while True:
-            msg = await ws.receive_text()
-            await ws.send_text("ok:" + msg)
+        s = settings_cache or load_settings()
     except Exception:
+        await ws.close(code=1011)
+        return
+    await client_registry.connect(ws)
+    try:
+        # Browsers cannot set headers on a WebSocket; they send the token as the first message.
+        if not auth and role_for_token(await _ws_first_message_token(ws)) not in {"admin", "read"}:
+            await ws.close(code=1008)
+            return
+        await McpSession(ws, get_client, s, max_inflight=s.mcp_ws_max_inflight).run()
+    except WebSocketDisconnect:
+        pass
+    finally:
         await client_registry.disconnect(ws)
 
 
-@app.post("/queue/enqueue")
-async def enqueue(job: dict, role: str = Depends(require_role("admin"))):
+def _forbid_read_only() -> None:
     s = settings_cache or load_settings()
     if s.read_only:
         raise HTTPException(status_code=403, detail=ErrorResponse(i18n_key="error.read_only", message="read-only mode").model_dump())
-    await task_queue.enqueue(job)
-    return {"status": "queued"}
+
+
+def _invalid_job(e: Exception) -> HTTPException:
+    return HTTPException(status_code=400, detail=ErrorResponse(i18n_key="error.invalid_query", message=str(e)).model_dump())
+
+
+@app.post("/queue/enqueue")
+async def enqueue(job: dict, role: str = Depends(require_role("admin"))):
+    _forbid_read_only()
+    try:
+        _job_query(job)
+    except ValueError as e:
+        raise _invalid_job(e)
+    job_id = await task_queue.enqueue(job)
+    return {"status": "queued", "id": job_id}
 
 
 @app.get("/queue/stats")
 async def queue_stats(role: str = Depends(require_role("admin"))):
-    s = settings_cache or load_settings()
-    if s.read_only:
-        raise HTTPException(status_code=403, detail=ErrorResponse(i18n_key="error.read_only", message="read-only mode").model_dump())
-    return {"size": task_queue.queue.qsize(), "workers": task_queue.workers}
+    _forbid_read_only()
+    return task_queue.stats()
+
+
+@app.get("/queue/jobs", response_model=List[JobInfo])
+async def queue_jobs(role: str = Depends(require_role("admin"))):
+    return task_queue.list_jobs()
+
+
+@app.get("/queue/jobs/{job_id}", response_model=JobInfo)
+async def queue_job(job_id: str, role: str = Depends(require_role("read"))):
+    info = await task_queue.get(job_id)
+    if info is None:
+        raise HTTPException(status_code=404, detail=ErrorResponse(i18n_key="error.not_found", message="job not found").model_dump())
+    return info
+
+
+@app.get("/queue/schedules", response_model=List[ScheduleInfo])
+async def queue_schedules(role: str = Depends(require_role("admin"))):
+    return [sched.info() for sched in task_queue.schedules.values()]
+
+
+@app.post("/queue/schedules", response_model=ScheduleInfo)
+async def queue_schedule_add(spec: ScheduleSpec, role: str = Depends(require_role("admin"))):
+    _forbid_read_only()
+    existing = task_queue.schedules.get(spec.id or "")
+    if existing is not None and existing.origin == "config":
+        raise _invalid_job(ValueError(f"schedule {spec.id!r} is defined in QUEUE_SCHEDULES"))
+    try:
+        _job_query(spec.job)
+        sched = task_queue.add_schedule(spec)
+    except ValueError as e:
+        raise _invalid_job(e)
+    return sched.info()
+
+
+@app.delete("/queue/schedules/{schedule_id}")
+async def queue_schedule_remove(schedule_id: str, role: str = Depends(require_role("admin"))):
+    _forbid_read_only()
+    sched = task_queue.schedules.get(schedule_id)
+    if sched is None:
+        raise HTTPException(status_code=404, detail=ErrorResponse(i18n_key="error.not_found", message="schedule not found").model_dump())
+    if sched.origin == "config":
+        raise _invalid_job(ValueError(f"schedule {schedule_id!r} is defined in QUEUE_SCHEDULES"))
+    task_queue.remove_schedule(schedule_id)
+    return {"status": "removed"}
 
 
 @app.post("/config/reload")
@@ -317,5 +895,13 @@ async def config_reload(role: str = Depends(require_role("admin"))):
     s = settings_cache or load_settings()
     if s.read_only:
         raise HTTPException(status_code=403, detail=ErrorResponse(i18n_key="error.read_only", message="read-only mode").model_dump())
-    settings_cache = load_settings()
+    fresh = load_settings()
+    try:
+        _configure_queue(fresh)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=ErrorResponse(i18n_key="error.config_invalid", message=str(e)).model_dump())
+    settings_cache = fresh
+    _configure_admission(settings_cache)
+    daywindow.configure(settings_cache.day_timezone)
+    _configure_shared_state(settings_cache)
     return {"status": "reloaded"}
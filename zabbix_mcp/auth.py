@@ -19,16 +19,20 @@ from typing import Optional
 from fastapi import Header, HTTPException
 
 
+def role_for_token(token: Optional[str]) -> Optional[str]:
+    admin = os.getenv("MCP_AUTH_TOKEN_ADMIN")
+    read = os.getenv("MCP_AUTH_TOKEN_READ")
+    if token and admin and token == admin:
+        return "admin"
+    if token and read and token == read:
+        return "read"
+    return None
+
+
 def require_role(required: str):
     async def checker(authorization: Optional[str] = Header(default=None)):
         token = authorization.split(" ")[-1] if authorization else None
-        admin = os.getenv("MCP_AUTH_TOKEN_ADMIN")
-        read = os.getenv("MCP_AUTH_TOKEN_READ")
-        role = None
-        if token and admin and token == admin:
-            role = "admin"
-        elif token and read and token == read:
-            role = "read"
+        role = role_for_token(token)
         if required == "admin" and role != "admin":
             raise HTTPException(status_code=403, detail={"i18n_key": "error.forbidden", "message": "admin required"})
         if required == "read" and role not in {"admin", "read"}:
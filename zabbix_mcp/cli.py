@@ -15,43 +15,93 @@ limitations under the License.
 """
 
 import asyncio
+import json
+import os
+import sys
 import time
-from typing import Optional, List
+from collections import deque
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Optional, List
 
 import typer
-from rich.console import Console
-from rich.table import Table
 
-from .config import load_settings
-from .zabbix_client import ZabbixClient
-from .schemas import AlertQuery, LogAssociationQuery, TimeRange
-from .services import query_alerts, today_alerts, associate_logs
-from .nlp import parse_alert_query
+# Heavy modules (rich, httpx, pydantic schemas, services) are imported inside
+# the commands that need them so `--help` and machine output start quickly.
 
 
 app = typer.Typer(help="Zabbix MCP CLI")
-console = Console()
 
 
-def _client() -> ZabbixClient:
+@lru_cache(maxsize=None)
+def _console():
+    from rich.console import Console
+
+    return Console()
+
+
+def _client():
+    from . import daywindow
+    from .config import load_settings
+    from .zabbix_client import ZabbixClient, MockZabbixClient
+
     try:
         s = load_settings()
     except Exception as e:
-        console.print({"i18n_key": "error.config_missing", "message": str(e)})
+        _write_json({"i18n_key": "error.config_missing", "message": str(e)})
         raise SystemExit(1)
+    daywindow.configure(s.day_timezone)
     if s.mock_mode:
-        from .zabbix_client import MockZabbixClient
-        return MockZabbixClient()  # type: ignore[return-value]
+        return MockZabbixClient()
+    if s.zabbix_instances:
+        from .federation import build_federated_client
+
+        return build_federated_client(s)
+    cache = None
+    if s.shared_state_url:
+        from .metadata import get_cache
+        from .sharedstate import get_backend
+
+        # Repeated CLI runs reuse the server workers' session instead of logging in each time.
+        cache = get_cache(
+            str(s.zabbix_url), s.zabbix_username, s.metadata_ttl_seconds, store=get_backend(s.shared_state_url)
+        )
     return ZabbixClient(
         base_url=str(s.zabbix_url),
         username=s.zabbix_username,
-        password=s.zabbix_password.get_secret_value(),
+        password=s.zabbix_password.get_secret_value() if s.zabbix_password else None,
         timeout=s.request_timeout_seconds,
         max_concurrency=s.max_concurrency,
+        verify_ssl=s.verify_ssl,
+        token=s.zabbix_token.get_secret_value() if s.zabbix_token else None,
+        cache=cache,
+        event_slices=s.event_slices,
+        slice_min_window=s.event_slice_min_window_seconds,
     )
 
 
-def _print_table(items):
+def _write_json(obj: Any) -> None:
+    """Write one compact JSON document (a pydantic model or plain data) to stdout."""
+    if hasattr(obj, "model_dump_json"):
+        sys.stdout.write(obj.model_dump_json())
+    else:
+        sys.stdout.write(json.dumps(obj, ensure_ascii=False))
+    sys.stdout.write("\n")
+    sys.stdout.flush()
+
+
+def _write_ndjson(rows: Iterable[Any]) -> None:
+    out = sys.stdout
+    for r in rows:
+        out.write(r.model_dump_json() if hasattr(r, "model_dump_json") else json.dumps(r, ensure_ascii=False))
+        out.write("\n")
+    out.flush()
+
+
+def _alerts_table(items):
+    from rich.table import Table
+
+    # Column checks below take extra passes; callers may hand in a one-shot iterator.
+    items = list(items)
     table = Table(title="alerts.table.title")
     table.add_column("alerts.col.id")
     table.add_column("alerts.col.name")
@@ -59,20 +109,56 @@ def _print_table(items):
     table.add_column("alerts.col.ip")
     table.add_column("alerts.col.severity")
     table.add_column("alerts.col.time")
+    grouped = any(it.group is not None for it in items)
+    if grouped:
+        table.add_column("alerts.col.group")
+    compacted = any(it.count is not None for it in items)
+    if compacted:
+        table.add_column("alerts.col.count")
     for it in items:
-        table.add_row(
+        row = [
             it.id,
             it.name,
             it.host,
             it.host_ip or "",
             str(it.severity),
             time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(it.timestamp)),
-        )
-    console.print(table)
+        ]
+        if grouped:
+            row.append(it.group or "")
+        if compacted:
+            row.append(str(it.count or 1))
+        table.add_row(*row)
+    return table
+
+
+def _print_table(items):
+    _console().print(_alerts_table(items))
+
+
+def _output(res, json_output: bool, output_format: str = "json") -> None:
+    if output_format == "columnar":
+        from .columnar import to_columnar
+
+        _write_json(to_columnar(res))
+    elif json_output:
+        _write_json(res)
+    else:
+        _print_table(res.items)
+
+
+def _time_range(start_ts: Optional[int], end_ts: Optional[int]):
+    from .schemas import TimeRange
+
+    if start_ts or end_ts:
+        return TimeRange(start_ts=start_ts or 0, end_ts=end_ts or int(time.time()))
+    return None
 
 
 @app.command()
-def today(limit: int = 100, json_output: bool = False):
+def today(limit: int = 100, json_output: bool = False, output_format: str = typer.Option("json", "--format", help="json | columnar (implies JSON output)")):
+    from .services import today_alerts
+
     cli = _client()
     async def run():
         await cli.login()
@@ -80,14 +166,14 @@ def today(limit: int = 100, json_output: bool = False):
         await cli.logout()
         return res
     res = asyncio.run(run())
-    if json_output:
-        console.print(res.model_dump())
-    else:
-        _print_table(res.items)
+    _output(res, json_output, output_format)
 
 
 @app.command()
-def top(by: str = "severity", limit: int = 100, json_output: bool = False):
+def top(by: str = "severity", limit: int = 100, json_output: bool = False, output_format: str = typer.Option("json", "--format", help="json | columnar (implies JSON output)")):
+    from .schemas import AlertQuery
+    from .services import query_alerts
+
     cli = _client()
     async def run():
         await cli.login()
@@ -95,10 +181,7 @@ def top(by: str = "severity", limit: int = 100, json_output: bool = False):
         await cli.logout()
         return res
     res = asyncio.run(run())
-    if json_output:
-        console.print(res.model_dump())
-    else:
-        _print_table(res.items)
+    _output(res, json_output, output_format)
 
 
 @app.command()
@@ -109,18 +192,28 @@ def query(
     host: Optional[List[str]] = typer.Option(None),
     severity: Optional[List[int]] = typer.Option(None),
     limit: int = 100,
+    compact: bool = typer.Option(False, help="Fold repeats of a trigger on a host into one row"),
+    compact_window: int = 3600,
+    sort_by: Optional[str] = typer.Option(None, help="severity | frequency | time | group"),
+    group_by: Optional[str] = typer.Option(None, help="group | host: keep each group's rows together"),
     json_output: bool = False,
+    output_format: str = typer.Option("json", "--format", help="json | columnar (implies JSON output)"),
 ):
+    from .schemas import AlertQuery
+    from .services import query_alerts
+
     cli = _client()
-    tr = None
-    if start_ts or end_ts:
-        tr = TimeRange(start_ts=start_ts or 0, end_ts=end_ts or int(time.time()))
+    tr = _time_range(start_ts, end_ts)
     q = AlertQuery(
         time_range=tr,
         host_groups=group,
         hosts=host,
         severities=severity,
         limit=limit,
+        compact=compact,
+        compact_window=compact_window,
+        sort_by=sort_by,
+        group_by=group_by,
     )
     async def run():
         await cli.login()
@@ -128,10 +221,65 @@ def query(
         await cli.logout()
         return res
     res = asyncio.run(run())
+    _output(res, json_output, output_format)
+
+
+@app.command()
+def stats(
+    start_ts: Optional[int] = None,
+    end_ts: Optional[int] = None,
+    group: Optional[List[str]] = typer.Option(None),
+    host: Optional[List[str]] = typer.Option(None),
+    severity: Optional[List[int]] = typer.Option(None),
+    by: Optional[List[str]] = typer.Option(None, help="severity, host, group, histogram"),
+    bucket_seconds: int = 3600,
+    json_output: bool = False,
+):
+    """True totals, breakdowns and histograms from server-side counts."""
+    from .schemas import AlertStatsQuery
+    from .services import alert_stats
+
+    cli = _client()
+    q = AlertStatsQuery(
+        time_range=_time_range(start_ts, end_ts),
+        host_groups=group,
+        hosts=host,
+        severities=severity,
+        dimensions=by or ["severity"],
+        bucket_seconds=bucket_seconds,
+    )
+    async def run():
+        await cli.login()
+        try:
+            return await alert_stats(cli, q)
+        finally:
+            await cli.logout()
+    res = asyncio.run(run())
     if json_output:
-        console.print(res.model_dump())
-    else:
-        _print_table(res.items)
+        _write_json(res)
+        return
+    from rich.table import Table
+
+    _console().print(f"alerts.stats.total: {res.total}")
+    sections = [
+        ("alerts.stats.by_severity", res.by_severity),
+        ("alerts.stats.by_group", res.by_group),
+        ("alerts.stats.by_host", res.by_host),
+    ]
+    if res.histogram is not None:
+        sections.append((
+            "alerts.stats.histogram",
+            {time.strftime("%Y-%m-%d %H:%M", time.localtime(b.start_ts)): b.count for b in res.histogram},
+        ))
+    for title, data in sections:
+        if data is None:
+            continue
+        table = Table(title=title)
+        table.add_column("key")
+        table.add_column("count", justify="right")
+        for k, v in data.items():
+            table.add_row(k, str(v))
+        _console().print(table)
 
 
 @app.command()
@@ -142,42 +290,188 @@ def associate(
     group: Optional[List[str]] = typer.Option(None),
     host: Optional[List[str]] = typer.Option(None),
     limit: int = 100,
+    include_logs: bool = False,
+    log_paths: Optional[str] = None,
+    window_before: int = 300,
+    window_after: int = 300,
     json_output: bool = False,
+    output_format: str = typer.Option("json", "--format", help="json | columnar (implies JSON output)"),
 ):
+    from .config import load_settings
+    from .logindex import get_correlator
+    from .schemas import LogAssociationQuery
+    from .services import associate_logs
+
     cli = _client()
-    tr = None
-    if start_ts or end_ts:
-        tr = TimeRange(start_ts=start_ts or 0, end_ts=end_ts or int(time.time()))
+    s = load_settings()
+    correlator = get_correlator(log_paths or s.log_paths, s.log_index_stride_bytes)
+    tr = _time_range(start_ts, end_ts)
     q = LogAssociationQuery(
         keywords=keywords,
         time_range=tr,
         host_groups=group,
         hosts=host,
         limit=limit,
+        include_logs=include_logs,
+        window_before=window_before,
+        window_after=window_after,
     )
     async def run():
         await cli.login()
-        res, _ = await associate_logs(cli, q)
+        res, _ = await associate_logs(cli, q, correlator=correlator)
         await cli.logout()
         return res
     res = asyncio.run(run())
-    if json_output:
-        console.print(res.model_dump())
-    else:
-        _print_table(res.items)
+    _output(res, json_output, output_format)
+    if include_logs and not json_output:
+        for it in res.items:
+            if it.logs:
+                _console().rule(f"{it.id} {it.host} {it.name}")
+                for ln in it.logs:
+                    _console().print(ln.line, markup=False, highlight=False)
 
 
 @app.command()
-def nl(text: str, json_output: bool = False):
+def nl(text: str, json_output: bool = False, output_format: str = typer.Option("json", "--format", help="json | columnar (implies JSON output)")):
+    from .services import nl_alerts
+
     cli = _client()
     async def run():
         await cli.login()
-        q = parse_alert_query(text)
-        res = await query_alerts(cli, q)
+        res = await nl_alerts(cli, text)
         await cli.logout()
         return res
     res = asyncio.run(run())
-    if json_output:
-        console.print(res.model_dump())
+    _output(res, json_output, output_format)
+
+
+_WATCH_GAP = "more new alerts than the page limit since the last poll; older ones were skipped"
+
+
+@app.command()
+def watch(
+    group: Optional[List[str]] = typer.Option(None),
+    host: Optional[List[str]] = typer.Option(None),
+    severity: Optional[List[int]] = typer.Option(None),
+    interval: float = 5.0,
+    limit: int = 100,
+    rows: int = 50,
+    json_output: bool = False,
+):
+    """Keep one session open and tail new alerts incrementally."""
+    from .federation import track_failures
+    from .schemas import AlertQuery
+    from .services import poll_new_alerts
+
+    cli = _client()
+    q = AlertQuery(
+        host_groups=group,
+        hosts=host,
+        severities=severity,
+        limit=limit,
+    )
+    async def run():
+        await cli.login()
+        try:
+            marks: Optional[Dict[str, str]] = None
+            if json_output:
+                while True:
+                    track_failures()
+                    res, marks = await poll_new_alerts(cli, q, marks)
+                    if res.truncated:
+                        # Keep stdout to alert rows; the gap notice goes to stderr.
+                        sys.stderr.write(json.dumps({"i18n_key": "warning.watch_gap", "message": _WATCH_GAP}) + "\n")
+                    _write_ndjson(res.items)
+                    await asyncio.sleep(interval)
+            else:
+                from rich.live import Live
+
+                recent: deque = deque(maxlen=max(1, rows))
+                with Live(_alerts_table([]), console=_console(), auto_refresh=False) as live:
+                    while True:
+                        track_failures()
+                        res, marks = await poll_new_alerts(cli, q, marks)
+                        if res.truncated:
+                            live.console.print(f"[yellow]{_WATCH_GAP}[/yellow]")
+                        if res.items or not recent:
+                            recent.extend(res.items)
+                            live.update(_alerts_table(reversed(recent)), refresh=True)
+                        await asyncio.sleep(interval)
+        finally:
+            await cli.logout()
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+def _load_batch_specs(path: str) -> List[Dict[str, Any]]:
+    if path == "-":
+        text = sys.stdin.read()
     else:
-        _print_table(res.items)
+        with open(path, "r", encoding="utf-8") as f:
+            text = f.read()
+    if path.endswith((".yaml", ".yml")):
+        try:
+            import yaml
+        except ImportError:
+            _write_json({"i18n_key": "error.yaml_unavailable", "message": "PyYAML is required for YAML batch files"})
+            raise SystemExit(1)
+        return [d for d in yaml.safe_load_all(text) if d]
+    specs = []
+    for line in text.splitlines():
+        line = line.strip()
+        if line and not line.startswith("#"):
+            specs.append(json.loads(line))
+    return specs
+
+
+def _check_batch_ids(specs) -> None:
+    """Ids become file names under --output-dir: keep them plain and unique."""
+    import re
+
+    seen = set()
+    for idx, spec in enumerate(specs):
+        qid = str(spec.get("id", idx))
+        if not re.fullmatch(r"[A-Za-z0-9_-][A-Za-z0-9._-]*", qid) or ".." in qid or qid in seen:
+            _write_json(
+                {
+                    "i18n_key": "error.invalid_batch_id",
+                    "message": f"query id {qid!r} must be unique and use only letters, digits, '.', '_' and '-'",
+                }
+            )
+            raise SystemExit(1)
+        seen.add(qid)
+
+
+@app.command()
+def batch(
+    path: str,
+    concurrency: int = 4,
+    output_dir: Optional[str] = None,
+):
+    """Run many query specs (JSON lines or YAML) concurrently over one session."""
+    from .services import batch_alerts
+
+    specs = _load_batch_specs(path)
+    if output_dir:
+        _check_batch_ids(specs)
+    cli = _client()
+    async def run():
+        await cli.login()
+        try:
+            # Names are resolved once and overlapping windows share one fetch.
+            resp = await batch_alerts(cli, specs, concurrency=concurrency, max_queries=None)
+        finally:
+            await cli.logout()
+        return [{k: v for k, v in r.model_dump(mode="json").items() if v is not None} for r in resp.results]
+    results = asyncio.run(run())
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+        for r in results:
+            with open(os.path.join(output_dir, f"{r['id']}.json"), "w", encoding="utf-8") as f:
+                json.dump(r, f, ensure_ascii=False)
+    else:
+        _write_ndjson(results)
+    if not all(r["ok"] for r in results):
+        raise SystemExit(2)
@@ -0,0 +1,61 @@
+"""
+Copyright (c) 2025 Zabbix-MCP
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+from typing import Any, Dict, List
+
+from .schemas import AlertResponse
+
+# Low-cardinality string columns: values are indexes into ``dicts[<column>]``.
+DICT_COLUMNS = ("name", "host", "host_ip", "group", "instance")
+PLAIN_COLUMNS = ("id", "severity", "timestamp")
+# Emitted only when at least one item carries a value.
+OPTIONAL_COLUMNS = ("count", "first_timestamp", "last_timestamp", "matched_keywords", "logs")
+
+
+def to_columnar(resp: AlertResponse) -> Dict[str, Any]:
+    """Column-oriented form of an ``AlertResponse``.
+
+    Each field becomes one array aligned by position; ``name``, ``host``,
+    ``host_ip``, ``group`` and ``instance`` hold indexes into ``dicts`` (null
+    stays null). Columns that are null for every item are left out.
+    """
+    items = resp.items
+    columns: Dict[str, List[Any]] = {c: [getattr(it, c) for it in items] for c in PLAIN_COLUMNS}
+    dicts: Dict[str, List[Any]] = {}
+    for c in DICT_COLUMNS:
+        codes: Dict[Any, int] = {}
+        col: List[Any] = []
+        for it in items:
+            v = getattr(it, c)
+            col.append(None if v is None else codes.setdefault(v, len(codes)))
+        if codes:
+            dicts[c] = list(codes)
+            columns[c] = col
+    for c in OPTIONAL_COLUMNS:
+        col = [getattr(it, c) for it in items]
+        if any(v is not None for v in col):
+            if c == "logs":
+                col = [None if v is None else [ln.model_dump() for ln in v] for v in col]
+            columns[c] = col
+    return {
+        "format": "columnar",
+        "total": resp.total,
+        "partial": resp.partial,
+        "failed_instances": resp.failed_instances,
+        "groups": [g.model_dump() for g in resp.groups] if resp.groups is not None else None,
+        "dicts": dicts,
+        "columns": columns,
+    }
@@ -14,14 +14,16 @@ See the License for the specific language governing permissions and
 limitations under the License.
 """
 
-from pydantic import BaseModel, Field, AnyHttpUrl, SecretStr
+from pydantic import BaseModel, Field, AnyHttpUrl, SecretStr, model_validator
 from typing import Optional
 import os
 from dotenv import load_dotenv
 
+from .daywindow import parse_timezone
+
 
 class Settings(BaseModel):
-    zabbix_url: AnyHttpUrl = Field(..., alias="ZABBIX_URL")
+    zabbix_url: Optional[AnyHttpUrl] = Field(None, alias="ZABBIX_URL")
     zabbix_username: Optional[str] = Field(None, alias="ZABBIX_USERNAME")
     zabbix_password: Optional[SecretStr] = Field(None, alias="ZABBIX_PASSWORD")
     zabbix_token: Optional[SecretStr] = Field(None, alias="ZABBIX_TOKEN")
@@ -31,6 +33,42 @@ class Settings(BaseModel):
     verify_ssl: bool = Field(True, alias="VERIFY_SSL")
     read_only: bool = Field(True, alias="READ_ONLY")
     max_results_limit: int = Field(100, alias="MAX_RESULTS_LIMIT")
+    log_paths: Optional[str] = Field(None, alias="LOG_PATHS")
+    log_index_stride_bytes: int = Field(65536, alias="LOG_INDEX_STRIDE_BYTES")
+    problems_refresh_seconds: float = Field(15.0, alias="PROBLEMS_REFRESH_SECONDS")
+    request_deadline_seconds: Optional[float] = Field(None, alias="REQUEST_DEADLINE_SECONDS")
+    max_request_deadline_seconds: float = Field(60.0, alias="MAX_REQUEST_DEADLINE_SECONDS")
+    zabbix_instances: Optional[str] = Field(None, alias="ZABBIX_INSTANCES")
+    federation_timeout_seconds: float = Field(10.0, alias="FEDERATION_TIMEOUT_SECONDS")
+    rollup_refresh_seconds: float = Field(30.0, alias="ROLLUP_REFRESH_SECONDS")
+    rollup_poller: bool = Field(True, alias="ROLLUP_POLLER")
+    rollup_max_events: int = Field(50000, alias="ROLLUP_MAX_EVENTS")
+    mcp_ws_max_inflight: int = Field(8, alias="MCP_WS_MAX_INFLIGHT")
+    warmup_enabled: bool = Field(True, alias="WARMUP_ENABLED")
+    warmup_timeout_seconds: float = Field(10.0, alias="WARMUP_TIMEOUT_SECONDS")
+    metadata_ttl_seconds: float = Field(300.0, alias="METADATA_TTL_SECONDS")
+    admission_max_inflight: int = Field(16, alias="ADMISSION_MAX_INFLIGHT")
+    admission_queue_size: int = Field(32, alias="ADMISSION_QUEUE_SIZE")
+    admission_queue_timeout_seconds: float = Field(2.0, alias="ADMISSION_QUEUE_TIMEOUT_SECONDS")
+    admission_route_limits: Optional[str] = Field(None, alias="ADMISSION_ROUTE_LIMITS")
+    shared_state_url: Optional[str] = Field(None, alias="SHARED_STATE_URL")
+    event_slices: int = Field(8, alias="EVENT_SLICES")
+    event_slice_min_window_seconds: int = Field(259200, alias="EVENT_SLICE_MIN_WINDOW_SECONDS")
+    queue_max_results: int = Field(200, alias="QUEUE_MAX_RESULTS")
+    queue_result_ttl_seconds: float = Field(86400.0, alias="QUEUE_RESULT_TTL_SECONDS")
+    queue_schedules: Optional[str] = Field(None, alias="QUEUE_SCHEDULES")
+    day_timezone: str = Field("UTC", alias="DAY_TIMEZONE")
+
+    @model_validator(mode="after")
+    def _require_target(self) -> "Settings":
+        if self.zabbix_url is None and not self.zabbix_instances and not self.mock_mode:
+            raise ValueError("ZABBIX_URL or ZABBIX_INSTANCES is required")
+        return self
+
+    @model_validator(mode="after")
+    def _check_day_timezone(self) -> "Settings":
+        parse_timezone(self.day_timezone)
+        return self
 
 
 def load_settings() -> Settings:
@@ -46,5 +84,30 @@ def load_settings() -> Settings:
         "VERIFY_SSL": os.getenv("VERIFY_SSL", "1"),
         "READ_ONLY": os.getenv("READ_ONLY", "1"),
         "MAX_RESULTS_LIMIT": os.getenv("MAX_RESULTS_LIMIT", "100"),
+        "LOG_PATHS": os.getenv("LOG_PATHS"),
+        "LOG_INDEX_STRIDE_BYTES": os.getenv("LOG_INDEX_STRIDE_BYTES", "65536"),
+        "PROBLEMS_REFRESH_SECONDS": os.getenv("PROBLEMS_REFRESH_SECONDS", "15"),
+        "REQUEST_DEADLINE_SECONDS": os.getenv("REQUEST_DEADLINE_SECONDS") or None,
+        "MAX_REQUEST_DEADLINE_SECONDS": os.getenv("MAX_REQUEST_DEADLINE_SECONDS", "60"),
+        "ZABBIX_INSTANCES": os.getenv("ZABBIX_INSTANCES"),
+        "FEDERATION_TIMEOUT_SECONDS": os.getenv("FEDERATION_TIMEOUT_SECONDS", "10"),
+        "ROLLUP_REFRESH_SECONDS": os.getenv("ROLLUP_REFRESH_SECONDS", "30"),
+        "ROLLUP_POLLER": os.getenv("ROLLUP_POLLER", "1"),
+        "ROLLUP_MAX_EVENTS": os.getenv("ROLLUP_MAX_EVENTS", "50000"),
+        "MCP_WS_MAX_INFLIGHT": os.getenv("MCP_WS_MAX_INFLIGHT", "8"),
+        "WARMUP_ENABLED": os.getenv("WARMUP_ENABLED", "1"),
+        "WARMUP_TIMEOUT_SECONDS": os.getenv("WARMUP_TIMEOUT_SECONDS", "10"),
+        "METADATA_TTL_SECONDS": os.getenv("METADATA_TTL_SECONDS", "300"),
+        "ADMISSION_MAX_INFLIGHT": os.getenv("ADMISSION_MAX_INFLIGHT", "16"),
+        "ADMISSION_QUEUE_SIZE": os.getenv("ADMISSION_QUEUE_SIZE", "32"),
+        "ADMISSION_QUEUE_TIMEOUT_SECONDS": os.getenv("ADMISSION_QUEUE_TIMEOUT_SECONDS", "2"),
+        "ADMISSION_ROUTE_LIMITS": os.getenv("ADMISSION_ROUTE_LIMITS"),
+        "SHARED_STATE_URL": os.getenv("SHARED_STATE_URL") or None,
+        "EVENT_SLICES": os.getenv("EVENT_SLICES", "8"),
+        "EVENT_SLICE_MIN_WINDOW_SECONDS": os.getenv("EVENT_SLICE_MIN_WINDOW_SECONDS", "259200"),
+        "QUEUE_MAX_RESULTS": os.getenv("QUEUE_MAX_RESULTS", "200"),
+        "QUEUE_RESULT_TTL_SECONDS": os.getenv("QUEUE_RESULT_TTL_SECONDS", "86400"),
+        "QUEUE_SCHEDULES": os.getenv("QUEUE_SCHEDULES"),
+        "DAY_TIMEZONE": os.getenv("DAY_TIMEZONE", "UTC"),
     }
     return Settings.model_validate(env)
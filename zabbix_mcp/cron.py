@@ -0,0 +1,103 @@
+"""
+Copyright (c) 2025 Zabbix-MCP
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+from datetime import datetime, timedelta
+from typing import FrozenSet, List, Tuple
+
+# (name, low, high) of the five cron fields.
+_FIELDS: List[Tuple[str, int, int]] = [
+    ("minute", 0, 59),
+    ("hour", 0, 23),
+    ("day", 1, 31),
+    ("month", 1, 12),
+    ("weekday", 0, 7),
+]
+# Give up on expressions that never match (e.g. "0 0 30 2 *").
+_MAX_DAYS = 5 * 366
+
+
+def _parse_field(text: str, name: str, low: int, high: int) -> FrozenSet[int]:
+    values = set()
+    for part in text.split(","):
+        body, _, step_text = part.partition("/")
+        step = int(step_text) if step_text else 1
+        if step < 1:
+            raise ValueError(f"cron {name}: step must be positive")
+        if body == "*":
+            start, end = low, high
+        elif "-" in body:
+            a, b = body.split("-", 1)
+            start, end = int(a), int(b)
+        else:
+            start = int(body)
+            end = high if step_text else start
+        if start < low or end > high or start > end:
+            raise ValueError(f"cron {name}: {part!r} outside {low}-{high}")
+        values.update(range(start, end + 1, step))
+    if name == "weekday" and 7 in values:
+        # 7 is Sunday too.
+        values.discard(7)
+        values.add(0)
+    return frozenset(values)
+
+
+class CronSchedule:
+    """Five-field cron expression (minute hour day month weekday) in local time.
+
+    Supports ``*``, lists, ranges and ``/step``. As in cron, when both day of
+    month and weekday are restricted a day matching either one qualifies.
+    """
+
+    def __init__(self, expr: str) -> None:
+        parts = expr.split()
+        if len(parts) != 5:
+            raise ValueError("cron expression needs 5 fields: minute hour day month weekday")
+        self.expr = expr
+        try:
+            sets = [_parse_field(p, *f) for p, f in zip(parts, _FIELDS)]
+        except ValueError as e:
+            if str(e).startswith("cron "):
+                raise
+            raise ValueError(f"invalid cron expression: {expr!r}")
+        self.minutes, self.hours, self.days, self.months, self.weekdays = sets
+        self._any_day = parts[2] == "*"
+        self._any_weekday = parts[4] == "*"
+
+    def _day_matches(self, dt: datetime) -> bool:
+        weekday = (dt.weekday() + 1) % 7  # cron: 0 = Sunday
+        if self._any_day or self._any_weekday:
+            return dt.day in self.days and weekday in self.weekdays
+        return dt.day in self.days or weekday in self.weekdays
+
+    def next_after(self, ts: float) -> int:
+        """First matching minute strictly after ``ts``, as a Unix timestamp."""
+        dt = datetime.fromtimestamp(int(ts) // 60 * 60 + 60)
+        limit = dt + timedelta(days=_MAX_DAYS)
+        while dt < limit:
+            if dt.month not in self.months:
+                dt = (dt.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+                continue
+            if not self._day_matches(dt):
+                dt = dt.replace(hour=0, minute=0) + timedelta(days=1)
+                continue
+            if dt.hour not in self.hours:
+                dt = dt.replace(minute=0) + timedelta(hours=1)
+                continue
+            if dt.minute not in self.minutes:
+                dt += timedelta(minutes=1)
+                continue
+            return int(dt.timestamp())
+        raise ValueError(f"cron expression never matches: {self.expr!r}")
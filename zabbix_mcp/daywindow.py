@@ -0,0 +1,105 @@
+"""
+Copyright (c) 2025 Zabbix-MCP
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import re
+import time
+from datetime import date, datetime, time as dtime, timedelta, timezone, tzinfo
+from typing import Optional, Tuple
+
+try:  # Named zones (Asia/Shanghai); Python 3.9+ or the backport.
+    from zoneinfo import ZoneInfo
+except ImportError:  # pragma: no cover - depends on the environment
+    try:
+        from backports.zoneinfo import ZoneInfo  # type: ignore[no-redef]
+    except ImportError:
+        ZoneInfo = None  # type: ignore[assignment,misc]
+
+# "+08:00", "+0800", "-5", "UTC+8", "GMT-03:30"
+_OFFSET = re.compile(r"^(?:UTC|GMT)?\s*([+-])(\d{1,2})(?::?(\d{2}))?$", re.IGNORECASE)
+
+
+def parse_timezone(name: Optional[str]) -> Optional[tzinfo]:
+    """``DAY_TIMEZONE`` as a tzinfo; ``None`` (for ``local``) means the server's local time.
+
+    Accepts ``UTC``, ``local``, fixed offsets and, where ``zoneinfo`` and its
+    data are available, IANA names such as ``Asia/Shanghai`` (which also
+    follow daylight saving time).
+    """
+    text = (name or "UTC").strip()
+    if text.lower() == "local":
+        return None
+    if text.upper() in ("UTC", "GMT", "Z"):
+        return timezone.utc
+    m = _OFFSET.match(text)
+    if m:
+        hours, minutes = int(m.group(2)), int(m.group(3) or 0)
+        if hours > 23 or minutes > 59:
+            raise ValueError(f"DAY_TIMEZONE offset out of range: {text!r}")
+        offset = timedelta(hours=hours, minutes=minutes)
+        return timezone(-offset if m.group(1) == "-" else offset)
+    if ZoneInfo is None:
+        raise ValueError(f"DAY_TIMEZONE {text!r} needs zoneinfo (Python 3.9+); use a fixed offset such as +08:00")
+    try:
+        return ZoneInfo(text)
+    except (KeyError, ValueError):
+        # ZoneInfoNotFoundError is a KeyError; Windows also needs the tzdata package.
+        raise ValueError(f"unknown DAY_TIMEZONE {text!r} (install tzdata, or use a fixed offset such as +08:00)")
+
+
+class DayClock:
+    """Calendar day boundaries in one timezone.
+
+    The current day's window is cached, so the common call (``now`` within
+    today) is two comparisons; a timestamp outside it recomputes once.
+    """
+
+    def __init__(self, tz: Optional[tzinfo] = timezone.utc) -> None:
+        self.tz = tz
+        self._window: Tuple[int, int] = (0, 0)
+
+    def _midnight(self, day: date) -> int:
+        return int(datetime.combine(day, dtime(0), tzinfo=self.tz).timestamp())
+
+    def window(self, ts: Optional[float] = None) -> Tuple[int, int]:
+        """``(start, end)`` of the day containing ``ts`` (default now); ``end`` is the next midnight."""
+        ts = time.time() if ts is None else ts
+        start, end = self._window
+        if start <= ts < end:
+            return self._window
+        day = datetime.fromtimestamp(ts, self.tz).date()
+        window = (self._midnight(day), self._midnight(day + timedelta(days=1)))
+        if window[0] <= time.time() < window[1]:
+            self._window = window
+        return window
+
+
+_clock = DayClock()
+
+
+def configure(name: Optional[str]) -> None:
+    """Use ``DAY_TIMEZONE`` for every "today" window in this process."""
+    global _clock
+    tz = parse_timezone(name)
+    if tz != _clock.tz:
+        _clock = DayClock(tz)
+
+
+def day_window(ts: Optional[float] = None) -> Tuple[int, int]:
+    return _clock.window(ts)
+
+
+def day_start(ts: Optional[float] = None) -> int:
+    return _clock.window(ts)[0]
@@ -0,0 +1,69 @@
+"""
+Copyright (c) 2025 Zabbix-MCP
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+# Absolute monotonic deadline for the current request; tasks spawned while it is
+# set inherit it, so every nested RPC sees the same budget.
+_deadline: ContextVar[Optional[float]] = ContextVar("zabbix_mcp_deadline", default=None)
+
+
+class DeadlineExceeded(Exception):
+    pass
+
+
+def set_deadline(seconds: Optional[float]) -> None:
+    _deadline.set(None if seconds is None else time.monotonic() + seconds)
+
+
+def remaining() -> Optional[float]:
+    """Seconds left in the current budget, or None when no deadline applies."""
+    dl = _deadline.get()
+    if dl is None:
+        return None
+    return dl - time.monotonic()
+
+
+def check(what: str = "request") -> Optional[float]:
+    """Return the remaining budget, raising ``DeadlineExceeded`` once it is spent."""
+    left = remaining()
+    if left is not None and left <= 0:
+        raise DeadlineExceeded(f"deadline exceeded before {what}")
+    return left
+
+
+@contextmanager
+def suspended() -> Iterator[None]:
+    """Run cleanup (e.g. logout) outside the request budget."""
+    token = _deadline.set(None)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def parse_budget(raw: Optional[str], default: Optional[float], maximum: float) -> float:
+    """Requested seconds (header/query value) clamped to ``(0, maximum]``."""
+    try:
+        value = float(raw) if raw not in (None, "") else None
+    except ValueError:
+        value = None
+    if value is None or value <= 0:
+        value = default if default else maximum
+    return min(value, maximum)
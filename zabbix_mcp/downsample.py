@@ -0,0 +1,99 @@
+"""
+Copyright (c) 2025 Zabbix-MCP
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+from typing import List, Sequence, Tuple
+
+try:  # Optional: vectorized bucketing for long series.
+    import numpy as np
+except ImportError:  # pragma: no cover - depends on the environment
+    np = None
+
+# (bucket start, min, avg, max, sample count)
+Bucket = Tuple[int, float, float, float, int]
+
+
+def bucket_width(start: int, end: int, points: int) -> int:
+    return max(1, -(-(end - start + 1) // max(1, points)))
+
+
+def minmax_buckets(
+    ts: Sequence[int],
+    mins: Sequence[float],
+    avgs: Sequence[float],
+    maxs: Sequence[float],
+    counts: Sequence[int],
+    start: int,
+    end: int,
+    points: int,
+) -> List[Bucket]:
+    """Fold a series into at most ``points`` equal time buckets.
+
+    Each bucket keeps the min of ``mins``, the max of ``maxs`` and the
+    count-weighted mean of ``avgs``, so spikes survive downsampling. Raw
+    history passes the values as all three; trends pass their hourly
+    min/avg/max and ``num``. Series already within ``points`` come back one
+    bucket per sample, stamped with the sample's own time. Input must be
+    sorted by time.
+    """
+    n = len(ts)
+    if n == 0:
+        return []
+    if n <= points:
+        return [(int(ts[i]), float(mins[i]), float(avgs[i]), float(maxs[i]), int(counts[i])) for i in range(n)]
+    width = bucket_width(start, end, points)
+    if np is not None:
+        return _minmax_numpy(ts, mins, avgs, maxs, counts, start, width)
+    out: List[Bucket] = []
+    cur = None
+    lo = hi = total = 0.0
+    num = 0
+    for i in range(n):
+        b = (int(ts[i]) - start) // width
+        if b != cur:
+            if cur is not None and num:
+                out.append((start + cur * width, lo, total / num, hi, num))
+            cur, lo, hi, total, num = b, float(mins[i]), float(maxs[i]), 0.0, 0
+        lo = min(lo, float(mins[i]))
+        hi = max(hi, float(maxs[i]))
+        total += float(avgs[i]) * int(counts[i])
+        num += int(counts[i])
+    if cur is not None and num:
+        out.append((start + cur * width, lo, total / num, hi, num))
+    return out
+
+
+def _minmax_numpy(
+    ts: Sequence[int],
+    mins: Sequence[float],
+    avgs: Sequence[float],
+    maxs: Sequence[float],
+    counts: Sequence[int],
+    start: int,
+    width: int,
+) -> List[Bucket]:
+    t = np.asarray(ts, dtype=np.int64)
+    c = np.asarray(counts, dtype=np.int64)
+    idx = (t - start) // width
+    # Sorted input: a bucket starts wherever the bucket index changes.
+    firsts = np.concatenate(([0], np.flatnonzero(np.diff(idx)) + 1))
+    lo = np.minimum.reduceat(np.asarray(mins, dtype=np.float64), firsts)
+    hi = np.maximum.reduceat(np.asarray(maxs, dtype=np.float64), firsts)
+    num = np.add.reduceat(c, firsts)
+    total = np.add.reduceat(np.asarray(avgs, dtype=np.float64) * c, firsts)
+    stamps = start + idx[firsts] * width
+    return list(
+        zip(stamps.tolist(), lo.tolist(), (total / np.maximum(num, 1)).tolist(), hi.tolist(), num.tolist())
+    )
@@ -0,0 +1,204 @@
+"""
+Copyright (c) 2025 Zabbix-MCP
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import asyncio
+import heapq
+import itertools
+import json
+import logging
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from .deadline import DeadlineExceeded
+from .metadata import get_cache
+from .sharedstate import get_backend
+from .zabbix_client import ZabbixAPIError, ZabbixClient
+
+# Instances that failed during the current call. Each request or tool call
+# starts a fresh list with ``track_failures``; tasks it spawns share that list.
+_failures: ContextVar[Optional[List[str]]] = ContextVar("zabbix_mcp_failed_instances", default=None)
+
+
+def track_failures() -> None:
+    """Start a new call: ``failed_instances`` reports only what fails from here on."""
+    _failures.set([])
+
+
+def parse_instances(raw: str) -> List[Dict[str, Any]]:
+    """Parse ``ZABBIX_INSTANCES``: a JSON list of ``{name, url, token | username/password}``."""
+    data = json.loads(raw)
+    if not isinstance(data, list) or not data:
+        raise ValueError("ZABBIX_INSTANCES must be a non-empty JSON list")
+    names = set()
+    for inst in data:
+        if not isinstance(inst, dict) or not inst.get("name") or not inst.get("url"):
+            raise ValueError("each ZABBIX_INSTANCES entry needs 'name' and 'url'")
+        if inst["name"] in names:
+            raise ValueError(f"duplicate instance name: {inst['name']}")
+        names.add(inst["name"])
+    return data
+
+
+def merge_ordered(
+    lists: Iterable[List[Dict[str, Any]]], key: Callable[[Dict[str, Any]], Any], limit: int
+) -> List[Dict[str, Any]]:
+    """k-way merge of per-instance lists already sorted descending by ``key``."""
+    return list(itertools.islice(heapq.merge(*lists, key=key, reverse=True), limit))
+
+
+def _by_clock(e: Dict[str, Any]) -> int:
+    return int(e.get("clock", 0))
+
+
+def _by_severity(e: Dict[str, Any]) -> Tuple[int, int, int]:
+    return int(e.get("severity", 0)), int(e.get("clock", 0)), int(e.get("eventid", 0))
+
+
+class FederatedClient:
+    """Fans queries out to several Zabbix instances and merges the answers.
+
+    Every call runs against all instances concurrently, each bounded by
+    ``timeout`` seconds. Instances that fail or time out are listed in
+    ``failed_instances`` for the current call and the call returns what the
+    others produced; only when every instance fails is ``ZabbixAPIError``
+    raised. A failed instance is asked again on the next call. Results are tagged
+    with ``instance`` and merged with a heap, honoring ``limit``.
+
+    Event ids are local to each instance, so nothing here takes an eventid
+    cursor across instances: services page ``clients`` one by one and keep
+    ``{instance: eventid}`` watermarks (``watch``, associate, compact, stats).
+    """
+
+    federated = True
+
+    def __init__(self, clients: Dict[str, ZabbixClient], timeout: float = 10.0) -> None:
+        self.clients = clients
+        self.timeout = timeout
+
+    @property
+    def failed_instances(self) -> List[str]:
+        """Instances that failed since the current call began (see ``track_failures``)."""
+        return list(_failures.get() or ())
+
+    async def _fan_out(self, call: Callable[[ZabbixClient], Awaitable[Any]]) -> List[Tuple[str, Any]]:
+        names = list(self.clients)
+        failed = _failures.get()
+        if failed is None:
+            failed = []
+            _failures.set(failed)
+
+        async def one(name: str) -> Any:
+            return await asyncio.wait_for(call(self.clients[name]), timeout=self.timeout)
+
+        results = await asyncio.gather(*(one(n) for n in names), return_exceptions=True)
+        ok: List[Tuple[str, Any]] = []
+        errors = []
+        for name, res in zip(names, results):
+            if isinstance(res, BaseException):
+                if isinstance(res, (asyncio.CancelledError, DeadlineExceeded)):
+                    raise res
+                if name not in failed:
+                    failed.append(name)
+                errors.append(f"{name}: {type(res).__name__} {res}")
+                logging.getLogger("federation").warning(f"instance={name} error={res!r}")
+            else:
+                ok.append((name, res))
+        if not ok and names:
+            raise ZabbixAPIError("all instances failed: " + "; ".join(errors))
+        return ok
+
+    @staticmethod
+    def _tag(name: str, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        for r in rows:
+            r["instance"] = name
+        return rows
+
+    async def login(self) -> None:
+        await self._fan_out(lambda c: c.login())
+
+    async def logout(self) -> None:
+        await asyncio.gather(*(c.logout() for c in self.clients.values()), return_exceptions=True)
+
+    async def get_events(self, limit: int = 100, **kwargs: Any) -> List[Dict[str, Any]]:
+        parts = await self._fan_out(lambda c: c.get_events(limit=limit, **kwargs))
+        return merge_ordered((self._tag(n, rows) for n, rows in parts), _by_clock, limit)
+
+    async def get_problems(self, **kwargs: Any) -> List[Dict[str, Any]]:
+        parts = await self._fan_out(lambda c: c.get_problems(**kwargs))
+        lists = [sorted(self._tag(n, rows), key=_by_severity, reverse=True) for n, rows in parts]
+        return merge_ordered(lists, _by_severity, sum(len(x) for x in lists))
+
+    async def count_events(self, **kwargs: Any) -> int:
+        return sum(n for _, n in await self._fan_out(lambda c: c.count_events(**kwargs)))
+
+    async def event_ids(self, limit: int = 100, **kwargs: Any) -> List[Dict[str, Any]]:
+        parts = await self._fan_out(lambda c: c.event_ids(limit=limit, **kwargs))
+        return merge_ordered((self._tag(n, rows) for n, rows in parts), _by_clock, limit)
+
+    async def get_hostgroups(self, names: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        parts = await self._fan_out(lambda c: c.get_hostgroups(names))
+        seen: Dict[str, Dict[str, Any]] = {}
+        for n, rows in parts:
+            for g in rows:
+                seen.setdefault(g["name"], dict(g, instance=n))
+        return list(seen.values())
+
+    async def get_hosts(
+        self, groups: Optional[List[str]] = None, names: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        parts = await self._fan_out(lambda c: c.get_hosts(groups=groups, names=names))
+        return [h for n, rows in parts for h in self._tag(n, rows)]
+
+    async def get_items(self, limit: Optional[int] = None, **kwargs: Any) -> List[Dict[str, Any]]:
+        parts = await self._fan_out(lambda c: c.get_items(limit=limit, **kwargs))
+        rows = [i for n, items in parts for i in self._tag(n, items)]
+        return rows[:limit] if limit else rows
+
+    async def prefetch(self) -> Dict[str, str]:
+        """Warm every instance independently; step names are prefixed with the instance."""
+        names = list(self.clients)
+        results = await asyncio.gather(*(self.clients[n].prefetch() for n in names), return_exceptions=True)
+        status: Dict[str, str] = {}
+        for name, res in zip(names, results):
+            if isinstance(res, BaseException):
+                status[f"{name}.prefetch"] = f"error: {res}"
+            else:
+                status.update({f"{name}.{k}": v for k, v in res.items()})
+        return status
+
+    async def api_version(self) -> str:
+        parts = await self._fan_out(lambda c: c.api_version())
+        return ",".join(f"{n}={v}" for n, v in parts)
+
+
+def build_federated_client(settings: Any) -> FederatedClient:
+    """One ``ZabbixClient`` per ``ZABBIX_INSTANCES`` entry, sharing the global limits."""
+    clients: Dict[str, ZabbixClient] = {}
+    store = get_backend(settings.shared_state_url)
+    for inst in parse_instances(settings.zabbix_instances):
+        clients[inst["name"]] = ZabbixClient(
+            base_url=inst["url"],
+            username=inst.get("username"),
+            password=inst.get("password"),
+            timeout=settings.request_timeout_seconds,
+            max_concurrency=settings.max_concurrency,
+            verify_ssl=bool(inst.get("verify_ssl", settings.verify_ssl)),
+            token=inst.get("token"),
+            cache=get_cache(inst["url"], inst.get("username"), settings.metadata_ttl_seconds, store=store),
+            event_slices=settings.event_slices,
+            slice_min_window=settings.event_slice_min_window_seconds,
+        )
+    return FederatedClient(clients, timeout=settings.federation_timeout_seconds)
@@ -0,0 +1,134 @@
+"""
+Copyright (c) 2025 Zabbix-MCP
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import json
+import re
+from typing import Any, Dict, List
+
+_WS = re.compile(r"[ \t\n\r]*")
+
+# Parser states, in the order a response is read.
+_START, _KEY, _COLON, _VALUE, _AFTER_VALUE, _ITEM, _AFTER_ITEM, _DONE = range(8)
+
+
+class ResultArrayParser:
+    """Incremental parser for a JSON-RPC response whose ``result`` is an array.
+
+    Text is fed in arbitrary chunks; each call returns the array elements
+    completed so far, and consumed text is dropped, so memory is bounded by
+    the largest single element rather than the whole body. Other top-level
+    members (``jsonrpc``, ``id``, ``error``, or a non-array ``result``) are
+    decoded whole into ``fields``.
+    """
+
+    def __init__(self) -> None:
+        self.fields: Dict[str, Any] = {}
+        self._decoder = json.JSONDecoder()
+        self._buf = ""
+        self._pos = 0
+        self._state = _START
+        self._key = ""
+
+    @property
+    def done(self) -> bool:
+        return self._state == _DONE
+
+    def feed(self, text: str) -> List[Any]:
+        self._buf = self._buf[self._pos :] + text
+        self._pos = 0
+        out: List[Any] = []
+        while self._step(out):
+            pass
+        return out
+
+    def close(self) -> None:
+        """Raise ``ValueError`` unless a complete response was read."""
+        if self._state != _DONE or self._buf[self._pos :].strip():
+            raise ValueError("truncated or malformed JSON-RPC response")
+
+    def _peek(self) -> str:
+        self._pos = _WS.match(self._buf, self._pos).end()
+        return self._buf[self._pos : self._pos + 1]
+
+    def _decode(self) -> Any:
+        """Next complete value, or ``self`` when more text is needed."""
+        try:
+            value, end = self._decoder.raw_decode(self._buf, self._pos)
+        except ValueError:
+            return self
+        # A number at the very end of the text may continue in the next chunk.
+        if end >= len(self._buf):
+            return self
+        self._pos = end
+        return value
+
+    def _expect(self, ch: str, want: str) -> None:
+        if ch not in want:
+            raise ValueError(f"unexpected {ch!r} at offset {self._pos} in JSON-RPC response")
+        self._pos += 1
+
+    def _step(self, out: List[Any]) -> bool:
+        state = self._state
+        if state == _DONE:
+            return False
+        ch = self._peek()
+        if not ch:
+            return False
+        if state == _START:
+            self._expect(ch, "{")
+            self._state = _KEY
+        elif state == _KEY:
+            if ch == "}":
+                self._pos += 1
+                self._state = _DONE
+                return True
+            key = self._decode()
+            if key is self:
+                return False
+            if not isinstance(key, str):
+                raise ValueError("object key expected in JSON-RPC response")
+            self._key = key
+            self._state = _COLON
+        elif state == _COLON:
+            self._expect(ch, ":")
+            self._state = _VALUE
+        elif state == _VALUE:
+            if self._key == "result" and ch == "[":
+                self._pos += 1
+                self._state = _ITEM
+                return True
+            value = self._decode()
+            if value is self:
+                return False
+            self.fields[self._key] = value
+            self._state = _AFTER_VALUE
+        elif state == _AFTER_VALUE:
+            self._expect(ch, ",}")
+            self._state = _KEY if ch == "," else _DONE
+        elif state == _ITEM:
+            if ch == "]":
+                self._pos += 1
+                self._state = _AFTER_VALUE
+                return True
+            item = self._decode()
+            if item is self:
+                return False
+            out.append(item)
+            self._state = _AFTER_ITEM
+        elif state == _AFTER_ITEM:
+            self._expect(ch, ",]")
+            self._state = _ITEM if ch == "," else _AFTER_VALUE
+        return True
@@ -0,0 +1,267 @@
+"""
+Copyright (c) 2025 Zabbix-MCP
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import asyncio
+import bisect
+import calendar
+import mmap
+import os
+import re
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from .schemas import AlertItem, LogLine
+
+
+_MONTHS = {m: i for i, m in enumerate(
+    ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"], 1
+)}
+_ISO_RE = re.compile(
+    rb"(\d{4})-(\d{2})-(\d{2})[T ](\d{2}):(\d{2}):(\d{2})(?:[.,]\d+)?\s?(Z|[+-]\d{2}:?\d{2})?"
+)
+_CLF_RE = re.compile(rb"(\d{2})/([A-Za-z]{3})/(\d{4}):(\d{2}):(\d{2}):(\d{2}) ([+-]\d{4})")
+_SYSLOG_RE = re.compile(rb"([A-Z][a-z]{2}) +(\d{1,2}) (\d{2}):(\d{2}):(\d{2})")
+_EPOCH_RE = re.compile(rb"^\[?(\d{10})(?:\.\d+)?\b")
+# Timestamps are looked for near the start of a line only.
+_HEAD_BYTES = 64
+_MAX_LINE_CHARS = 4096
+
+
+def _offset_seconds(tz: bytes) -> int:
+    if tz in (b"", b"Z"):
+        return 0
+    tz = tz.replace(b":", b"")
+    sign = -1 if tz[:1] == b"-" else 1
+    return sign * (int(tz[1:3]) * 3600 + int(tz[3:5]) * 60)
+
+
+def parse_timestamp(line: bytes, default_year: Optional[int] = None) -> Optional[int]:
+    """Best-effort unix timestamp from the head of a log line.
+
+    Understands ISO 8601 / RFC 3339, common/combined log format, syslog and
+    leading epoch seconds. Times without an offset are taken as local time.
+    """
+    head = line[:_HEAD_BYTES]
+    m = _EPOCH_RE.match(head)
+    if m:
+        return int(m.group(1))
+    m = _ISO_RE.search(head)
+    if m:
+        parts = tuple(int(x) for x in m.groups()[:6])
+        if m.group(7) is None:
+            return int(time.mktime(parts + (0, 0, -1)))
+        return calendar.timegm(parts + (0, 0, 0)) - _offset_seconds(m.group(7))
+    m = _CLF_RE.search(head)
+    if m:
+        mon = _MONTHS.get(m.group(2).decode().lower())
+        if mon:
+            parts = (int(m.group(3)), mon, int(m.group(1)), int(m.group(4)), int(m.group(5)), int(m.group(6)))
+            return calendar.timegm(parts + (0, 0, 0)) - _offset_seconds(m.group(7))
+    m = _SYSLOG_RE.match(head)
+    if m:
+        mon = _MONTHS.get(m.group(1).decode().lower())
+        if mon:
+            year = default_year or time.localtime().tm_year
+            parts = (year, mon, int(m.group(2)), int(m.group(3)), int(m.group(4)), int(m.group(5)))
+            return int(time.mktime(parts + (0, 0, -1)))
+    return None
+
+
+class LogFile:
+    """A log file with a sparse timestamp index over a memory map.
+
+    Every ``stride`` bytes the index records the offset and timestamp of the
+    first parseable line, so a time window is located by binary search and
+    only the lines inside it are read. Files are never loaded into memory, and
+    an appended file only has its new tail indexed.
+    """
+
+    def __init__(self, path: str, host: Optional[str], stride: int = 65536) -> None:
+        self.path = path
+        self.host = host
+        self.stride = max(4096, stride)
+        self._ts: List[int] = []
+        self._offsets: List[int] = []
+        self._indexed_size = 0
+        self._ident: Optional[Tuple[int, int]] = None
+        self._lock = threading.Lock()
+
+    def _year(self) -> int:
+        try:
+            return time.localtime(os.path.getmtime(self.path)).tm_year
+        except OSError:
+            return time.localtime().tm_year
+
+    def _first_ts_from(self, mm: mmap.mmap, pos: int, size: int, year: int) -> Tuple[Optional[int], int]:
+        """Timestamp and offset of the first parseable line within 64 lines of ``pos``.
+
+        Without one, returns None and the offset just past the lines scanned.
+        """
+        for _ in range(64):
+            if pos >= size:
+                break
+            nl = mm.find(b"\n", pos, size)
+            end = size if nl < 0 else nl
+            ts = parse_timestamp(mm[pos:min(end, pos + _HEAD_BYTES)], year)
+            if ts is not None:
+                return ts, pos
+            pos = end + 1
+        return None, pos
+
+    def refresh(self) -> None:
+        """Bring the index up to date with the file on disk (append-aware)."""
+        with self._lock:
+            try:
+                st = os.stat(self.path)
+            except OSError:
+                self._ts, self._offsets, self._indexed_size, self._ident = [], [], 0, None
+                return
+            ident = (st.st_dev, st.st_ino)
+            if ident != self._ident or st.st_size < self._indexed_size:
+                self._ts, self._offsets, self._indexed_size = [], [], 0
+                self._ident = ident
+            size = st.st_size
+            if size == self._indexed_size or size == 0:
+                return
+            year = self._year()
+            with open(self.path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                size = len(mm)
+                pos = self._indexed_size
+                if pos:
+                    # Resume at the first full line after what was already indexed.
+                    nl = mm.find(b"\n", pos - 1, size)
+                    pos = size if nl < 0 else nl + 1
+                while pos < size:
+                    ts, off = self._first_ts_from(mm, pos, size, year)
+                    if ts is None:
+                        # A long run of continuation lines (e.g. a stack trace); keep looking after it.
+                        pos = off
+                        continue
+                    if not self._offsets or off > self._offsets[-1]:
+                        # Keep the index monotonic even if clocks jump backwards.
+                        self._ts.append(max(ts, self._ts[-1]) if self._ts else ts)
+                        self._offsets.append(off)
+                    nl = mm.find(b"\n", off + self.stride, size)
+                    if nl < 0:
+                        break
+                    pos = nl + 1
+                # Only complete lines count as indexed; a partial tail is revisited.
+                last_nl = mm.rfind(b"\n", 0, size)
+                self._indexed_size = last_nl + 1 if last_nl >= 0 else 0
+
+    def window(self, start: int, end: int, max_lines: int) -> List[LogLine]:
+        """Lines whose timestamp falls in ``[start, end]``; continuation lines follow their parent."""
+        self.refresh()
+        with self._lock:
+            # A concurrent refresh() may replace or extend the lists mid-search.
+            ts_index, offsets = list(self._ts), list(self._offsets)
+        if not offsets:
+            return []
+        i = bisect.bisect_left(ts_index, start) - 1
+        pos = offsets[max(0, i)]
+        out: List[LogLine] = []
+        year = self._year()
+        with open(self.path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            size = len(mm)
+            cur: Optional[int] = None
+            while pos < size and len(out) < max_lines:
+                nl = mm.find(b"\n", pos, size)
+                line_end = size if nl < 0 else nl
+                raw = mm[pos:line_end]
+                ts = parse_timestamp(raw, year)
+                if ts is not None:
+                    cur = ts
+                if cur is not None and cur > end:
+                    break
+                if cur is not None and cur >= start:
+                    out.append(
+                        LogLine(
+                            source=self.path,
+                            timestamp=cur,
+                            line=raw.decode("utf-8", errors="replace").rstrip("\r")[:_MAX_LINE_CHARS],
+                        )
+                    )
+                pos = line_end + 1
+        return out
+
+
+class LogCorrelator:
+    """Resolves configured log sources to per-host ``LogFile`` indexes.
+
+    ``spec`` is a comma-separated list of ``host=path`` pairs, plain files
+    (host taken from the file name up to the first dot) and directories
+    (host taken from the first sub-directory, or the file name for files at
+    the top level).
+    """
+
+    def __init__(self, spec: str, stride: int = 65536) -> None:
+        self.spec = spec
+        self.stride = stride
+        self._files: Dict[str, LogFile] = {}
+        self._scan_lock = threading.Lock()
+
+    def _discover(self) -> Dict[str, List[LogFile]]:
+        found: Dict[str, Optional[str]] = {}
+        for entry in (e.strip() for e in self.spec.split(",")):
+            if not entry:
+                continue
+            host: Optional[str] = None
+            if "=" in entry:
+                host, entry = (x.strip() for x in entry.split("=", 1))
+            if os.path.isdir(entry):
+                for root, _, names in os.walk(entry):
+                    rel = os.path.relpath(root, entry)
+                    for n in names:
+                        h = host or (rel.split(os.sep)[0] if rel != "." else n.split(".", 1)[0])
+                        found[os.path.join(root, n)] = h
+            elif os.path.isfile(entry):
+                found[entry] = host or os.path.basename(entry).split(".", 1)[0]
+        by_host: Dict[str, List[LogFile]] = {}
+        with self._scan_lock:
+            for path, h in found.items():
+                lf = self._files.get(path)
+                if lf is None:
+                    lf = self._files[path] = LogFile(path, h, self.stride)
+                by_host.setdefault(h or "", []).append(lf)
+        return by_host
+
+    def correlate(self, items: List[AlertItem], before: int, after: int, max_lines: int) -> None:
+        by_host = self._discover()
+        for it in items:
+            out: List[LogLine] = []
+            for lf in by_host.get(it.host, []):
+                out.extend(lf.window(it.timestamp - before, it.timestamp + after, max_lines))
+            out.sort(key=lambda ln: ln.timestamp)
+            it.logs = out[:max_lines]
+
+    async def correlate_async(self, items: List[AlertItem], before: int, after: int, max_lines: int) -> None:
+        # File I/O stays off the event loop.
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(None, self.correlate, items, before, after, max_lines)
+
+
+_correlators: Dict[Tuple[str, int], LogCorrelator] = {}
+
+
+def get_correlator(spec: Optional[str], stride: int = 65536) -> Optional[LogCorrelator]:
+    """Shared correlator per configuration so indexes survive across requests."""
+    if not spec:
+        return None
+    key = (spec, stride)
+    if key not in _correlators:
+        _correlators[key] = LogCorrelator(spec, stride)
+    return _correlators[key]
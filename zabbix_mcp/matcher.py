@@ -0,0 +1,111 @@
+"""
+Copyright (c) 2025 Zabbix-MCP
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, Set, Tuple
+
+
+def _is_word_char(c: str) -> bool:
+    # ASCII-only on purpose: CJK text runs straight into host names ("主机web-01告警").
+    return c.isascii() and (c.isalnum() or c in "-_.")
+
+
+class KeywordMatcher:
+    """Aho-Corasick automaton: finds every pattern occurrence in one linear pass.
+
+    Matching is case-insensitive. With ``whole_words`` a hit only counts when it
+    is not glued to neighbouring ASCII word characters, so ``web-01`` does not
+    match inside ``web-010``.
+    """
+
+    def __init__(self, patterns: Iterable[str], whole_words: bool = False) -> None:
+        self.whole_words = whole_words
+        self.patterns: List[str] = []
+        self._lens: List[int] = []
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[int]] = [[]]
+        seen: Set[str] = set()
+        for p in patterns:
+            key = p.lower()
+            if not key or key in seen:
+                continue
+            seen.add(key)
+            self._add(key, len(self.patterns))
+            self.patterns.append(p)
+            self._lens.append(len(key))
+        self._build()
+
+    def __len__(self) -> int:
+        return len(self.patterns)
+
+    def _add(self, key: str, idx: int) -> None:
+        state = 0
+        for ch in key:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append(idx)
+
+    def _build(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                f = self._fail[state]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[nxt] = self._goto[f].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def finditer(self, text: str) -> Iterator[Tuple[int, int, str]]:
+        """Yield ``(start, end, pattern)`` for every (possibly overlapping) hit."""
+        goto, fail, out, lens = self._goto, self._fail, self._out, self._lens
+        lowered = text.lower()
+        state = 0
+        for i, ch in enumerate(lowered):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for idx in out[state]:
+                start, end = i + 1 - lens[idx], i + 1
+                if self.whole_words and (
+                    (start > 0 and _is_word_char(lowered[start - 1]))
+                    or (end < len(lowered) and _is_word_char(lowered[end]))
+                ):
+                    continue
+                yield start, end, self.patterns[idx]
+
+    def matches(self, text: str) -> Set[str]:
+        """Return the set of patterns occurring anywhere in ``text``."""
+        return {p for _, _, p in self.finditer(text)}
+
+    def longest(self, text: str) -> List[Tuple[int, int, str]]:
+        """Leftmost-longest, non-overlapping hits in text order."""
+        hits = sorted(self.finditer(text), key=lambda h: (h[0], -(h[1] - h[0])))
+        picked: List[Tuple[int, int, str]] = []
+        pos = 0
+        for start, end, pat in hits:
+            if start >= pos:
+                picked.append((start, end, pat))
+                pos = end
+        return picked
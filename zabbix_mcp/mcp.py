@@ -0,0 +1,282 @@
+"""
+Copyright (c) 2025 Zabbix-MCP
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import asyncio
+import json
+import logging
+from typing import Any, Awaitable, Callable, Dict, NamedTuple, Optional
+
+from fastapi import HTTPException, WebSocket, WebSocketDisconnect
+from pydantic import BaseModel
+
+from . import deadline
+from .federation import track_failures
+from .logindex import get_correlator
+from .metrics import REQUEST_COUNT, REQUEST_LATENCY
+from .schemas import AlertQuery, LogAssociationQuery, NLQuery
+from .services import associate_logs, nl_alerts, query_alerts, today_alerts
+from .zabbix_client import ZabbixAPIError
+
+PROTOCOL_VERSIONS = ("2025-06-18", "2025-03-26", "2024-11-05")
+# Requests queued behind the per-connection cap before new ones are refused.
+PENDING_FACTOR = 8
+
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+SERVER_BUSY = -32000
+
+
+class Tool(NamedTuple):
+    description: str
+    input_schema: Dict[str, Any]
+    handler: Callable[[Any, Dict[str, Any], Any], Awaitable[BaseModel]]
+
+
+def _limit(args: Dict[str, Any], settings: Any) -> int:
+    return min(max(1, int(args.get("limit", 100))), settings.max_results_limit)
+
+
+async def _alerts_query(client: Any, args: Dict[str, Any], settings: Any) -> BaseModel:
+    q = AlertQuery.model_validate(args)
+    return await query_alerts(client, q.model_copy(update={"limit": _limit(args, settings)}))
+
+
+async def _alerts_today(client: Any, args: Dict[str, Any], settings: Any) -> BaseModel:
+    return await today_alerts(client, limit=_limit(args, settings))
+
+
+async def _alerts_top(client: Any, args: Dict[str, Any], settings: Any) -> BaseModel:
+    by = args.get("by", "severity")
+    q = AlertQuery(limit=_limit(args, settings), sort_by=by if by in {"severity", "frequency", "time", "group"} else "severity")
+    return await query_alerts(client, q)
+
+
+async def _logs_associate(client: Any, args: Dict[str, Any], settings: Any) -> BaseModel:
+    q = LogAssociationQuery.model_validate(args)
+    q = q.model_copy(update={"limit": _limit(args, settings)})
+    resp, _ = await associate_logs(
+        client, q, correlator=get_correlator(settings.log_paths, settings.log_index_stride_bytes)
+    )
+    return resp
+
+
+async def _alerts_nl(client: Any, args: Dict[str, Any], settings: Any) -> BaseModel:
+    return await nl_alerts(client, NLQuery.model_validate(args).text)
+
+
+_LIMIT_SCHEMA = {"type": "integer", "minimum": 1, "default": 100}
+
+TOOLS: Dict[str, Tool] = {
+    "alerts_query": Tool(
+        "Alerts filtered by time range, host groups, hosts and severities (same as POST /alerts/query).",
+        AlertQuery.model_json_schema(),
+        _alerts_query,
+    ),
+    "alerts_today": Tool(
+        "Alerts since the start of today.",
+        {"type": "object", "properties": {"limit": _LIMIT_SCHEMA}},
+        _alerts_today,
+    ),
+    "alerts_top": Tool(
+        "Latest alerts ordered by severity, frequency or time.",
+        {
+            "type": "object",
+            "properties": {
+                "by": {"type": "string", "enum": ["severity", "frequency", "time", "group"], "default": "severity"},
+                "limit": _LIMIT_SCHEMA,
+            },
+        },
+        _alerts_top,
+    ),
+    "logs_associate": Tool(
+        "Alerts whose name matches any keyword, optionally with surrounding log lines.",
+        LogAssociationQuery.model_json_schema(),
+        _logs_associate,
+    ),
+    "alerts_nl": Tool(
+        "Alerts for a natural-language question (rule based, Chinese and English).",
+        NLQuery.model_json_schema(),
+        _alerts_nl,
+    ),
+}
+
+
+class McpSession:
+    """One MCP (JSON-RPC 2.0) connection over a WebSocket.
+
+    Tool calls run as independent tasks, so many can be in flight at once and
+    responses go out in completion order, matched by ``id``. At most
+    ``max_inflight`` run concurrently; up to ``PENDING_FACTOR`` times that may
+    wait, beyond which calls are refused. ``notifications/cancelled`` cancels a
+    call along with its upstream RPCs. The Zabbix client is created on first
+    use and shared by every call on the connection.
+    """
+
+    def __init__(
+        self,
+        ws: WebSocket,
+        client_factory: Callable[[], Awaitable[Any]],
+        settings: Any,
+        max_inflight: int = 8,
+    ) -> None:
+        self.ws = ws
+        self.settings = settings
+        self._client_factory = client_factory
+        self._client: Optional[Any] = None
+        self._client_lock = asyncio.Lock()
+        self._send_lock = asyncio.Lock()
+        self._slots = asyncio.Semaphore(max(1, max_inflight))
+        self._max_pending = max(1, max_inflight) * PENDING_FACTOR
+        self._calls: Dict[Any, asyncio.Task] = {}
+
+    async def run(self) -> None:
+        try:
+            while True:
+                await self._dispatch(await self.ws.receive_text())
+        except WebSocketDisconnect:
+            pass
+        finally:
+            for task in list(self._calls.values()):
+                task.cancel()
+            if self._calls:
+                await asyncio.wait(list(self._calls.values()))
+            if self._client is not None:
+                await self._client.logout()
+
+    async def _send(self, msg: Dict[str, Any]) -> None:
+        async with self._send_lock:
+            try:
+                await self.ws.send_text(json.dumps(msg, ensure_ascii=False))
+            except Exception:
+                # Peer is gone; run() notices on the next receive.
+                pass
+
+    async def _result(self, msg_id: Any, result: Any) -> None:
+        await self._send({"jsonrpc": "2.0", "id": msg_id, "result": result})
+
+    async def _error(self, msg_id: Any, code: int, message: str) -> None:
+        await self._send({"jsonrpc": "2.0", "id": msg_id, "error": {"code": code, "message": message}})
+
+    async def _dispatch(self, raw: str) -> None:
+        try:
+            msg = json.loads(raw)
+        except ValueError:
+            await self._error(None, PARSE_ERROR, "parse error")
+            return
+        if not isinstance(msg, dict) or not isinstance(msg.get("method"), str):
+            await self._error(msg.get("id") if isinstance(msg, dict) else None, INVALID_REQUEST, "invalid request")
+            return
+        method = msg["method"]
+        params = msg.get("params") or {}
+        msg_id = msg.get("id")
+        if "id" in msg and (isinstance(msg_id, bool) or not isinstance(msg_id, (str, int))):
+            await self._error(None, INVALID_REQUEST, "id must be a string or integer")
+            return
+        if not isinstance(params, dict):
+            if "id" in msg:
+                await self._error(msg_id, INVALID_PARAMS, "params must be an object")
+            return
+        if "id" not in msg:
+            rid = params.get("requestId")
+            if method == "notifications/cancelled" and isinstance(rid, (str, int)):
+                task = self._calls.get(rid)
+                if task is not None:
+                    task.cancel()
+            return
+        if method == "initialize":
+            requested = params.get("protocolVersion")
+            await self._result(
+                msg_id,
+                {
+                    "protocolVersion": requested if requested in PROTOCOL_VERSIONS else PROTOCOL_VERSIONS[0],
+                    "capabilities": {"tools": {"listChanged": False}},
+                    "serverInfo": {"name": "zabbix-mcp", "version": "0.1.0"},
+                },
+            )
+        elif method == "ping":
+            await self._result(msg_id, {})
+        elif method == "tools/list":
+            await self._result(
+                msg_id,
+                {
+                    "tools": [
+                        {"name": n, "description": t.description, "inputSchema": t.input_schema}
+                        for n, t in TOOLS.items()
+                    ]
+                },
+            )
+        elif method == "tools/call":
+            if msg_id in self._calls:
+                await self._error(msg_id, INVALID_REQUEST, "duplicate request id")
+            elif len(self._calls) >= self._max_pending:
+                await self._error(msg_id, SERVER_BUSY, "too many in-flight requests")
+            else:
+                task = asyncio.ensure_future(self._call(msg_id, params))
+                self._calls[msg_id] = task
+                task.add_done_callback(lambda _t, k=msg_id: self._calls.pop(k, None))
+        else:
+            await self._error(msg_id, METHOD_NOT_FOUND, f"method not found: {method}")
+
+    async def _get_client(self) -> Any:
+        async with self._client_lock:
+            if self._client is None:
+                self._client = await self._client_factory()
+        track_failures()
+        return self._client
+
+    async def _call(self, msg_id: Any, params: Dict[str, Any]) -> None:
+        name = params.get("name")
+        tool = TOOLS.get(name) if isinstance(name, str) else None
+        if tool is None:
+            await self._error(msg_id, INVALID_PARAMS, f"unknown tool: {name}")
+            return
+        args = params.get("arguments") or {}
+        if not isinstance(args, dict):
+            await self._error(msg_id, INVALID_PARAMS, "arguments must be an object")
+            return
+        try:
+            async with self._slots:
+                deadline.set_deadline(
+                    deadline.parse_budget(
+                        None, self.settings.request_deadline_seconds, self.settings.max_request_deadline_seconds
+                    )
+                )
+                client = await self._get_client()
+                with REQUEST_LATENCY.labels(f"mcp_{name}").time():
+                    REQUEST_COUNT.labels(f"mcp_{name}").inc()
+                    resp = await tool.handler(client, args, self.settings)
+        except ValueError as e:
+            await self._error(msg_id, INVALID_PARAMS, str(e))
+        except (ZabbixAPIError, deadline.DeadlineExceeded) as e:
+            await self._result(msg_id, {"content": [{"type": "text", "text": str(e)}], "isError": True})
+        except HTTPException as e:
+            await self._result(msg_id, {"content": [{"type": "text", "text": json.dumps(e.detail)}], "isError": True})
+        except Exception as e:
+            # Anything else is a bug; answer the id so the client doesn't wait forever.
+            logging.getLogger("mcp").exception(f"tool={name} id={msg_id!r} error={e!r}")
+            await self._error(msg_id, INTERNAL_ERROR, "internal error")
+        else:
+            await self._result(
+                msg_id,
+                {
+                    "content": [{"type": "text", "text": resp.model_dump_json()}],
+                    "structuredContent": resp.model_dump(mode="json"),
+                    "isError": False,
+                },
+            )
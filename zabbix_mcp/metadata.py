@@ -0,0 +1,125 @@
+"""
+Copyright (c) 2025 Zabbix-MCP
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class MetadataCache:
+    """Zabbix metadata shared by every short-lived client of one server.
+
+    Holds the login session, API version, name -> id maps, the host ->
+    groups index, host interfaces and trigger details. Everything but the
+    session and version expires together after ``ttl`` seconds, so renamed or
+    new objects are picked up without a restart.
+    """
+
+    def __init__(self, ttl: float = 300.0, store: Any = None, namespace: str = "") -> None:
+        self.ttl = ttl
+        # Optional cross-worker backend (see sharedstate.py) for the session and costly lookups.
+        self.store = store
+        self.namespace = namespace
+        self.session: Optional[str] = None
+        self.api_version: Optional[str] = None
+        self.groupids: Dict[str, Optional[str]] = {}
+        self.hostids: Dict[str, Optional[str]] = {}
+        self.host_groups: Optional[Dict[str, List[str]]] = None
+        self.interfaces: Dict[str, List[Dict[str, Any]]] = {}
+        self.triggers: Dict[str, Dict[str, Any]] = {}
+        self.loaded_at = time.monotonic()
+        self._lock: Optional[asyncio.Lock] = None
+        self._session_lock: Optional[asyncio.Lock] = None
+
+    @property
+    def lock(self) -> asyncio.Lock:
+        # Created lazily so it binds to the running loop, not the import-time one.
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    @property
+    def session_lock(self) -> asyncio.Lock:
+        if self._session_lock is None:
+            self._session_lock = asyncio.Lock()
+        return self._session_lock
+
+    async def shared_get(self, name: str) -> Any:
+        """JSON value ``name`` from the shared store, or None (also on store errors)."""
+        if self.store is None:
+            return None
+        try:
+            raw = await self.store.get(f"{self.namespace}:{name}")
+            return None if raw is None else json.loads(raw)
+        except Exception as e:
+            # Shared state only saves upstream calls; never fail a request over it.
+            logging.getLogger("sharedstate").warning(f"get {name} failed: {e!r}")
+            return None
+
+    async def shared_set(self, name: str, value: Any, ttl: Optional[float] = None, only_if_absent: bool = False) -> bool:
+        """Store ``value``; False only when ``only_if_absent`` and another worker got there first."""
+        if self.store is None:
+            return True
+        try:
+            if ttl is not None and not math.isfinite(ttl):
+                ttl = None
+            return await self.store.set(f"{self.namespace}:{name}", json.dumps(value), ttl, only_if_absent)
+        except Exception as e:
+            logging.getLogger("sharedstate").warning(f"set {name} failed: {e!r}")
+            return True
+
+    async def shared_delete(self, name: str) -> None:
+        if self.store is None:
+            return
+        try:
+            await self.store.delete(f"{self.namespace}:{name}")
+        except Exception as e:
+            logging.getLogger("sharedstate").warning(f"delete {name} failed: {e!r}")
+
+    def expire_if_stale(self) -> None:
+        if time.monotonic() - self.loaded_at < self.ttl:
+            return
+        self.groupids.clear()
+        self.hostids.clear()
+        self.host_groups = None
+        self.interfaces.clear()
+        self.triggers.clear()
+        self.loaded_at = time.monotonic()
+
+
+_caches: Dict[Tuple[str, Optional[str]], MetadataCache] = {}
+
+
+def get_cache(
+    base_url: str, username: Optional[str] = None, ttl: float = 300.0, store: Any = None
+) -> MetadataCache:
+    """Process-wide cache per (server, user), so sessions are never shared across accounts.
+
+    With a ``store`` the same (server, user) namespace is shared by every
+    worker using that backend.
+    """
+    key = (base_url, username)
+    cache = _caches.get(key)
+    if cache is None:
+        digest = hashlib.sha1(f"{base_url}|{username or ''}".encode()).hexdigest()[:16]
+        cache = _caches[key] = MetadataCache(ttl, namespace=f"zabbix_mcp:{digest}")
+    cache.ttl = ttl
+    cache.store = store
+    return cache
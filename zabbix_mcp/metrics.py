@@ -14,10 +14,49 @@ See the License for the specific language governing permissions and
 limitations under the License.
 """
 
+import os
+from typing import Optional, Tuple
+
 from prometheus_client import Counter, Gauge, Histogram
 
 REQUEST_COUNT = Counter("zabbix_mcp_requests_total", "Total requests", ["route"])
 REQUEST_LATENCY = Histogram("zabbix_mcp_request_latency_seconds", "Request latency", ["route"])
-QUEUE_SIZE = Gauge("zabbix_mcp_queue_size", "In-memory queue size")
-ACTIVE_CLIENTS = Gauge("zabbix_mcp_active_clients", "Active websocket clients")
+# multiprocess_mode only matters under PROMETHEUS_MULTIPROC_DIR: per-worker values of
+# live processes are summed, except state every worker tracks in full (max).
+QUEUE_SIZE = Gauge("zabbix_mcp_queue_size", "In-memory queue size", multiprocess_mode="livesum")
+QUEUE_JOBS = Counter("zabbix_mcp_queue_jobs_total", "Queued jobs finished", ["type", "status"])
+ACTIVE_CLIENTS = Gauge("zabbix_mcp_active_clients", "Active websocket clients", multiprocess_mode="livesum")
+
+OPEN_PROBLEMS = Gauge("zabbix_mcp_open_problems", "Open problems tracked in memory", multiprocess_mode="livemax")
+REQUEST_CANCELLED = Counter("zabbix_mcp_requests_cancelled_total", "Requests cancelled because the client disconnected")
+ADMISSION_INFLIGHT = Gauge(
+    "zabbix_mcp_admission_inflight", "Requests holding an admission slot", ["route"], multiprocess_mode="livesum"
+)
+ADMISSION_QUEUED = Gauge(
+    "zabbix_mcp_admission_queued", "Requests waiting for an admission slot", ["route"], multiprocess_mode="livesum"
+)
+REQUESTS_SHED = Counter("zabbix_mcp_requests_shed_total", "Requests refused with 503 by admission control", ["route", "reason"])
+
+
+def _multiproc_dir() -> Optional[str]:
+    return os.environ.get("PROMETHEUS_MULTIPROC_DIR") or os.environ.get("prometheus_multiproc_dir")
+
+
+def render() -> Tuple[bytes, str]:
+    """Exposition for ``/metrics``; aggregates every worker under ``PROMETHEUS_MULTIPROC_DIR``."""
+    from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, generate_latest, multiprocess
+
+    if not _multiproc_dir():
+        return generate_latest(), CONTENT_TYPE_LATEST
+    # A fresh registry per scrape: the collector reads the workers' mmap files.
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def mark_worker_exit() -> None:
+    """Drop this worker's live gauges from the aggregate when it shuts down."""
+    if _multiproc_dir():
+        from prometheus_client import multiprocess
 
+        multiprocess.mark_process_dead(os.getpid())
@@ -16,86 +16,177 @@ limitations under the License.
 
 import re
 import time
-from typing import Optional
+import unicodedata
+from functools import lru_cache
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
 
+from .daywindow import day_start
+from .matcher import KeywordMatcher
 from .schemas import AlertQuery, TimeRange
 
 
-def parse_alert_query(text: str) -> AlertQuery:
-    t = text.strip()
+_TODAY_RE = re.compile(r"今日|今天|today")
+_RECENT_RE = re.compile(r"最近\s*(\d+)\s*(分钟|分|小时|h|天|day|d)")
+_LAST_RE = re.compile(
+    r"(?:last|past)\s*(\d+)\s*(minutes?|mins?|m|hours?|hrs?|h|days?|d)(?![a-z])"
+)
+_TOP_RE = re.compile(r"top\s*(\d+)")
+_SORT_RES = (
+    (re.compile(r"按严重|by severity"), "severity"),
+    (re.compile(r"按频率|by frequency"), "frequency"),
+    (re.compile(r"按时间|by time"), "time"),
+)
+_SEV_NUM_RE = re.compile(r"\((\d)\)")
+_SEV_MAP = {
+    "disaster": 5,
+    "critical": 5,
+    "high": 4,
+    "error": 4,
+    "average": 3,
+    "warning": 3,
+    "information": 1,
+    "not classified": 0,
+    "严重": 4,
+    "灾难": 5,
+}
+# English words must stand alone (plural allowed); "按严重" is a sort hint, not a filter.
+_SEV_RE = re.compile(
+    r"(?<![a-z])(not classified|disaster|critical|high|error|average|warning|information)s?(?![a-z])"
+    r"|(?<!按)(严重|灾难)"
+)
+_GROUP_RE = re.compile(r"主机组[:：]?([\w-]+)")
+_HOST_RE = re.compile(r"主机(?!组)[:：]?([\w.-]+)")
+_LIMIT_RE = re.compile(r"限制条数[:：]?\s*(\d+)")
+_UNIT_SECONDS = {"m": 60, "分": 60, "h": 3600, "小": 3600, "d": 86400, "天": 86400}
+
+
+class _ParsedText(NamedTuple):
+    limit: int
+    sort_by: Optional[str]
+    severities: Optional[Tuple[int, ...]]
+    groups: Tuple[str, ...]
+    hosts: Tuple[str, ...]
+    today: bool
+    recent_seconds: Optional[int]
+    free_text: str
+
+
+class EntityDictionary:
+    """Host and hostgroup names compiled into one automaton for free-text lookup.
+
+    ``hosts`` maps every alias (technical name, visible name) to the technical
+    host name used in ``host.get`` filters; ``groups`` maps group names to
+    themselves. Matches are whole-word and leftmost-longest, so "db-cluster"
+    wins over a host called "db".
+    """
+
+    def __init__(self, hosts: Dict[str, str], groups: Iterable[str]) -> None:
+        self._targets: Dict[str, Tuple[str, str]] = {}
+        for name in groups:
+            self._targets.setdefault(name.lower(), ("group", name))
+        for alias, host in hosts.items():
+            self._targets.setdefault(alias.lower(), ("host", host))
+        self._matcher = KeywordMatcher(self._targets.keys(), whole_words=True)
+        self.resolve = lru_cache(maxsize=1024)(self._resolve)
+
+    def __len__(self) -> int:
+        return len(self._matcher)
+
+    def _resolve(self, text: str) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+        hosts: List[str] = []
+        groups: List[str] = []
+        for _, _, pat in self._matcher.longest(text):
+            kind, name = self._targets[pat.lower()]
+            bucket = hosts if kind == "host" else groups
+            if name not in bucket:
+                bucket.append(name)
+        return tuple(hosts), tuple(groups)
+
+
+def _normalize(text: str) -> str:
+    return " ".join(unicodedata.normalize("NFKC", text).split())
+
+
+@lru_cache(maxsize=1024)
+def _parse_text(t: str) -> _ParsedText:
     tl = t.lower()
     limit = 100
     sort_by: Optional[str] = None
-    severities = None
-    groups = None
-    hosts = None
-    tr: Optional[TimeRange] = None
-
-    if "今日" in tl or "today" in tl:
-        now = int(time.time())
-        start = now - (now % 86400)
-        tr = TimeRange(start_ts=start, end_ts=now)
+    severities: Optional[Tuple[int, ...]] = None
 
-    mr = re.search(r"最近\s*(\d+)\s*(分钟|分|小时|h|天|day|d)", t)
+    recent: Optional[int] = None
+    mr = _RECENT_RE.search(t) or _LAST_RE.search(tl)
     if mr:
-        now = int(time.time())
-        n = int(mr.group(1))
-        unit = mr.group(2).lower()
-        if unit in {"分钟", "分"}:
-            dur = n * 60
-        elif unit in {"小时", "h"}:
-            dur = n * 3600
-        else:
-            dur = n * 86400
-        tr = TimeRange(start_ts=now - dur, end_ts=now)
-
-    m = re.search(r"top\s*(\d+)", tl)
+        recent = int(mr.group(1)) * _UNIT_SECONDS.get(mr.group(2).lower()[0], 86400)
+
+    m = _TOP_RE.search(tl)
     if m:
         limit = int(m.group(1))
         sort_by = "severity"
-    if "按严重" in tl or "by severity" in tl:
-        sort_by = "severity"
-    if "按频率" in tl or "by frequency" in tl:
-        sort_by = "frequency"
-    if "按时间" in tl or "by time" in tl:
-        sort_by = "time"
+    for pattern, key in _SORT_RES:
+        if pattern.search(tl):
+            sort_by = key
 
-    sev_map = {"disaster": 5, "critical": 5, "high": 4, "error": 4, "average": 3, "warning": 3, "information": 1, "not classified": 0, "严重": 4, "灾难": 5}
-    nums = re.findall(r"\((\d)\)", t)
+    nums = _SEV_NUM_RE.findall(t)
     if nums:
-        try:
-            severities = [int(x) for x in nums]
-        except Exception:
-            pass
-    if severities is None:
-        picks = []
-        for k, v in sev_map.items():
-            if k in tl:
-                picks.append(v)
+        severities = tuple(int(x) for x in nums)
+    else:
+        picks = {_SEV_MAP[a or b] for a, b in _SEV_RE.findall(tl)}
         if picks:
-            severities = sorted(set(picks))
+            severities = tuple(sorted(picks))
+
+    mg = _GROUP_RE.search(t)
+    mh = _HOST_RE.search(t)
+    lm = _LIMIT_RE.search(t)
+    if lm:
+        limit = int(lm.group(1))
+
+    return _ParsedText(
+        limit=limit,
+        sort_by=sort_by,
+        severities=severities,
+        groups=(mg.group(1),) if mg else (),
+        hosts=(mh.group(1),) if mh else (),
+        today=bool(_TODAY_RE.search(tl)),
+        recent_seconds=recent,
+        free_text=_HOST_RE.sub(" ", _GROUP_RE.sub(" ", t)),
+    )
 
-    mg = re.search(r"主机组[:：]?([\w-]+)", t)
-    if mg:
-        groups = [mg.group(1)]
 
-    mh = re.search(r"主机[:：]?([\w.-]+)", t)
-    if mh:
-        hosts = [mh.group(1)]
+def parse_alert_query(
+    text: str,
+    entities: Optional[EntityDictionary] = None,
+    now: Optional[int] = None,
+) -> AlertQuery:
+    """Parse free text into an ``AlertQuery``.
 
-    lm = re.search(r"限制条数[:：]?\s*(\d+)", t)
-    if lm:
-        try:
-            limit = int(lm.group(1))
-        except Exception:
-            pass
+    The text-only part is memoized on the normalized input; relative time
+    windows ("today", "最近 2 小时", "last 2h") are re-resolved against ``now``
+    on every call, "today" from midnight in ``DAY_TIMEZONE``. With ``entities`` host and group names are also picked out
+    of free text, in addition to the explicit ``主机:`` / ``主机组:`` prefixes.
+    """
+    t = _normalize(text)
+    parsed = _parse_text(t)
+    now = int(time.time()) if now is None else now
+
+    tr: Optional[TimeRange] = None
+    if parsed.today:
+        tr = TimeRange(start_ts=day_start(now), end_ts=now)
+    if parsed.recent_seconds is not None:
+        tr = TimeRange(start_ts=now - parsed.recent_seconds, end_ts=now)
+
+    hosts = list(parsed.hosts)
+    groups = list(parsed.groups)
+    if entities is not None:
+        found_hosts, found_groups = entities.resolve(parsed.free_text)
+        hosts += [h for h in found_hosts if h not in hosts]
+        groups += [g for g in found_groups if g not in groups]
 
     return AlertQuery(
         time_range=tr,
-        host_groups=groups,
-        hosts=hosts,
-        severities=severities,
-        limit=limit,
-        sort_by=sort_by,  # type: ignore[arg-type]
+        host_groups=groups or None,
+        hosts=hosts or None,
+        severities=list(parsed.severities) if parsed.severities is not None else None,
+        limit=parsed.limit,
+        sort_by=parsed.sort_by,  # type: ignore[arg-type]
     )
-
@@ -0,0 +1,150 @@
+"""
+Copyright (c) 2025 Zabbix-MCP
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import asyncio
+import time
+from typing import Any, Dict, List, Optional, Set
+
+from .metrics import OPEN_PROBLEMS
+from .sharedstate import SharedSnapshot
+from .zabbix_client import ZabbixClient
+
+
+class ProblemTracker:
+    """In-memory set of open problems, maintained incrementally.
+
+    A refresh pulls only problems newer than the last seen eventid and asks
+    ``problem.get`` which of the known ids are still open (one id-only call).
+    A full resync runs every ``resync_seconds`` to pick up anything missed.
+    Between refreshes, reads are served straight from memory. With ``shared``
+    set, one worker at a time polls and publishes the set; the others adopt it.
+    """
+
+    def __init__(self, refresh_seconds: float = 15.0, resync_seconds: float = 600.0) -> None:
+        self.refresh_seconds = refresh_seconds
+        self.resync_seconds = resync_seconds
+        self._open: Dict[str, Dict[str, Any]] = {}
+        self._last_eventid: Optional[int] = None
+        self._refreshed_at = 0.0
+        self._synced_at = 0.0
+        # Instances missing from the last full resync; cached reads stay partial.
+        self.failed_instances: List[str] = []
+        self._lock: Optional[asyncio.Lock] = None
+        self.shared: Optional[SharedSnapshot] = None
+
+    def _add(self, problems: List[Dict[str, Any]]) -> None:
+        for p in problems:
+            eid = str(p["eventid"])
+            self._open[f"{p['instance']}:{eid}" if p.get("instance") else eid] = p
+            if self._last_eventid is None or int(eid) > self._last_eventid:
+                self._last_eventid = int(eid)
+
+    async def refresh(self, client: ZabbixClient, force: bool = False) -> None:
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if not force and not self._stale():
+                return
+            if self.shared is None:
+                await self._poll(client)
+                return
+            published = await self.shared.load()
+            if published is not None:
+                self._adopt(*published)
+                if not force and not self._stale():
+                    return
+            claimed = await self.shared.claim()
+            if not claimed and self._refreshed_at:
+                # Another worker is polling; its set arrives with the next read.
+                return
+            try:
+                await self._poll(client)
+                await self.shared.publish(self._state())
+            finally:
+                if claimed:
+                    await self.shared.release()
+
+    def _stale(self) -> bool:
+        return not self._refreshed_at or time.monotonic() - self._refreshed_at >= self.refresh_seconds
+
+    async def _poll(self, client: ZabbixClient) -> None:
+        now = time.monotonic()
+        # Event ids are per instance, so a federated client always resyncs in full.
+        full = getattr(client, "federated", False) or self._last_eventid is None
+        if full or now - self._synced_at >= self.resync_seconds:
+            problems = await client.get_problems()
+            self.failed_instances = list(getattr(client, "failed_instances", None) or ())
+            self._open.clear()
+            self._last_eventid = None
+            self._add(problems)
+            self._synced_at = now
+        else:
+            new = await client.get_problems(eventid_from=str(self._last_eventid + 1))
+            known = list(self._open)
+            if known:
+                still = await client.get_problems(eventids=known, enrich=False)
+                alive: Set[str] = {str(p["eventid"]) for p in still}
+                for eid in known:
+                    if eid not in alive:
+                        del self._open[eid]
+            self._add(new)
+        self._refreshed_at = now
+        OPEN_PROBLEMS.set(len(self._open))
+
+    def _state(self) -> Dict[str, Any]:
+        # Wall-clock ages, since monotonic clocks differ between processes.
+        return {
+            "open": self._open,
+            "last_eventid": self._last_eventid,
+            "synced_ago": time.monotonic() - self._synced_at,
+            "failed_instances": self.failed_instances,
+        }
+
+    def _adopt(self, published_at: float, state: Dict[str, Any]) -> None:
+        """Take over the set another worker published, unless ours is newer."""
+        age = max(0.0, time.time() - published_at)
+        refreshed_at = time.monotonic() - age
+        if self._refreshed_at and refreshed_at <= self._refreshed_at:
+            return
+        self._open = dict(state["open"])
+        self._last_eventid = state["last_eventid"]
+        self.failed_instances = list(state.get("failed_instances") or ())
+        self._synced_at = refreshed_at - float(state["synced_ago"])
+        self._refreshed_at = refreshed_at
+        OPEN_PROBLEMS.set(len(self._open))
+
+    def snapshot(
+        self,
+        severities: Optional[List[int]] = None,
+        hostids: Optional[Set[str]] = None,
+        hosts: Optional[List[str]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Open problems, most severe and most recent first, filtered in memory."""
+        out = []
+        for p in self._open.values():
+            if severities and int(p.get("severity", 0)) not in severities:
+                continue
+            phosts = p.get("hosts") or []
+            if hosts and not any(h.get("host") in hosts for h in phosts):
+                continue
+            if hostids is not None and not any(str(h.get("hostid")) in hostids for h in phosts):
+                continue
+            out.append(p)
+        out.sort(key=lambda p: (int(p.get("severity", 0)), int(p.get("clock", 0))), reverse=True)
+        return out
+
+    def __len__(self) -> int:
+        return len(self._open)
@@ -15,38 +15,274 @@ limitations under the License.
 """
 
 import asyncio
-from typing import Any, Callable, Dict, Optional, List
+import json
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Optional, List
 
-from .metrics import QUEUE_SIZE
+from .cron import CronSchedule
+from .metrics import QUEUE_JOBS, QUEUE_SIZE
+from .schemas import JobInfo, ScheduleInfo, ScheduleSpec
+
+NAMESPACE = "zabbix_mcp:queue"
+# How long a worker's claim on one scheduled run blocks the others.
+CLAIM_TTL_SECONDS = 3600
+# Upper bound on the scheduler's sleep, so clock jumps are noticed.
+MAX_SCHEDULER_SLEEP = 60.0
+FINISHED = ("done", "failed")
+
+log = logging.getLogger("queue")
+
+
+def parse_schedules(raw: Optional[str]) -> List[ScheduleSpec]:
+    """Parse ``QUEUE_SCHEDULES``: a JSON list of schedule specs, each with an ``id``."""
+    if not raw or not raw.strip():
+        return []
+    data = json.loads(raw)
+    if not isinstance(data, list):
+        raise ValueError("QUEUE_SCHEDULES must be a JSON list")
+    specs = [ScheduleSpec.model_validate(d) for d in data]
+    for spec in specs:
+        if not spec.id:
+            raise ValueError("every QUEUE_SCHEDULES entry needs an id")
+    return specs
+
+
+class Schedule:
+    def __init__(self, spec: ScheduleSpec, origin: str, now: float) -> None:
+        if (spec.every_seconds is None) == (spec.cron is None):
+            raise ValueError("schedule needs exactly one of every_seconds or cron")
+        self.id = spec.id or uuid.uuid4().hex[:12]
+        self.spec = spec
+        self.origin = origin
+        self.cron = CronSchedule(spec.cron) if spec.cron else None
+        self.last_job_id: Optional[str] = None
+        self.last_done_job_id: Optional[str] = None
+        self.next_run = int(now) if spec.run_now else self._after(now)
+
+    def _after(self, ts: float) -> int:
+        if self.cron is not None:
+            return self.cron.next_after(ts)
+        every = int(self.spec.every_seconds or 0)
+        # Epoch-aligned, so every worker computes the same due times.
+        return (int(ts) // every + 1) * every
+
+    def advance(self, now: float) -> None:
+        # Runs missed while the process was busy or asleep are skipped, not replayed.
+        self.next_run = self._after(now)
+
+    def info(self) -> ScheduleInfo:
+        return ScheduleInfo(
+            id=self.id,
+            job=self.spec.job,
+            every_seconds=self.spec.every_seconds,
+            cron=self.spec.cron,
+            origin=self.origin,  # type: ignore[arg-type]
+            next_run=self.next_run,
+            last_job_id=self.last_job_id,
+            last_done_job_id=self.last_done_job_id,
+        )
 
 
 class TaskQueue:
-    def __init__(self, workers: int = 4) -> None:
+    """Background jobs with retained results and recurring schedules.
+
+    Every job gets an id and a ``JobInfo`` record. Finished records keep
+    their result until more than ``max_results`` have piled up or they are
+    older than ``result_ttl`` seconds; the latest successful run of each
+    schedule is kept regardless, so a report computed off-peak can be served
+    until the next run replaces it. With a shared ``store`` each scheduled run
+    fires on one worker only and finished records are published there, so
+    any worker can answer for them.
+    """
+
+    def __init__(
+        self,
+        workers: int = 4,
+        max_results: int = 200,
+        result_ttl: float = 86400.0,
+        store: Any = None,
+    ) -> None:
         self.queue: asyncio.Queue = asyncio.Queue()
         self.workers = workers
+        self.max_results = max_results
+        self.result_ttl = result_ttl
+        self.store = store
+        self.jobs: "OrderedDict[str, JobInfo]" = OrderedDict()
+        self.schedules: Dict[str, Schedule] = {}
         self._tasks: List[asyncio.Task] = []
         self._handler: Optional[Callable[[Dict[str, Any]], asyncio.Future]] = None
+        self._wake: Optional[asyncio.Event] = None
 
     async def start(self, handler: Callable[[Dict[str, Any]], asyncio.Future]) -> None:
         self._handler = handler
+        self._wake = asyncio.Event()
         for _ in range(self.workers):
             self._tasks.append(asyncio.create_task(self._run()))
+        self._tasks.append(asyncio.create_task(self._schedule_loop()))
 
     async def stop(self) -> None:
         for t in self._tasks:
             t.cancel()
         self._tasks.clear()
 
-    async def enqueue(self, job: Dict[str, Any]) -> None:
-        await self.queue.put(job)
+    async def enqueue(self, job: Dict[str, Any], schedule_id: Optional[str] = None) -> str:
+        job_id = uuid.uuid4().hex
+        self.jobs[job_id] = JobInfo(
+            id=job_id, type=job.get("type"), status="queued", created_at=int(time.time()), schedule_id=schedule_id
+        )
+        self._prune()
+        await self.queue.put((job_id, job))
         QUEUE_SIZE.set(self.queue.qsize())
+        return job_id
+
+    async def get(self, job_id: str) -> Optional[JobInfo]:
+        """Job record by id; a schedule id returns that schedule's latest successful run."""
+        self._prune()
+        sched = self.schedules.get(job_id)
+        if sched is not None:
+            latest = sched.last_done_job_id
+            if latest is None:
+                latest = await self._store_get(f"{NAMESPACE}:schedule:{job_id}:latest")
+            if latest is None:
+                return None
+            job_id = latest
+        info = self.jobs.get(job_id)
+        if info is None:
+            raw = await self._store_get(f"{NAMESPACE}:job:{job_id}")
+            info = JobInfo.model_validate(json.loads(raw)) if raw else None
+        return info
+
+    def list_jobs(self) -> List[JobInfo]:
+        self._prune()
+        return [j.model_copy(update={"result": None}) for j in reversed(self.jobs.values())]
+
+    def add_schedule(self, spec: ScheduleSpec, origin: str = "api") -> Schedule:
+        sched = Schedule(spec, origin, time.time())
+        old = self.schedules.get(sched.id)
+        if old is not None:
+            sched.last_job_id, sched.last_done_job_id = old.last_job_id, old.last_done_job_id
+        self.schedules[sched.id] = sched
+        if self._wake is not None:
+            self._wake.set()
+        return sched
+
+    def remove_schedule(self, schedule_id: str) -> bool:
+        return self.schedules.pop(schedule_id, None) is not None
+
+    def sync_schedules(self, specs: Iterable[ScheduleSpec]) -> None:
+        """Replace the schedules that came from configuration with ``specs``."""
+        wanted = list(specs)
+        ids = {s.id for s in wanted}
+        for sid in [k for k, v in self.schedules.items() if v.origin == "config" and k not in ids]:
+            del self.schedules[sid]
+        for spec in wanted:
+            old = self.schedules.get(spec.id or "")
+            if old is not None and old.origin == "config" and old.spec == spec:
+                # Unchanged across a reload: keep its timing (and don't repeat run_now).
+                continue
+            self.add_schedule(spec, origin="config")
+
+    def stats(self) -> Dict[str, Any]:
+        counts: Dict[str, int] = {}
+        for j in self.jobs.values():
+            counts[j.status] = counts.get(j.status, 0) + 1
+        return {"size": self.queue.qsize(), "workers": self.workers, "jobs": counts, "schedules": len(self.schedules)}
+
+    def _prune(self) -> None:
+        pinned = {s.last_done_job_id for s in self.schedules.values()}
+        cutoff = time.time() - self.result_ttl
+        finished = [j for j in self.jobs.values() if j.status in FINISHED and j.id not in pinned]
+        excess = len(finished) - self.max_results
+        # Records are in creation order, so the oldest go first.
+        for j in finished:
+            if excess > 0 or (j.finished_at or 0) < cutoff:
+                del self.jobs[j.id]
+                excess -= 1
 
     async def _run(self) -> None:
         while True:
-            job = await self.queue.get()
+            job_id, job = await self.queue.get()
             QUEUE_SIZE.set(self.queue.qsize())
+            info = self.jobs.get(job_id)
             try:
-                if self._handler:
-                    await self._handler(job)
+                if info is not None:
+                    info.status, info.started_at = "running", int(time.time())
+                result = await self._handler(job) if self._handler else None
+                if info is not None:
+                    info.status, info.result = "done", result
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.warning(f"job {job_id} ({job.get('type')}) failed: {e!r}")
+                if info is not None:
+                    info.status, info.error = "failed", str(e) or repr(e)
             finally:
                 self.queue.task_done()
+            if info is not None:
+                info.finished_at = int(time.time())
+                QUEUE_JOBS.labels(str(info.type), info.status).inc()
+                await self._finish(info)
+
+    async def _finish(self, info: JobInfo) -> None:
+        sched = self.schedules.get(info.schedule_id or "")
+        if sched is not None and info.status == "done":
+            sched.last_done_job_id = info.id
+        self._prune()
+        if self.store is None:
+            return
+        await self._store_set(f"{NAMESPACE}:job:{info.id}", info.model_dump_json(), self.result_ttl)
+        if sched is not None and info.status == "done":
+            await self._store_set(f"{NAMESPACE}:schedule:{sched.id}:latest", info.id, None)
+
+    async def _schedule_loop(self) -> None:
+        assert self._wake is not None
+        while True:
+            self._wake.clear()
+            now = time.time()
+            for sched in list(self.schedules.values()):
+                if sched.next_run > now:
+                    continue
+                due = sched.next_run
+                sched.advance(now)
+                last = self.jobs.get(sched.last_job_id or "")
+                if last is not None and last.status not in FINISHED:
+                    log.info(f"schedule {sched.id}: previous run {last.id} still {last.status}, skipping")
+                    continue
+                if not await self._claim(sched.id, due):
+                    continue
+                sched.last_job_id = await self.enqueue(sched.spec.job, schedule_id=sched.id)
+            nxt = min((s.next_run for s in self.schedules.values()), default=now + MAX_SCHEDULER_SLEEP)
+            wait = min(MAX_SCHEDULER_SLEEP, max(0.05, nxt - time.time()))
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=wait)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _claim(self, schedule_id: str, due: int) -> bool:
+        if self.store is None:
+            return True
+        key = f"{NAMESPACE}:schedule:{schedule_id}:run:{due}"
+        try:
+            return await self.store.set(key, str(due), ttl=CLAIM_TTL_SECONDS, only_if_absent=True)
+        except Exception as e:
+            # Better a duplicate run than a missed one.
+            log.warning(f"claim {key} failed: {e!r}")
+            return True
+
+    async def _store_get(self, key: str) -> Optional[str]:
+        if self.store is None:
+            return None
+        try:
+            return await self.store.get(key)
+        except Exception as e:
+            log.warning(f"get {key} failed: {e!r}")
+            return None
+
+    async def _store_set(self, key: str, value: str, ttl: Optional[float]) -> None:
+        try:
+            await self.store.set(key, value, ttl=ttl)
+        except Exception as e:
+            log.warning(f"set {key} failed: {e!r}")
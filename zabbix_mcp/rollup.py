@@ -0,0 +1,249 @@
+"""
+Copyright (c) 2025 Zabbix-MCP
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import asyncio
+import logging
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+from .daywindow import day_window
+from .deadline import DeadlineExceeded
+from .schemas import AlertSummary, RankedCount, StatsBucket
+from .sharedstate import SharedSnapshot
+from .zabbix_client import ZabbixClient
+
+ROLLUP_PAGE = 1000
+GROUP_INDEX_TTL_SECONDS = 300.0
+
+
+class _Source:
+    """Per-instance watermark; event ids are only ordered within one Zabbix."""
+
+    def __init__(self, client: ZabbixClient) -> None:
+        self.client = client
+        self.last_eventid: Optional[int] = None
+        self.groups: Dict[str, List[str]] = {}
+        self.groups_at = 0.0
+
+
+class RollupStore:
+    """Today's alert counters, updated incrementally from newly seen events.
+
+    Each refresh pulls only events above the last seen eventid (per instance)
+    and folds them into counters by severity, host, hostgroup, alert name and
+    hour. The first refresh of a day backfills from midnight in
+    ``DAY_TIMEZONE``; a new day resets everything. The summary is rebuilt
+    once per refresh, so reads are a copy. With ``shared`` set, one worker
+    at a time polls and publishes counters and watermarks; the others adopt
+    them.
+    """
+
+    def __init__(self, refresh_seconds: float = 30.0, max_events: int = 50000, top_n: int = 10) -> None:
+        self.refresh_seconds = refresh_seconds
+        self.max_events = max_events
+        self.top_n = top_n
+        self._sources: Dict[str, _Source] = {}
+        self._lock: Optional[asyncio.Lock] = None
+        self._refreshed_at = 0.0
+        self._summary: Optional[AlertSummary] = None
+        self.shared: Optional[SharedSnapshot] = None
+        self._reset(0)
+
+    def _reset(self, day_start: int, day_end: int = 0) -> None:
+        self.day_start = day_start
+        self.total = 0
+        self.complete = True
+        self.by_severity: Counter = Counter()
+        self.by_host: Counter = Counter()
+        self.by_group: Counter = Counter()
+        self.by_name: Counter = Counter()
+        # 23 or 25 hours on daylight-saving transition days.
+        self.by_hour = [0] * max(1, -(-(day_end - day_start) // 3600) if day_end else 24)
+        for src in self._sources.values():
+            src.last_eventid = None
+
+    def stale(self) -> bool:
+        return self._summary is None or time.monotonic() - self._refreshed_at >= self.refresh_seconds
+
+    async def _pull(self, src: _Source, budget: int) -> List[Dict[str, Any]]:
+        """Events above the watermark (or since midnight), newest page first."""
+        eventid_from = str(src.last_eventid + 1) if src.last_eventid is not None else None
+        eventid_till: Optional[str] = None
+        events: List[Dict[str, Any]] = []
+        while len(events) < budget:
+            want = min(ROLLUP_PAGE, budget - len(events))
+            page = await src.client.get_events(
+                time_from=self.day_start,
+                limit=want,
+                eventid_from=eventid_from,
+                eventid_till=eventid_till,
+            )
+            events.extend(page)
+            if len(page) < want:
+                return events
+            eventid_till = str(min(int(e["eventid"]) for e in page) - 1)
+        # Budget spent with more events pending: older ones are skipped for today.
+        self.complete = False
+        return events
+
+    async def _group_index(self, src: _Source) -> Dict[str, List[str]]:
+        now = time.monotonic()
+        if now - src.groups_at >= GROUP_INDEX_TTL_SECONDS:
+            src.groups = await src.client.get_host_group_index()
+            src.groups_at = now
+        return src.groups
+
+    def _fold(self, events: List[Dict[str, Any]], groups: Dict[str, List[str]]) -> None:
+        for e in events:
+            self.total += 1
+            self.by_severity[str(e.get("severity", 0))] += 1
+            self.by_name[e.get("name") or ""] += 1
+            hour = (int(e.get("clock", 0)) - self.day_start) // 3600
+            if 0 <= hour < len(self.by_hour):
+                self.by_hour[hour] += 1
+            seen_groups = set()
+            for h in e.get("hosts") or []:
+                self.by_host[h.get("host") or ""] += 1
+                seen_groups.update(groups.get(str(h.get("hostid")), ()))
+            for g in seen_groups:
+                self.by_group[g] += 1
+
+    async def refresh(self, client: Any, force: bool = False) -> None:
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if not force and not self.stale():
+                return
+            clients = client.clients if getattr(client, "federated", False) else {"": client}
+            for name, c in clients.items():
+                src = self._sources.get(name)
+                if src is None:
+                    src = self._sources[name] = _Source(c)
+                # Clients are per request; keep the watermark, swap the connection.
+                src.client = c
+            if self.shared is None:
+                await self._poll(clients)
+                return
+            published = await self.shared.load()
+            if published is not None:
+                self._adopt(*published)
+                if not force and not self.stale():
+                    return
+            claimed = await self.shared.claim()
+            if not claimed and self._summary is not None:
+                # Another worker is polling; its counters arrive with the next read.
+                return
+            try:
+                if await self._poll(clients):
+                    await self.shared.publish(self._state())
+            finally:
+                if claimed:
+                    await self.shared.release()
+
+    async def _poll(self, clients: Dict[str, Any]) -> bool:
+        """Fold in new events from every instance; False when nothing could be read."""
+        now = int(time.time())
+        day_start, day_end = day_window(now)
+        if day_start != self.day_start:
+            self._reset(day_start, day_end)
+        failed: List[str] = []
+        for name in clients:
+            src = self._sources[name]
+            try:
+                groups = await self._group_index(src)
+                events = await self._pull(src, max(1, self.max_events - self.total))
+            except DeadlineExceeded:
+                raise
+            except Exception as e:
+                failed.append(name or "default")
+                logging.getLogger("rollup").warning(f"instance={name or 'default'} error={e!r}")
+                continue
+            self._fold(events, groups)
+            if events:
+                newest = max(int(e["eventid"]) for e in events)
+                src.last_eventid = max(newest, src.last_eventid or 0)
+        if failed and len(failed) == len(clients) and self._summary is not None:
+            return False
+        self._refreshed_at = time.monotonic()
+        self._summary = self._build(now, failed)
+        return True
+
+    def _state(self) -> Dict[str, Any]:
+        assert self._summary is not None
+        return {
+            "day_start": self.day_start,
+            "total": self.total,
+            "complete": self.complete,
+            "by_severity": dict(self.by_severity),
+            "by_host": dict(self.by_host),
+            "by_group": dict(self.by_group),
+            "by_name": dict(self.by_name),
+            "by_hour": self.by_hour,
+            "watermarks": {name: src.last_eventid for name, src in self._sources.items()},
+            "summary": self._summary.model_dump(mode="json"),
+        }
+
+    def _adopt(self, published_at: float, state: Dict[str, Any]) -> None:
+        """Take over counters another worker published, unless ours are newer."""
+        refreshed_at = time.monotonic() - max(0.0, time.time() - published_at)
+        if self._summary is not None and refreshed_at <= self._refreshed_at:
+            return
+        self.day_start = int(state["day_start"])
+        self.total = int(state["total"])
+        self.complete = bool(state["complete"])
+        self.by_severity = Counter(state["by_severity"])
+        self.by_host = Counter(state["by_host"])
+        self.by_group = Counter(state["by_group"])
+        self.by_name = Counter(state["by_name"])
+        self.by_hour = list(state["by_hour"])
+        for name, src in self._sources.items():
+            src.last_eventid = state["watermarks"].get(name)
+        self._summary = AlertSummary.model_validate(state["summary"])
+        self._refreshed_at = refreshed_at
+
+    def _ranked(self, counter: Counter) -> List[RankedCount]:
+        return [RankedCount(name=k, count=v) for k, v in counter.most_common(self.top_n)]
+
+    def _build(self, now: int, failed: List[str]) -> AlertSummary:
+        return AlertSummary(
+            day_start=self.day_start,
+            updated_at=now,
+            total=self.total,
+            by_severity=dict(self.by_severity),
+            top_hosts=self._ranked(self.by_host),
+            top_groups=self._ranked(self.by_group),
+            top_names=self._ranked(self.by_name),
+            by_hour=[
+                StatsBucket(start_ts=self.day_start + h * 3600, end_ts=self.day_start + (h + 1) * 3600, count=c)
+                for h, c in enumerate(self.by_hour)
+            ],
+            complete=self.complete,
+            partial=bool(failed),
+            failed_instances=failed,
+        )
+
+    def summary(self, top: Optional[int] = None) -> Optional[AlertSummary]:
+        s = self._summary
+        if s is None or top is None or top >= self.top_n:
+            return s
+        return s.model_copy(
+            update={
+                "top_hosts": s.top_hosts[:top],
+                "top_groups": s.top_groups[:top],
+                "top_names": s.top_names[:top],
+            }
+        )
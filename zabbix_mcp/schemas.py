@@ -14,7 +14,7 @@ See the License for the specific language governing permissions and
 limitations under the License.
 """
 
-from typing import List, Optional, Literal
+from typing import Any, Dict, List, Optional, Literal
 from pydantic import BaseModel, Field
 
 
@@ -31,7 +31,16 @@ class AlertQuery(BaseModel):
         default=None, description="Zabbix trigger priority 0-5"
     )
     limit: int = 100
-    sort_by: Optional[Literal["severity", "frequency", "time"]] = None
+    sort_by: Optional[Literal["severity", "frequency", "time", "group"]] = None
+    group_by: Optional[Literal["group", "host"]] = Field(
+        default=None, description="Keep each group's (or host's) items together, largest first, and count them in 'groups'"
+    )
+    compact: bool = Field(
+        default=False, description="Fold repeats of the same trigger on the same host into one item"
+    )
+    compact_window: int = Field(
+        default=3600, ge=1, description="Max gap in seconds between events folded into one item"
+    )
 
 
 class LogAssociationQuery(BaseModel):
@@ -40,6 +49,18 @@ class LogAssociationQuery(BaseModel):
     host_groups: Optional[List[str]] = None
     hosts: Optional[List[str]] = None
     limit: int = 100
+    include_logs: bool = Field(
+        default=False, description="Attach lines from configured LOG_PATHS around each alert"
+    )
+    window_before: int = Field(default=300, ge=0, description="Seconds of log before the alert")
+    window_after: int = Field(default=300, ge=0, description="Seconds of log after the alert")
+    max_log_lines: int = Field(default=50, ge=1, le=1000)
+
+
+class LogLine(BaseModel):
+    source: str
+    timestamp: int
+    line: str
 
 
 class AlertItem(BaseModel):
@@ -50,11 +71,85 @@ class AlertItem(BaseModel):
     severity: int
     timestamp: int
     group: Optional[str] = None
+    matched_keywords: Optional[List[str]] = None
+    logs: Optional[List[LogLine]] = None
+    instance: Optional[str] = None
+    count: Optional[int] = None
+    first_timestamp: Optional[int] = None
+    last_timestamp: Optional[int] = None
+
+
+class AlertGroup(BaseModel):
+    key: Optional[str] = Field(description="Host group or host name; null for items without one")
+    items: int
+    events: int = Field(description="Events behind the items (compacted items count every folded event)")
+    max_severity: int
+    last_timestamp: int
 
 
 class AlertResponse(BaseModel):
     items: List[AlertItem]
     total: int
+    partial: bool = Field(
+        default=False, description="Some federated instances failed or timed out"
+    )
+    failed_instances: Optional[List[str]] = None
+    groups: Optional[List[AlertGroup]] = Field(default=None, description="Per-key counts when group_by is set")
+    truncated: bool = Field(
+        default=False, description="Incremental polling hit its page limit; older new events were skipped"
+    )
+
+
+class AlertStatsQuery(BaseModel):
+    time_range: Optional[TimeRange] = Field(default=None, description="Defaults to today")
+    host_groups: Optional[List[str]] = None
+    hosts: Optional[List[str]] = None
+    severities: Optional[List[int]] = Field(
+        default=None, description="Zabbix trigger priority 0-5"
+    )
+    dimensions: List[Literal["severity", "host", "group", "histogram"]] = ["severity"]
+    bucket_seconds: int = Field(default=3600, ge=60)
+
+
+class StatsBucket(BaseModel):
+    start_ts: int
+    end_ts: int
+    count: int
+
+
+class AlertStats(BaseModel):
+    total: int
+    time_range: TimeRange
+    by_severity: Optional[Dict[str, int]] = None
+    by_host: Optional[Dict[str, int]] = None
+    by_group: Optional[Dict[str, int]] = None
+    histogram: Optional[List[StatsBucket]] = None
+    sampled: bool = Field(
+        default=False, description="by_host comes from a capped scan rather than exact counts"
+    )
+    partial: bool = False
+    failed_instances: List[str] = Field(default_factory=list)
+
+
+class RankedCount(BaseModel):
+    name: str
+    count: int
+
+
+class AlertSummary(BaseModel):
+    day_start: int
+    updated_at: int
+    total: int
+    by_severity: Dict[str, int]
+    top_hosts: List[RankedCount]
+    top_groups: List[RankedCount]
+    top_names: List[RankedCount]
+    by_hour: List[StatsBucket]
+    complete: bool = Field(
+        default=True, description="False when today's backfill hit ROLLUP_MAX_EVENTS and older events were skipped"
+    )
+    partial: bool = False
+    failed_instances: List[str] = Field(default_factory=list)
 
 
 class ErrorResponse(BaseModel):
@@ -64,3 +159,113 @@ class ErrorResponse(BaseModel):
 
 class NLQuery(BaseModel):
     text: str
+
+
+class BatchQuery(BaseModel):
+    queries: List[Dict[str, Any]] = Field(
+        description="Items are AlertQuery or LogAssociationQuery bodies plus optional 'id' and "
+        "'type' (query, today, associate, nl; inferred from 'keywords'/'text' when absent)"
+    )
+
+
+class BatchResult(BaseModel):
+    id: str
+    type: str
+    ok: bool
+    result: Optional[AlertResponse] = None
+    error: Optional[ErrorResponse] = None
+
+
+class BatchResponse(BaseModel):
+    results: List[BatchResult]
+    shared_fetches: int = Field(default=0, description="event.get calls that served several queries")
+    merged_queries: int = Field(default=0, description="queries answered from a shared fetch")
+
+
+class ItemInfo(BaseModel):
+    itemid: str
+    name: str
+    key: str
+    host: str
+    value_type: int = Field(description="0 float, 1 character, 2 log, 3 unsigned, 4 text")
+    units: Optional[str] = None
+    last_value: Optional[str] = None
+    last_clock: Optional[int] = None
+    instance: Optional[str] = None
+
+
+class ItemListResponse(BaseModel):
+    items: List[ItemInfo]
+    total: int
+    partial: bool = False
+    failed_instances: Optional[List[str]] = None
+
+
+class ItemSeriesQuery(BaseModel):
+    itemids: Optional[List[str]] = None
+    host: Optional[str] = Field(default=None, description="Technical host name; used with 'key' instead of itemids")
+    key: Optional[str] = Field(default=None, description="Exact item key, e.g. system.cpu.util")
+    time_range: Optional[TimeRange] = Field(default=None, description="Defaults to the last 24 hours")
+    points: int = Field(default=300, ge=2, le=5000, description="Maximum points per series")
+    source: Literal["auto", "history", "trends"] = Field(
+        default="auto", description="auto reads hourly trends for windows longer than two days"
+    )
+    instance: Optional[str] = Field(default=None, description="Federated instance (required with ZABBIX_INSTANCES)")
+
+
+class SeriesPoint(BaseModel):
+    timestamp: int
+    min: float
+    avg: float
+    max: float
+    count: int = Field(description="Samples folded into this point")
+
+
+class ItemSeries(BaseModel):
+    itemid: str
+    name: str
+    key: str
+    host: str
+    units: Optional[str] = None
+    source: Literal["history", "trends"]
+    raw_points: int
+    points: List[SeriesPoint]
+
+
+class ItemSeriesResponse(BaseModel):
+    time_range: TimeRange
+    series: List[ItemSeries]
+
+
+class JobInfo(BaseModel):
+    id: str
+    type: Optional[str] = None
+    status: Literal["queued", "running", "done", "failed"]
+    created_at: int
+    started_at: Optional[int] = None
+    finished_at: Optional[int] = None
+    schedule_id: Optional[str] = None
+    result: Optional[Any] = None
+    error: Optional[str] = None
+
+
+class ScheduleSpec(BaseModel):
+    id: Optional[str] = Field(default=None, description="Defaults to a generated id; an existing id is replaced")
+    job: Dict[str, Any] = Field(
+        description='Job as for /queue/enqueue: {"type": ..., "payload": {...}}; '
+        '"window_seconds" sets time_range to the last N seconds at each run'
+    )
+    every_seconds: Optional[int] = Field(default=None, ge=60, description="Run every N seconds, aligned to the epoch")
+    cron: Optional[str] = Field(default=None, description="minute hour day month weekday, server local time")
+    run_now: bool = Field(default=False, description="Also run once right away")
+
+
+class ScheduleInfo(BaseModel):
+    id: str
+    job: Dict[str, Any]
+    every_seconds: Optional[int] = None
+    cron: Optional[str] = None
+    origin: Literal["api", "config"]
+    next_run: int
+    last_job_id: Optional[str] = None
+    last_done_job_id: Optional[str] = None
@@ -15,11 +15,61 @@ limitations under the License.
 """
 
 import asyncio
+import hashlib
+import logging
 import time
-from typing import List, Tuple, Optional, Dict
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterable, List, Set, Tuple, TypeVar, Optional, Dict
 
-from .schemas import AlertQuery, LogAssociationQuery, AlertItem, AlertResponse
-from .zabbix_client import ZabbixClient
+from .daywindow import day_start
+from .deadline import DeadlineExceeded
+from .downsample import minmax_buckets
+from .logindex import LogCorrelator
+from .matcher import KeywordMatcher
+from .problems import ProblemTracker
+from .nlp import EntityDictionary, parse_alert_query
+from .sharedstate import SharedSnapshot
+from .schemas import (
+    AlertQuery,
+    AlertGroup,
+    AlertStats,
+    AlertStatsQuery,
+    BatchResponse,
+    BatchResult,
+    ErrorResponse,
+    ItemInfo,
+    ItemListResponse,
+    ItemSeries,
+    ItemSeriesQuery,
+    ItemSeriesResponse,
+    LogAssociationQuery,
+    AlertItem,
+    AlertResponse,
+    SeriesPoint,
+    StatsBucket,
+    TimeRange,
+)
+from .zabbix_client import ZabbixAPIError, ZabbixClient
+
+ENTITY_CACHE_TTL_SECONDS = 300
+ASSOCIATE_MAX_PAGES = 10
+STATS_MAX_SERIES = 500
+STATS_SCAN_PAGE = 1000
+STATS_MAX_SCAN_EVENTS = 50000
+COMPACT_PAGE = 1000
+COMPACT_MAX_PAGES = 10
+BATCH_MAX_QUERIES = 50
+BATCH_FETCH_LIMIT = 10000
+SERIES_MAX_ITEMS = 20
+SERIES_DEFAULT_WINDOW = 86400
+# auto source: longer windows read hourly trends instead of raw history.
+HISTORY_MAX_WINDOW = 2 * 86400
+HISTORY_SLICE_SECONDS = 6 * 3600
+TRENDS_SLICE_SECONDS = 30 * 86400
+NUMERIC_VALUE_TYPES = {0, 3}
+_entities: Optional[EntityDictionary] = None
+_entities_at = 0.0
+_entities_lock: Optional[asyncio.Lock] = None
+_entities_shared: Optional[SharedSnapshot] = None
 
 
 def _normalize_host_ip(host: dict) -> Optional[str]:
@@ -32,32 +82,222 @@ def _normalize_host_ip(host: dict) -> Optional[str]:
         return None
 
 
-async def query_alerts(client: ZabbixClient, query: AlertQuery) -> AlertResponse:
+def _primary_group(e: dict, preferred: Optional[List[str]] = None) -> Optional[str]:
+    """The event's first host group, or the first one the query filtered on."""
+    groups = e.get("groups") or []
+    if preferred:
+        for g in groups:
+            if g in preferred:
+                return g
+    return groups[0] if groups else None
+
+
+def _to_item(e: dict, preferred_groups: Optional[List[str]] = None) -> AlertItem:
+    hosts = e.get("hosts") or []
+    host_name = hosts[0].get("host") if hosts else ""
+    host_ip = _normalize_host_ip(hosts[0]) if hosts else None
+    return AlertItem(
+        id=str(e.get("eventid")),
+        name=e.get("name") or e.get("trigger_description") or "",
+        host=host_name,
+        host_ip=host_ip,
+        severity=int(e.get("severity", 0)),
+        timestamp=int(e.get("clock", 0)),
+        group=_primary_group(e, preferred_groups),
+        instance=e.get("instance"),
+    )
+
+
+def _to_items(events: List[dict], preferred_groups: Optional[List[str]] = None) -> List[AlertItem]:
+    return [_to_item(e, preferred_groups) for e in events]
+
+
+async def _iter_events(client: ZabbixClient, **kwargs: Any) -> AsyncIterator[dict]:
+    """Events one at a time, streamed from the response where the client supports it."""
+    if hasattr(client, "iter_events"):
+        events = client.iter_events(**kwargs)
+        try:
+            async for e in events:
+                yield e
+        finally:
+            await events.aclose()
+    else:
+        for e in await client.get_events(**kwargs):
+            yield e
+
+
+def _with_partial(client: ZabbixClient, resp: AlertResponse, failed: Iterable[str] = ()) -> AlertResponse:
+    """Mark ``resp`` partial for the client's failed instances plus ``failed``."""
+    failed = set(getattr(client, "failed_instances", None) or ()) | set(failed)
+    if failed:
+        resp.partial = True
+        resp.failed_instances = sorted(failed)
+    return resp
+
+
+T = TypeVar("T")
+
+
+def _instances(client: Any) -> Dict[str, Any]:
+    """Each Zabbix behind ``client`` by instance name ("" for a lone client).
+
+    Event ids are only ordered within one Zabbix, so eventid watermarks and
+    ``eventid_till`` paging run per entry, never over a federated merge.
+    """
+    return client.clients if getattr(client, "federated", False) else {"": client}
+
+
+def _tagged(name: str, events: List[dict]) -> List[dict]:
+    if name:
+        for e in events:
+            e["instance"] = name
+    return events
+
+
+async def _per_instance(
+    client: Any, scan: Callable[[str, Any], Awaitable[T]]
+) -> Tuple[List[Tuple[str, T]], List[str]]:
+    """Run ``scan(name, instance_client)`` on every instance concurrently.
+
+    Returns the results of the instances that answered and the names of
+    those that failed. A lone client's error propagates unchanged; a
+    federated call raises only when every instance failed.
+    """
+    clients = _instances(client)
+    names = list(clients)
+    outcomes = await asyncio.gather(*(scan(n, clients[n]) for n in names), return_exceptions=True)
+    ok: List[Tuple[str, T]] = []
+    failed: List[str] = []
+    errors = []
+    for name, out in zip(names, outcomes):
+        if isinstance(out, BaseException):
+            if len(names) == 1 or isinstance(out, (asyncio.CancelledError, DeadlineExceeded)):
+                raise out
+            failed.append(name)
+            errors.append(f"{name}: {type(out).__name__} {out}")
+            logging.getLogger("federation").warning(f"instance={name} error={out!r}")
+        else:
+            ok.append((name, out))  # type: ignore[arg-type]
+    if not ok and names:
+        raise ZabbixAPIError("all instances failed: " + "; ".join(errors))
+    return ok, failed
+
+
+async def _compacted_items(
+    client: ZabbixClient, query: AlertQuery, event_keys: Optional[Set[str]] = None
+) -> Tuple[List[AlertItem], List[str]]:
+    """Fold events of one trigger on one host into runs; also returns the failed instances.
+
+    Each instance is scanned on its own (see ``_compact_instance``) and the
+    newest ``query.limit`` runs of all of them are kept.
+    """
+    results, failed = await _per_instance(
+        client, lambda name, c: _compact_instance(name, c, query, event_keys)
+    )
+    runs = [run for _, part in results for run in part]
+    if len(results) > 1:
+        runs.sort(key=lambda r: r.last_timestamp or r.timestamp, reverse=True)
+    return runs[: query.limit], failed
+
+
+async def _compact_instance(
+    name: str, client: ZabbixClient, query: AlertQuery, event_keys: Optional[Set[str]]
+) -> List[AlertItem]:
+    """Runs of one instance, in a single pass over its pages.
+
+    Pages arrive newest first; an event joins the open run for its
+    (trigger, host) when it is at most ``compact_window`` seconds older than
+    the run's first event, otherwise it starts a new run. Paging stops once a
+    run beyond ``query.limit`` would start, so counts cover the scanned span.
+    """
     time_from = query.time_range.start_ts if query.time_range else None
     time_till = query.time_range.end_ts if query.time_range else None
-    events = await client.get_events(
-        time_from=time_from,
-        time_till=time_till,
-        severities=query.severities,
-        group_names=query.host_groups,
-        host_names=query.hosts,
-        limit=query.limit,
-    )
-    items: List[AlertItem] = []
-    for e in events:
-        hosts = e.get("hosts") or []
-        host_name = hosts[0].get("host") if hosts else ""
-        host_ip = _normalize_host_ip(hosts[0]) if hosts else None
-        items.append(
-            AlertItem(
-                id=str(e.get("eventid")),
-                name=e.get("name") or e.get("trigger_description") or "",
-                host=host_name,
-                host_ip=host_ip,
-                severity=int(e.get("severity", 0)),
-                timestamp=int(e.get("clock", 0)),
-            )
+    runs: List[AlertItem] = []
+    open_runs: Dict[tuple, AlertItem] = {}
+    eventid_till: Optional[str] = None
+    for _ in range(COMPACT_MAX_PAGES):
+        seen = 0
+        oldest: Optional[int] = None
+        events = _iter_events(
+            client,
+            time_from=time_from,
+            time_till=time_till,
+            severities=query.severities,
+            group_names=query.host_groups,
+            host_names=query.hosts,
+            limit=COMPACT_PAGE,
+            eventid_till=eventid_till,
         )
+        try:
+            async for e in events:
+                seen += 1
+                if name:
+                    e["instance"] = name
+                if event_keys is not None:
+                    event_keys.add(_event_key(e))
+                eventid = int(e["eventid"])
+                oldest = eventid if oldest is None else min(oldest, eventid)
+                severity = int(e.get("severity", 0))
+                if query.severities and severity not in query.severities:
+                    continue
+                hosts = e.get("hosts") or []
+                key = (e.get("objectid") or e.get("name"), hosts[0].get("host") if hosts else "")
+                clock = int(e.get("clock", 0))
+                run = open_runs.get(key)
+                if run is not None and run.first_timestamp - clock <= query.compact_window:
+                    run.count += 1
+                    run.first_timestamp = min(run.first_timestamp, clock)
+                    run.severity = max(run.severity, severity)
+                    continue
+                if len(runs) >= query.limit:
+                    return runs
+                run = _to_item(e, query.host_groups)
+                run.count, run.first_timestamp, run.last_timestamp = 1, clock, clock
+                open_runs[key] = run
+                runs.append(run)
+        finally:
+            # Stopping early must still release the streamed response.
+            await events.aclose()
+        if seen < COMPACT_PAGE or oldest is None:
+            break
+        eventid_till = str(oldest - 1)
+    return runs
+
+
+async def query_alerts(client: ZabbixClient, query: AlertQuery, event_keys: Optional[Set[str]] = None) -> AlertResponse:
+    """Alerts matching ``query``; ``event_keys`` collects the keys of the events read, for ``result_etag``."""
+    time_from = query.time_range.start_ts if query.time_range else None
+    time_till = query.time_range.end_ts if query.time_range else None
+    failed: List[str] = []
+    if query.compact:
+        items, failed = await _compacted_items(client, query, event_keys)
+    else:
+        # Each event becomes an AlertItem as it is parsed; the raw events are not kept.
+        items = []
+        async for e in _iter_events(
+            client,
+            time_from=time_from,
+            time_till=time_till,
+            severities=query.severities,
+            group_names=query.host_groups,
+            host_names=query.hosts,
+            limit=query.limit,
+        ):
+            if event_keys is not None:
+                event_keys.add(_event_key(e))
+            items.append(_to_item(e, query.host_groups))
+    return _with_partial(client, _respond(items, query), failed)
+
+
+def _respond(items: List[AlertItem], query: AlertQuery) -> AlertResponse:
+    items = _shape(items, query)
+    if not query.group_by:
+        return AlertResponse(items=items, total=len(items))
+    items, groups = _grouped(items, query.group_by)
+    return AlertResponse(items=items, total=len(items), groups=groups)
+
+
+def _shape(items: List[AlertItem], query: AlertQuery) -> List[AlertItem]:
     # Sorting
     if query.severities:
         items = [it for it in items if it.severity in query.severities]
@@ -69,33 +309,742 @@ async def query_alerts(client: ZabbixClient, query: AlertQuery) -> AlertResponse
         # Frequency by alert name
         freq: Dict[str, int] = {}
         for it in items:
-            freq[it.name] = freq.get(it.name, 0) + 1
+            freq[it.name] = freq.get(it.name, 0) + (it.count or 1)
         items.sort(key=lambda x: freq.get(x.name, 0), reverse=True)
-    return AlertResponse(items=items, total=len(items))
+    elif query.sort_by == "group":
+        # By group name; items without a group last, each group keeping its time order.
+        items.sort(key=lambda x: (x.group is None, x.group or ""))
+    return items
+
+
+def _grouped(items: List[AlertItem], by: str) -> Tuple[List[AlertItem], List[AlertGroup]]:
+    """Items regrouped by ``group`` or ``host``, largest bucket first.
+
+    Within a bucket items keep the order ``_shape`` gave them; items without
+    the key form a trailing bucket with a null key.
+    """
+    buckets: Dict[Optional[str], List[AlertItem]] = {}
+    for it in items:
+        key = it.group if by == "group" else (it.host or None)
+        buckets.setdefault(key, []).append(it)
+    summaries = [
+        AlertGroup(
+            key=key,
+            items=len(members),
+            events=sum(it.count or 1 for it in members),
+            max_severity=max(it.severity for it in members),
+            last_timestamp=max(it.last_timestamp or it.timestamp for it in members),
+        )
+        for key, members in buckets.items()
+    ]
+    summaries.sort(key=lambda g: (g.key is None, -g.events, g.key or ""))
+    return [it for g in summaries for it in buckets[g.key]], summaries
+
 
+def _event_key(e: dict) -> str:
+    return f"{e.get('instance') or ''}:{e.get('eventid')}"
 
-async def today_alerts(client: ZabbixClient, limit: int = 100) -> AlertResponse:
+
+def etag_of(*parts: Any) -> str:
+    digest = hashlib.sha1("|".join(str(p) for p in parts).encode()).hexdigest()[:24]
+    return f'"{digest}"'
+
+
+def result_etag(query: AlertQuery, event_keys: Iterable[str]) -> str:
+    """Validator of an alert query result: the filters plus the ids of the events it read."""
+    return etag_of(sorted(query.model_dump(mode="json").items()), ",".join(sorted(event_keys)))
+
+
+async def alerts_etag(client: ZabbixClient, query: AlertQuery) -> Optional[str]:
+    """``result_etag`` of a query without running it, or ``None`` where no probe exists.
+
+    Asks only for the ids of the events the query would read (one light
+    ``event.get``, no hosts or trigger lookups), so it matches the ETag a
+    full run over the same events produced. Compacted queries read a
+    varying number of pages and are not probed.
+    """
+    if query.compact:
+        return None
+    tr = query.time_range
+    events = await client.event_ids(
+        time_from=tr.start_ts if tr else None,
+        time_till=tr.end_ts if tr else None,
+        group_names=query.host_groups,
+        host_names=query.hosts,
+        limit=query.limit,
+    )
+    return result_etag(query, (_event_key(e) for e in events))
+
+
+def today_query(limit: int = 100) -> AlertQuery:
     now = int(time.time())
-    start = now - (now % 86400)
-    q = AlertQuery(time_range={"start_ts": start, "end_ts": now}, limit=limit)
-    return await query_alerts(client, q)
+    return AlertQuery(time_range={"start_ts": day_start(now), "end_ts": now}, limit=limit)
+
+
+async def today_alerts(client: ZabbixClient, limit: int = 100, cache: Any = None) -> AlertResponse:
+    """Alerts since midnight in ``DAY_TIMEZONE``; a ``TodayCache`` fetches only what is new."""
+    if cache is not None:
+        return await cache.get(client, limit)
+    return await query_alerts(client, today_query(limit))
+
+
+async def _scan_host_counts(
+    client: ZabbixClient, query: AlertStatsQuery, tr: TimeRange
+) -> Tuple[Dict[str, int], bool, List[str]]:
+    """Count events per host by streaming pages; only counters are kept in memory.
+
+    Each instance pages on its own with an equal share of the scan budget.
+    Returns the counts, whether every scan finished, and the failed instances.
+    """
+    budget = max(STATS_SCAN_PAGE, STATS_MAX_SCAN_EVENTS // len(_instances(client)))
+
+    async def scan(name: str, c: ZabbixClient) -> Tuple[Dict[str, int], bool]:
+        counts: Dict[str, int] = {}
+        scanned = 0
+        eventid_till: Optional[str] = None
+        while scanned < budget:
+            seen = 0
+            oldest: Optional[int] = None
+            async for e in _iter_events(
+                c,
+                time_from=tr.start_ts,
+                time_till=tr.end_ts,
+                severities=query.severities,
+                group_names=query.host_groups,
+                host_names=query.hosts,
+                limit=STATS_SCAN_PAGE,
+                eventid_till=eventid_till,
+            ):
+                seen += 1
+                eventid = int(e["eventid"])
+                oldest = eventid if oldest is None else min(oldest, eventid)
+                if query.severities and int(e.get("severity", 0)) not in query.severities:
+                    continue
+                hosts = e.get("hosts") or []
+                host = hosts[0].get("host") if hosts else ""
+                counts[host] = counts.get(host, 0) + 1
+            scanned += seen
+            if seen < STATS_SCAN_PAGE or oldest is None:
+                return counts, True
+            eventid_till = str(oldest - 1)
+        return counts, False
+
+    results, failed = await _per_instance(client, scan)
+    total: Dict[str, int] = {}
+    for _, (counts, _complete) in results:
+        for host, n in counts.items():
+            total[host] = total.get(host, 0) + n
+    return total, all(complete for _, (_c, complete) in results), failed
+
+
+async def alert_stats(client: ZabbixClient, query: AlertStatsQuery) -> AlertStats:
+    """True totals and breakdowns from ``countOutput`` queries run concurrently.
+
+    No event list is materialized: every figure is a server-side count, except
+    per-host counts without a host/group scope (or with more than
+    ``STATS_MAX_SERIES`` hosts), which stream pages and keep only counters.
+    Under federation the figures sum the instances that answered; the others
+    are listed in ``failed_instances``.
+    """
+    if query.time_range:
+        tr = query.time_range
+    else:
+        now = int(time.time())
+        tr = TimeRange(start_ts=day_start(now), end_ts=now)
+    dims = set(query.dimensions)
+
+    def count(**kw) -> Awaitable[int]:
+        args = {
+            "time_from": tr.start_ts,
+            "time_till": tr.end_ts,
+            "severities": query.severities,
+            "group_names": query.host_groups,
+            "host_names": query.hosts,
+        }
+        args.update(kw)
+        return client.count_events(**args)
+
+    group_names: List[str] = []
+    if "group" in dims:
+        group_names = list(query.host_groups or [g["name"] for g in await client.get_hostgroups()])
+        if len(group_names) > STATS_MAX_SERIES:
+            raise ValueError(f"too many groups for stats ({len(group_names)} > {STATS_MAX_SERIES})")
+
+    host_names: Optional[List[str]] = None
+    if "host" in dims:
+        if query.hosts:
+            host_names = list(query.hosts)
+        elif query.host_groups:
+            host_names = [h["host"] for h in await client.get_hosts(groups=query.host_groups)]
+        if host_names is not None and len(host_names) > STATS_MAX_SERIES:
+            host_names = None
+
+    buckets: List[Tuple[int, int]] = []
+    if "histogram" in dims:
+        step = query.bucket_seconds
+        first = tr.start_ts - (tr.start_ts % step)
+        n = (tr.end_ts - first) // step + 1
+        if n > STATS_MAX_SERIES:
+            raise ValueError(f"too many buckets for stats ({n} > {STATS_MAX_SERIES})")
+        for start in range(first, tr.end_ts + 1, step):
+            buckets.append((max(start, tr.start_ts), min(start + step - 1, tr.end_ts)))
+
+    sev_keys = sorted(set(query.severities)) if query.severities else list(range(6))
+    total_f = count()
+    sev_f = [count(severities=[k]) for k in sev_keys] if "severity" in dims else []
+    group_f = [count(group_names=[g]) for g in group_names]
+    host_f = [count(host_names=[h]) for h in host_names or []]
+    bucket_f = [count(time_from=a, time_till=b) for a, b in buckets]
+
+    counts = await asyncio.gather(total_f, *sev_f, *group_f, *host_f, *bucket_f)
+    res = AlertStats(total=counts[0], time_range=tr)
+    pos = 1
+
+    def take(n: int) -> List[int]:
+        nonlocal pos
+        pos += n
+        return list(counts[pos - n:pos])
+
+    if sev_f:
+        res.by_severity = {str(k): c for k, c in zip(sev_keys, take(len(sev_f)))}
+    if "group" in dims:
+        res.by_group = {g: c for g, c in zip(group_names, take(len(group_f))) if c or query.host_groups}
+    failed = set(getattr(client, "failed_instances", None) or ())
+    if "host" in dims:
+        if host_names is not None:
+            by_host = {h: c for h, c in zip(host_names, take(len(host_f))) if c or query.hosts}
+        else:
+            by_host, complete, scan_failed = await _scan_host_counts(client, query, tr)
+            res.sampled = not complete
+            failed.update(scan_failed)
+        res.by_host = dict(sorted(by_host.items(), key=lambda kv: kv[1], reverse=True))
+    if bucket_f:
+        res.histogram = [
+            StatsBucket(start_ts=a, end_ts=b, count=c) for (a, b), c in zip(buckets, take(len(bucket_f)))
+        ]
+    if failed:
+        # Federated counts then cover only the instances that answered.
+        res.partial, res.failed_instances = True, sorted(failed)
+    return res
+
+
+async def poll_new_alerts(
+    client: ZabbixClient,
+    query: AlertQuery,
+    after: Optional[Dict[str, str]] = None,
+    max_pages: int = 10,
+) -> Tuple[AlertResponse, Dict[str, str]]:
+    """Return alerts newer than the watermark ``after``, oldest first.
+
+    ``after`` maps each instance ("" for a lone client) to the last eventid
+    seen there, since event ids are only ordered within one Zabbix. The first
+    poll (no ``after``) returns the latest ``query.limit`` events. Later polls
+    page each instance backwards from its newest event down to its
+    watermark + 1, so a burst larger than one page is not truncated. The
+    second element is the watermark to pass on the next poll; an instance
+    that failed keeps its previous one. When an instance still has full
+    pages after ``max_pages``, the events between its old watermark and the
+    oldest one fetched are skipped and the response is marked ``truncated``.
+    """
+    time_from = query.time_range.start_ts if query.time_range else None
+    time_till = query.time_range.end_ts if query.time_range else None
+    marks: Dict[str, str] = dict(after or {})
+    cut: List[str] = []
+
+    async def scan(name: str, c: ZabbixClient) -> List[dict]:
+        last = marks.get(name)
+        eventid_from = str(int(last) + 1) if last is not None else None
+        eventid_till: Optional[str] = None
+        events: List[dict] = []
+        for _ in range(max(1, max_pages)):
+            page = await c.get_events(
+                time_from=time_from,
+                time_till=time_till,
+                severities=query.severities,
+                group_names=query.host_groups,
+                host_names=query.hosts,
+                limit=query.limit,
+                eventid_from=eventid_from,
+                eventid_till=eventid_till,
+            )
+            events.extend(page)
+            if last is None or len(page) < query.limit:
+                break
+            eventid_till = str(min(int(e["eventid"]) for e in page) - 1)
+        else:
+            cut.append(name)
+        return _tagged(name, events)
+
+    results, failed = await _per_instance(client, scan)
+    events: List[dict] = []
+    for name, rows in results:
+        if rows:
+            marks[name] = str(max(int(e["eventid"]) for e in rows))
+        events.extend(rows)
+    items = _to_items(events, query.host_groups)
+    if query.severities:
+        items = [it for it in items if it.severity in query.severities]
+    if len(results) > 1:
+        # Ids of different instances do not compare; interleave by time.
+        items.sort(key=lambda x: (x.timestamp, int(x.id)))
+        if after is None:
+            items = items[-query.limit:]
+    else:
+        items.sort(key=lambda x: int(x.id))
+    resp = AlertResponse(items=items, total=len(items), truncated=bool(cut))
+    return _with_partial(client, resp, failed), marks
+
+
+async def active_problems(
+    client: ZabbixClient,
+    tracker: ProblemTracker,
+    severities: Optional[List[int]] = None,
+    host_groups: Optional[List[str]] = None,
+    hosts: Optional[List[str]] = None,
+    limit: int = 100,
+    refresh: bool = False,
+) -> AlertResponse:
+    """What is broken right now, answered from the tracker's in-memory set."""
+    await tracker.refresh(client, force=refresh)
+    hostids = None
+    if host_groups:
+        hostids = {str(h["hostid"]) for h in await client.get_hosts(groups=host_groups)}
+    problems = tracker.snapshot(severities=severities, hostids=hostids, hosts=hosts)
+    items = _to_items(problems[:limit], host_groups)
+    return _with_partial(client, AlertResponse(items=items, total=len(problems)), tracker.failed_instances)
 
 
 async def associate_logs(
-    client: ZabbixClient, query: LogAssociationQuery
+    client: ZabbixClient,
+    query: LogAssociationQuery,
+    max_pages: int = ASSOCIATE_MAX_PAGES,
+    correlator: Optional[LogCorrelator] = None,
 ) -> Tuple[AlertResponse, List[str]]:
-    # Simple fuzzy matching on event/trigger names by keywords
-    alerts = await query_alerts(
-        client,
-        AlertQuery(
-            time_range=query.time_range,
-            host_groups=query.host_groups,
-            hosts=query.hosts,
-            limit=query.limit,
-        ),
-    )
+    """Match alert names against keywords.
+
+    Keywords are pushed down to ``event.get`` as a name search so pages are
+    mostly relevant, then verified locally in a single automaton pass (which
+    also records which keywords hit). Pages continue backwards by eventid until
+    ``limit`` matches are found or the window is exhausted. With
+    ``query.include_logs`` and a ``correlator``, each alert also gets the log
+    lines of its host within ``[clock - window_before, clock + window_after]``.
+    """
     lowered = [k.lower() for k in query.keywords]
-    matched = [
-        it for it in alerts.items if any(k in (it.name or "").lower() for k in lowered)
-    ]
-    return AlertResponse(items=matched, total=len(matched)), lowered
+    matcher = KeywordMatcher(query.keywords)
+    if not len(matcher):
+        return AlertResponse(items=[], total=0), lowered
+    time_from = query.time_range.start_ts if query.time_range else None
+    time_till = query.time_range.end_ts if query.time_range else None
+
+    async def scan(name: str, c: ZabbixClient) -> List[AlertItem]:
+        # Pages continue per instance: eventid_till from one Zabbix means nothing to another.
+        found: List[AlertItem] = []
+        eventid_till: Optional[str] = None
+        for _ in range(max(1, max_pages)):
+            events = await c.get_events(
+                time_from=time_from,
+                time_till=time_till,
+                group_names=query.host_groups,
+                host_names=query.hosts,
+                limit=query.limit,
+                eventid_till=eventid_till,
+                search=query.keywords or None,
+            )
+            for it in _to_items(_tagged(name, events), query.host_groups):
+                hits = matcher.matches(it.name or "")
+                if hits:
+                    it.matched_keywords = sorted(hits)
+                    found.append(it)
+                    if len(found) >= query.limit:
+                        break
+            if len(found) >= query.limit or len(events) < query.limit:
+                break
+            eventid_till = str(min(int(e["eventid"]) for e in events) - 1)
+        return found
+
+    results, failed = await _per_instance(client, scan)
+    matched = [it for _, found in results for it in found]
+    if len(results) > 1:
+        matched.sort(key=lambda it: it.timestamp, reverse=True)
+        matched = matched[: query.limit]
+    if query.include_logs and correlator is not None and matched:
+        await correlator.correlate_async(
+            matched, query.window_before, query.window_after, query.max_log_lines
+        )
+    return _with_partial(client, AlertResponse(items=matched, total=len(matched)), failed), lowered
+
+
+def share_entities(shared: Optional[SharedSnapshot]) -> None:
+    """Fetch the entity dictionary on one worker and publish it through ``shared`` (None: per process)."""
+    global _entities_shared
+    _entities_shared = shared
+
+
+async def entity_dictionary(client: ZabbixClient) -> Optional[EntityDictionary]:
+    """Process-wide host/hostgroup dictionary for NL parsing, refreshed every TTL.
+
+    With ``share_entities`` set, the worker holding the lease fetches the
+    names and the others compile the published copy.
+    """
+    global _entities, _entities_at, _entities_lock
+    if _entities_lock is None:
+        _entities_lock = asyncio.Lock()
+    async with _entities_lock:
+        if _entities is not None and time.time() - _entities_at < ENTITY_CACHE_TTL_SECONDS:
+            return _entities
+        shared = _entities_shared
+        claimed = False
+        if shared is not None:
+            published = await shared.load()
+            if published is not None and published[0] > _entities_at:
+                _entities_at, state = published
+                _entities = EntityDictionary(state["hosts"], state["groups"])
+                if time.time() - _entities_at < ENTITY_CACHE_TTL_SECONDS:
+                    return _entities
+            claimed = await shared.claim()
+            if not claimed and _entities is not None:
+                return _entities
+        try:
+            try:
+                hosts, groups = await asyncio.gather(client.get_hosts(), client.get_hostgroups())
+            except Exception:
+                return _entities
+            aliases: Dict[str, str] = {}
+            for h in hosts:
+                aliases[h["host"]] = h["host"]
+                if h.get("name"):
+                    aliases.setdefault(h["name"], h["host"])
+            group_names = [g["name"] for g in groups]
+            _entities = EntityDictionary(aliases, group_names)
+            _entities_at = time.time()
+            if shared is not None:
+                await shared.publish({"hosts": aliases, "groups": group_names})
+            return _entities
+        finally:
+            if claimed and shared is not None:
+                await shared.release()
+
+
+async def nl_alerts(client: ZabbixClient, text: str) -> AlertResponse:
+    q = parse_alert_query(text, entities=await entity_dictionary(client))
+    return await query_alerts(client, q)
+
+
+def _batch_error(qid: str, kind: str, e: Exception) -> BatchResult:
+    return BatchResult(
+        id=qid, type=kind, ok=False, error=ErrorResponse(i18n_key="error.batch_item", message=str(e))
+    )
+
+
+async def _warm_names(client: ZabbixClient, hosts: List[str], groups: List[str]) -> None:
+    """Resolve every host/group name of a batch up front, once per instance."""
+    clients = client.clients.values() if getattr(client, "federated", False) else [client]
+    calls = []
+    for c in clients:
+        if not hasattr(c, "resolve_hostids"):
+            continue  # mock client: nothing to resolve
+        if hosts:
+            calls.append(c.resolve_hostids(hosts))
+        if groups:
+            calls.append(c.resolve_groupids(groups))
+    # Failures surface again, per item, when the queries themselves run.
+    await asyncio.gather(*calls, return_exceptions=True)
+
+
+def _windows(queries: List[Tuple[int, AlertQuery]]) -> List[List[Tuple[int, AlertQuery]]]:
+    """Cluster queries whose time windows overlap (open ends are unbounded)."""
+    def bounds(q: AlertQuery) -> Tuple[float, float]:
+        tr = q.time_range
+        lo = tr.start_ts if tr and tr.start_ts is not None else float("-inf")
+        hi = tr.end_ts if tr and tr.end_ts is not None else float("inf")
+        return lo, hi
+
+    clusters: List[List[Tuple[int, AlertQuery]]] = []
+    hi_mark = float("-inf")
+    for idx, q in sorted(queries, key=lambda x: bounds(x[1])):
+        lo, hi = bounds(q)
+        if clusters and lo <= hi_mark:
+            clusters[-1].append((idx, q))
+            hi_mark = max(hi_mark, hi)
+        else:
+            clusters.append([(idx, q)])
+            hi_mark = hi
+    return clusters
+
+
+async def batch_alerts(
+    client: ZabbixClient,
+    specs: List[Dict[str, Any]],
+    max_limit: Optional[int] = None,
+    correlator: Optional[LogCorrelator] = None,
+    concurrency: int = 8,
+    max_queries: Optional[int] = BATCH_MAX_QUERIES,
+) -> BatchResponse:
+    """Plan several alert queries together and answer them in request order.
+
+    Host and group names are resolved once for the whole batch. Plain queries
+    (``query``, ``today``, ``nl``) with the same host/group filters and
+    overlapping windows share one ``event.get`` over the union window, each
+    taking its newest ``limit`` events from it. A query whose share may be
+    incomplete (the fetch hit its limit and the oldest fetched event is not
+    older than the query's window) is re-run on its own. Everything else runs
+    concurrently, at most ``concurrency`` upstream jobs at a time.
+    """
+    if max_queries is not None and len(specs) > max_queries:
+        raise ValueError(f"at most {max_queries} queries per batch")
+    results: List[Optional[BatchResult]] = [None] * len(specs)
+    ids: List[str] = []
+    kinds: List[str] = []
+    plain: List[Tuple[int, AlertQuery]] = []
+    solo: List[Tuple[int, Any]] = []
+    nl_texts: List[Tuple[int, str]] = []
+
+    def clamp(limit: int) -> int:
+        return min(max(1, limit), max_limit) if max_limit else max(1, limit)
+
+    for idx, spec in enumerate(specs):
+        qid = str(spec.get("id", idx))
+        kind = spec.get("type") or ("nl" if "text" in spec else "associate" if "keywords" in spec else "query")
+        ids.append(qid)
+        kinds.append(kind)
+        body = {k: v for k, v in spec.items() if k not in {"id", "type"}}
+        try:
+            if kind == "associate":
+                aq = LogAssociationQuery.model_validate(body)
+                solo.append((idx, aq.model_copy(update={"limit": clamp(aq.limit)})))
+            elif kind == "nl":
+                if not isinstance(body.get("text"), str):
+                    raise ValueError("nl items need 'text'")
+                nl_texts.append((idx, body["text"]))
+            elif kind in ("query", "today"):
+                q = today_query(int(body.get("limit", 100))) if kind == "today" else AlertQuery.model_validate(body)
+                q = q.model_copy(update={"limit": clamp(q.limit)})
+                (solo if q.compact else plain).append((idx, q))
+            else:
+                raise ValueError(f"unknown batch item type: {kind}")
+        except ValueError as e:
+            results[idx] = _batch_error(qid, kind, e)
+
+    if nl_texts:
+        entities = await entity_dictionary(client)
+        for idx, text in nl_texts:
+            q = parse_alert_query(text, entities=entities)
+            plain.append((idx, q.model_copy(update={"limit": clamp(q.limit)})))
+
+    hosts = sorted({h for _, q in plain + solo for h in (q.hosts or [])})
+    groups = sorted({g for _, q in plain + solo for g in (q.host_groups or [])})
+    await _warm_names(client, hosts, groups)
+
+    by_filter: Dict[Tuple[Tuple[str, ...], Tuple[str, ...]], List[Tuple[int, AlertQuery]]] = {}
+    for idx, q in plain:
+        key = (tuple(sorted(q.host_groups or [])), tuple(sorted(q.hosts or [])))
+        by_filter.setdefault(key, []).append((idx, q))
+    shared: List[List[Tuple[int, AlertQuery]]] = []
+    for members in by_filter.values():
+        for cluster in _windows(members):
+            if len(cluster) > 1:
+                shared.append(cluster)
+            else:
+                solo.extend(cluster)
+
+    sem = asyncio.Semaphore(max(1, concurrency))
+    stats = {"fetches": 0, "merged": 0}
+
+    async def run_one(idx: int, q: Any) -> None:
+        async with sem:
+            try:
+                if isinstance(q, LogAssociationQuery):
+                    resp, _ = await associate_logs(client, q, correlator=correlator)
+                else:
+                    resp = await query_alerts(client, q)
+            except DeadlineExceeded:
+                raise
+            except Exception as e:
+                # One failing item must not sink the rest of the batch.
+                results[idx] = _batch_error(ids[idx], kinds[idx], e)
+                return
+        results[idx] = BatchResult(id=ids[idx], type=kinds[idx], ok=True, result=resp)
+
+    async def run_shared(cluster: List[Tuple[int, AlertQuery]]) -> None:
+        starts = [q.time_range.start_ts if q.time_range else None for _, q in cluster]
+        ends = [q.time_range.end_ts if q.time_range else None for _, q in cluster]
+        limit = min(sum(q.limit for _, q in cluster), BATCH_FETCH_LIMIT)
+        first = cluster[0][1]
+        async with sem:
+            try:
+                events = await client.get_events(
+                    time_from=None if None in starts else min(starts),
+                    time_till=None if None in ends else max(ends),
+                    group_names=first.host_groups,
+                    host_names=first.hosts,
+                    limit=limit,
+                )
+            except DeadlineExceeded:
+                raise
+            except Exception as e:
+                for idx, _ in cluster:
+                    results[idx] = _batch_error(ids[idx], kinds[idx], e)
+                return
+        stats["fetches"] += 1
+        items = _to_items(events, first.host_groups)
+        truncated = len(events) >= limit
+        oldest = min((it.timestamp for it in items), default=None)
+        retry = []
+        for idx, q in cluster:
+            tr = q.time_range
+            lo = tr.start_ts if tr else None
+            hi = tr.end_ts if tr else None
+            mine = [it for it in items if (lo is None or it.timestamp >= lo) and (hi is None or it.timestamp <= hi)]
+            if truncated and len(mine) < q.limit and (lo is None or oldest is None or oldest >= lo):
+                retry.append((idx, q))
+                continue
+            resp = _with_partial(client, _respond(mine[: q.limit], q))
+            results[idx] = BatchResult(id=ids[idx], type=kinds[idx], ok=True, result=resp)
+            stats["merged"] += 1
+        await asyncio.gather(*(run_one(idx, q) for idx, q in retry))
+
+    outcomes = await asyncio.gather(
+        *[run_shared(c) for c in shared],
+        *[run_one(idx, q) for idx, q in solo],
+        return_exceptions=True,
+    )
+    for o in outcomes:
+        if isinstance(o, BaseException):
+            raise o
+    return BatchResponse(
+        results=[r for r in results if r is not None],
+        shared_fetches=stats["fetches"],
+        merged_queries=stats["merged"],
+    )
+
+
+def _item_info(i: dict) -> ItemInfo:
+    hosts = i.get("hosts") or []
+    return ItemInfo(
+        itemid=str(i["itemid"]),
+        name=i.get("name") or "",
+        key=i.get("key_") or "",
+        host=hosts[0].get("host") if hosts else "",
+        value_type=int(i.get("value_type", 0)),
+        units=i.get("units") or None,
+        last_value=i.get("lastvalue"),
+        last_clock=int(i["lastclock"]) if i.get("lastclock") else None,
+        instance=i.get("instance"),
+    )
+
+
+async def list_items(
+    client: ZabbixClient, hosts: Optional[List[str]] = None, search: Optional[str] = None, limit: int = 100
+) -> ItemListResponse:
+    rows = await client.get_items(host_names=hosts, search=search, limit=limit)
+    items = [_item_info(i) for i in rows]
+    resp = ItemListResponse(items=items, total=len(items))
+    failed = getattr(client, "failed_instances", None)
+    if failed:
+        resp.partial = True
+        resp.failed_instances = sorted(set(failed))
+    return resp
+
+
+def _instance_client(client: Any, instance: Optional[str]) -> Any:
+    """Item ids only mean something on one server, so federated series need an instance."""
+    if not getattr(client, "federated", False):
+        return client
+    if instance is None and len(client.clients) == 1:
+        return next(iter(client.clients.values()))
+    if instance not in client.clients:
+        raise ValueError(f"instance must be one of: {', '.join(client.clients)}")
+    return client.clients[instance]
+
+
+def _slices(start: int, end: int, step: int) -> List[Tuple[int, int]]:
+    return [(a, min(a + step - 1, end)) for a in range(start, end + 1, step)]
+
+
+async def item_series(client: ZabbixClient, query: ItemSeriesQuery) -> ItemSeriesResponse:
+    """Downsampled numeric series for a few items.
+
+    Windows longer than ``HISTORY_MAX_WINDOW`` read hourly trends (``source=auto``).
+    The range is fetched as concurrent time slices, one call per slice and
+    value type for all items, and each series is folded into at most
+    ``query.points`` min/avg/max buckets.
+    """
+    if query.time_range:
+        tr = query.time_range
+    else:
+        now = int(time.time())
+        tr = TimeRange(start_ts=now - SERIES_DEFAULT_WINDOW, end_ts=now)
+    if tr.end_ts <= tr.start_ts:
+        raise ValueError("time_range.end_ts must be after start_ts")
+    cli = _instance_client(client, query.instance)
+    if query.itemids:
+        rows = await cli.get_items(itemids=query.itemids)
+    elif query.host and query.key:
+        rows = await cli.get_items(host_names=[query.host], key=query.key)
+    else:
+        raise ValueError("itemids, or host and key, are required")
+    if len(rows) > SERIES_MAX_ITEMS:
+        raise ValueError(f"too many items for one series query ({len(rows)} > {SERIES_MAX_ITEMS})")
+    items = [_item_info(i) for i in rows]
+    text = [i.itemid for i in items if i.value_type not in NUMERIC_VALUE_TYPES]
+    if text:
+        raise ValueError(f"only numeric items have series: {', '.join(text)}")
+    source = query.source
+    if source == "auto":
+        source = "trends" if tr.end_ts - tr.start_ts > HISTORY_MAX_WINDOW else "history"
+
+    # itemid -> parallel columns (clock, min, avg, max, count)
+    cols: Dict[str, Tuple[List[int], List[float], List[float], List[float], List[int]]] = {
+        i.itemid: ([], [], [], [], []) for i in items
+    }
+    if items:
+        if source == "history":
+            by_type: Dict[int, List[str]] = {}
+            for i in items:
+                by_type.setdefault(i.value_type, []).append(i.itemid)
+            calls = [
+                cli.get_history(ids, vt, a, b)
+                for vt, ids in by_type.items()
+                for a, b in _slices(tr.start_ts, tr.end_ts, HISTORY_SLICE_SECONDS)
+            ]
+        else:
+            ids = [i.itemid for i in items]
+            calls = [cli.get_trends(ids, a, b) for a, b in _slices(tr.start_ts, tr.end_ts, TRENDS_SLICE_SECONDS)]
+        # Slices come back in time order; within one, history is sorted and trends are sorted below.
+        for part in await asyncio.gather(*calls):
+            if source == "trends":
+                part.sort(key=lambda r: int(r["clock"]))
+            for r in part:
+                c = cols.get(str(r["itemid"]))
+                if c is None:
+                    continue
+                c[0].append(int(r["clock"]))
+                if source == "history":
+                    v = float(r["value"])
+                    c[1].append(v)
+                    c[2].append(v)
+                    c[3].append(v)
+                    c[4].append(1)
+                else:
+                    c[1].append(float(r["value_min"]))
+                    c[2].append(float(r["value_avg"]))
+                    c[3].append(float(r["value_max"]))
+                    c[4].append(int(r.get("num") or 1))
+
+    series = []
+    for i in items:
+        ts, lo, avg, hi, num = cols[i.itemid]
+        buckets = minmax_buckets(ts, lo, avg, hi, num, tr.start_ts, tr.end_ts, query.points)
+        series.append(
+            ItemSeries(
+                itemid=i.itemid,
+                name=i.name,
+                key=i.key,
+                host=i.host,
+                units=i.units,
+                source=source,
+                raw_points=len(ts),
+                points=[SeriesPoint(timestamp=t, min=a, avg=m, max=b, count=n) for t, a, m, b, n in buckets],
+            )
+        )
+    return ItemSeriesResponse(time_range=tr, series=series)
@@ -0,0 +1,331 @@
+"""
+Copyright (c) 2025 Zabbix-MCP
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import unquote, urlparse
+
+# How long a refresh lease blocks other workers if its holder never releases it.
+LEASE_SECONDS = 60.0
+# Published snapshots outlive a quiet spell, not a retired deployment.
+SNAPSHOT_TTL_SECONDS = 2 * 86400.0
+
+log = logging.getLogger("sharedstate")
+
+
+class SharedStateError(Exception):
+    pass
+
+
+class MemoryBackend:
+    """Process-local key/value store; the default for single-worker deployments."""
+
+    def __init__(self) -> None:
+        self._data: Dict[str, Tuple[str, Optional[float]]] = {}
+
+    def _live(self, key: str) -> Optional[str]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        value, expires = entry
+        if expires is not None and expires <= time.time():
+            del self._data[key]
+            return None
+        return value
+
+    async def get(self, key: str) -> Optional[str]:
+        return self._live(key)
+
+    async def set(self, key: str, value: str, ttl: Optional[float] = None, only_if_absent: bool = False) -> bool:
+        if only_if_absent and self._live(key) is not None:
+            return False
+        self._data[key] = (value, time.time() + ttl if ttl else None)
+        return True
+
+    async def delete(self, key: str) -> None:
+        self._data.pop(key, None)
+
+    async def close(self) -> None:
+        return None
+
+
+class SQLiteBackend:
+    """Key/value store in a local SQLite file, shared by every worker on the host.
+
+    Each operation opens its own connection in a worker thread; WAL mode lets
+    readers proceed while one worker writes.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connect() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("CREATE TABLE IF NOT EXISTS kv (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL)")
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+
+    async def _run(self, fn: Any, *args: Any) -> Any:
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(None, fn, *args)
+
+    def _get(self, key: str) -> Optional[str]:
+        db = self._connect()
+        try:
+            row = db.execute(
+                "SELECT value FROM kv WHERE key = ? AND (expires IS NULL OR expires > ?)", (key, time.time())
+            ).fetchone()
+        finally:
+            db.close()
+        return row[0] if row else None
+
+    def _set(self, key: str, value: str, ttl: Optional[float], only_if_absent: bool) -> bool:
+        now = time.time()
+        db = self._connect()
+        try:
+            # IMMEDIATE takes the write lock up front, so check-and-set is atomic across processes.
+            db.execute("BEGIN IMMEDIATE")
+            if only_if_absent:
+                row = db.execute(
+                    "SELECT 1 FROM kv WHERE key = ? AND (expires IS NULL OR expires > ?)", (key, now)
+                ).fetchone()
+                if row:
+                    db.execute("ROLLBACK")
+                    return False
+            db.execute(
+                "INSERT OR REPLACE INTO kv (key, value, expires) VALUES (?, ?, ?)",
+                (key, value, now + ttl if ttl else None),
+            )
+            db.execute("COMMIT")
+            return True
+        finally:
+            db.close()
+
+    def _delete(self, key: str) -> None:
+        db = self._connect()
+        try:
+            db.execute("DELETE FROM kv WHERE key = ?", (key,))
+        finally:
+            db.close()
+
+    async def get(self, key: str) -> Optional[str]:
+        return await self._run(self._get, key)
+
+    async def set(self, key: str, value: str, ttl: Optional[float] = None, only_if_absent: bool = False) -> bool:
+        return await self._run(self._set, key, value, ttl, only_if_absent)
+
+    async def delete(self, key: str) -> None:
+        await self._run(self._delete, key)
+
+    async def close(self) -> None:
+        return None
+
+
+class RedisBackend:
+    """Minimal RESP client for Redis or any server speaking its protocol.
+
+    Only GET, SET (NX/PX) and DEL are used, so KeyDB, Dragonfly, Valkey or a
+    local stand-in work too, and no client library is needed. Commands share
+    one connection and are serialized; the connection is reopened after an
+    error or when the event loop changes.
+    """
+
+    def __init__(self, host: str, port: int = 6379, db: int = 0, password: Optional[str] = None) -> None:
+        self.host = host
+        self.port = port
+        self.db = db
+        self.password = password
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock: Optional[asyncio.Lock] = None
+
+    @staticmethod
+    def _encode(args: Tuple[Any, ...]) -> bytes:
+        out = [b"*%d\r\n" % len(args)]
+        for a in args:
+            data = a if isinstance(a, bytes) else str(a).encode("utf-8")
+            out.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        return b"".join(out)
+
+    async def _read(self) -> Any:
+        assert self._reader is not None
+        line = await self._reader.readline()
+        if not line.endswith(b"\r\n"):
+            raise ConnectionError("connection closed by shared-state server")
+        kind, rest = line[:1], line[1:-2]
+        if kind == b"+":
+            return rest.decode()
+        if kind == b"-":
+            raise SharedStateError(rest.decode())
+        if kind == b":":
+            return int(rest)
+        if kind == b"$":
+            n = int(rest)
+            if n < 0:
+                return None
+            return (await self._reader.readexactly(n + 2))[:-2].decode("utf-8")
+        if kind == b"*":
+            n = int(rest)
+            return None if n < 0 else [await self._read() for _ in range(n)]
+        raise SharedStateError(f"unexpected reply from shared-state server: {line[:32]!r}")
+
+    async def _connect(self) -> None:
+        self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        setup: List[Tuple[Any, ...]] = []
+        if self.password:
+            setup.append(("AUTH", self.password))
+        if self.db:
+            setup.append(("SELECT", self.db))
+        for cmd in setup:
+            self._writer.write(self._encode(cmd))
+            await self._writer.drain()
+            await self._read()
+
+    async def _drop(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+        self._reader = self._writer = None
+
+    async def _call(self, *args: Any) -> Any:
+        loop = asyncio.get_event_loop()
+        if self._loop is not loop:
+            # Streams and locks are bound to the loop that created them (e.g. one asyncio.run per CLI command).
+            self._loop, self._lock, self._reader, self._writer = loop, asyncio.Lock(), None, None
+        assert self._lock is not None
+        async with self._lock:
+            try:
+                if self._writer is None:
+                    await self._connect()
+                assert self._writer is not None
+                self._writer.write(self._encode(args))
+                await self._writer.drain()
+                return await self._read()
+            except (OSError, asyncio.IncompleteReadError):
+                await self._drop()
+                raise
+
+    async def get(self, key: str) -> Optional[str]:
+        return await self._call("GET", key)
+
+    async def set(self, key: str, value: str, ttl: Optional[float] = None, only_if_absent: bool = False) -> bool:
+        args: List[Any] = ["SET", key, value]
+        if ttl:
+            args += ["PX", max(1, int(ttl * 1000))]
+        if only_if_absent:
+            args.append("NX")
+        return await self._call(*args) is not None
+
+    async def delete(self, key: str) -> None:
+        await self._call("DEL", key)
+
+    async def close(self) -> None:
+        await self._drop()
+
+
+def open_backend(url: Optional[str]) -> Any:
+    """Backend for ``SHARED_STATE_URL``.
+
+    Empty or ``memory://`` keeps state in the process; ``sqlite:///path/to.db``
+    shares it through a local file; ``redis://[:password@]host[:port][/db]``
+    through a Redis-compatible server.
+    """
+    if not url or url == "memory://":
+        return MemoryBackend()
+    parsed = urlparse(url)
+    if parsed.scheme == "sqlite":
+        path = unquote(parsed.netloc + parsed.path)
+        if not path:
+            raise ValueError("SHARED_STATE_URL sqlite:// needs a file path")
+        return SQLiteBackend(path)
+    if parsed.scheme == "redis":
+        db = parsed.path.strip("/")
+        return RedisBackend(
+            parsed.hostname or "127.0.0.1",
+            parsed.port or 6379,
+            int(db) if db else 0,
+            unquote(parsed.password) if parsed.password else None,
+        )
+    raise ValueError(f"unsupported SHARED_STATE_URL scheme: {parsed.scheme!r}")
+
+
+_backends: Dict[str, Any] = {}
+
+
+def get_backend(url: Optional[str]) -> Any:
+    """One backend per URL for the whole process."""
+    key = url or ""
+    backend = _backends.get(key)
+    if backend is None:
+        backend = _backends[key] = open_backend(url)
+    return backend
+
+
+class SharedSnapshot:
+    """State one worker refreshes from Zabbix and every worker reads.
+
+    Before polling, a worker takes the lease ``<key>:lease`` (set only if
+    absent); the holder polls, publishes its state as JSON under ``key`` and
+    releases the lease, while the others adopt the published copy instead of
+    polling themselves. A lease left behind by a dead worker expires after
+    ``lease_seconds``. Store errors read as "nothing published" and "lease
+    granted", so a broken store falls back to per-process polling.
+    """
+
+    def __init__(self, store: Any, key: str, lease_seconds: float = LEASE_SECONDS) -> None:
+        self.store = store
+        self.key = key
+        self.lease_seconds = lease_seconds
+
+    async def load(self) -> Optional[Tuple[float, Any]]:
+        """``(published_at, state)`` of the last publish, or None."""
+        try:
+            raw = await self.store.get(self.key)
+            if raw is None:
+                return None
+            doc = json.loads(raw)
+            return float(doc["at"]), doc["state"]
+        except Exception as e:
+            log.warning(f"get {self.key} failed: {e!r}")
+            return None
+
+    async def publish(self, state: Any) -> None:
+        try:
+            doc = json.dumps({"at": time.time(), "state": state}, ensure_ascii=False)
+            await self.store.set(self.key, doc, ttl=SNAPSHOT_TTL_SECONDS)
+        except Exception as e:
+            log.warning(f"set {self.key} failed: {e!r}")
+
+    async def claim(self) -> bool:
+        try:
+            return await self.store.set(f"{self.key}:lease", str(os.getpid()), self.lease_seconds, True)
+        except Exception as e:
+            # Better two workers polling than none.
+            log.warning(f"claim {self.key} failed: {e!r}")
+            return True
+
+    async def release(self) -> None:
+        try:
+            await self.store.delete(f"{self.key}:lease")
+        except Exception as e:
+            log.warning(f"release {self.key} failed: {e!r}")
@@ -0,0 +1,198 @@
+"""
+Copyright (c) 2025 Zabbix-MCP
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from .daywindow import day_window
+from .deadline import DeadlineExceeded
+from .schemas import AlertItem, AlertResponse
+from .services import _iter_events, _to_item
+from .sharedstate import SharedSnapshot
+
+
+def _newest_first(items: List[AlertItem]) -> List[AlertItem]:
+    return sorted(items, key=lambda it: (it.timestamp, int(it.id)), reverse=True)
+
+
+class _Source:
+    """Today's newest events of one instance; event ids are only ordered within one Zabbix."""
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = capacity
+        self.items: List[AlertItem] = []
+        self.last_eventid: Optional[int] = None
+        # Every event since midnight is held, so any limit up to capacity is exact.
+        self.complete = True
+
+    def take(self, events: List[Dict[str, Any]], instance: Optional[str]) -> List[AlertItem]:
+        items = []
+        for e in events:
+            if instance:
+                e["instance"] = instance
+            items.append(_to_item(e))
+            self.last_eventid = max(int(e["eventid"]), self.last_eventid or 0)
+        return items
+
+
+class TodayCache:
+    """``/alerts/today`` answered from memory, topped up with new events.
+
+    The first call of a day (or one asking for more than is held) fetches the
+    newest ``limit`` events since midnight in ``DAY_TIMEZONE``; later calls ask
+    each instance only for events above its last seen eventid and merge them
+    in front, so a repeated call costs one small ``event.get`` per instance.
+    At most the largest ``limit`` asked for is kept per instance. A new day
+    starts over. With ``shared`` set, one worker at a time tops up and
+    publishes the held events; a worker that finds the lease taken answers
+    from the published copy when it covers the ``limit`` asked for.
+    """
+
+    def __init__(self) -> None:
+        self.day_start = 0
+        self._sources: Dict[str, _Source] = {}
+        self._lock: Optional[asyncio.Lock] = None
+        self.shared: Optional[SharedSnapshot] = None
+
+    async def _fill(self, src: Optional[_Source], client: Any, name: str, limit: int) -> _Source:
+        if src is None or (limit > src.capacity and not src.complete):
+            src = _Source(limit)
+            events = [e async for e in _iter_events(client, time_from=self.day_start, limit=limit)]
+            src.items = _newest_first(src.take(events, name))
+            src.complete = len(events) < limit
+            return src
+        if src.complete:
+            src.capacity = max(src.capacity, limit)
+        eventid_from = str(src.last_eventid + 1) if src.last_eventid is not None else None
+        events = [
+            e
+            async for e in _iter_events(
+                client, time_from=self.day_start, eventid_from=eventid_from, limit=src.capacity
+            )
+        ]
+        if not events:
+            return src
+        fresh = src.take(events, name)
+        if len(events) >= src.capacity:
+            # More new events than we keep: they replace everything held.
+            src.items, src.complete = _newest_first(fresh), False
+            return src
+        merged = _newest_first(fresh + src.items)
+        if len(merged) > src.capacity:
+            merged, src.complete = merged[: src.capacity], False
+        src.items = merged
+        return src
+
+    async def get(self, client: Any, limit: int) -> AlertResponse:
+        return (await self.fetch(client, limit))[0]
+
+    async def fetch(self, client: Any, limit: int) -> Tuple[AlertResponse, str]:
+        """The response plus a watermark that changes whenever it would.
+
+        The watermark is the day and each instance's last seen eventid, taken
+        under the same lock as the items, so an ETag built from it needs no
+        probe of its own.
+        """
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            start, _ = day_window()
+            if start != self.day_start:
+                self.day_start, self._sources = start, {}
+            clients = client.clients if getattr(client, "federated", False) else {"": client}
+            names = list(clients)
+            claimed = False
+            if self.shared is not None:
+                published = await self.shared.load()
+                if published is not None:
+                    self._adopt(published[1])
+                claimed = await self.shared.claim()
+                if not claimed and all(self._covers(n, limit) for n in names):
+                    # Another worker is topping up; answer from what it published.
+                    return self._answer(names, [], limit)
+            try:
+                failed = await self._top_up(clients, limit)
+                if self.shared is not None:
+                    await self.shared.publish(self._state())
+            finally:
+                if claimed and self.shared is not None:
+                    await self.shared.release()
+            return self._answer(names, failed, limit)
+
+    async def _top_up(self, clients: Dict[str, Any], limit: int) -> List[str]:
+        """Fill every instance; the names that failed (raises when all did)."""
+        names = list(clients)
+        outcomes = await asyncio.gather(
+            *(self._fill(self._sources.get(n), clients[n], n, limit) for n in names), return_exceptions=True
+        )
+        failed: List[str] = []
+        for name, out in zip(names, outcomes):
+            if isinstance(out, DeadlineExceeded):
+                raise out
+            if isinstance(out, BaseException):
+                if len(names) == 1:
+                    raise out
+                failed.append(name)
+                logging.getLogger("today").warning(f"instance={name} error={out!r}")
+                continue
+            self._sources[name] = out
+        if failed and len(failed) == len(names):
+            raise outcomes[0]  # type: ignore[misc]
+        return failed
+
+    def _answer(self, names: List[str], failed: List[str], limit: int) -> Tuple[AlertResponse, str]:
+        live = [n for n in names if n not in failed and n in self._sources]
+        held = [it for n in live for it in self._sources[n].items]
+        items = _newest_first(held)[:limit] if len(names) > 1 else held[:limit]
+        watermark = ";".join(f"{n}={self._sources[n].last_eventid}" for n in live)
+        resp = AlertResponse(items=items, total=len(items))
+        if failed:
+            resp.partial, resp.failed_instances = True, sorted(failed)
+        return resp, f"{self.day_start}|{watermark}"
+
+    def _covers(self, name: str, limit: int) -> bool:
+        src = self._sources.get(name)
+        return src is not None and (limit <= src.capacity or src.complete)
+
+    def _state(self) -> Dict[str, Any]:
+        return {
+            "day_start": self.day_start,
+            "sources": {
+                name: {
+                    "capacity": src.capacity,
+                    "items": [it.model_dump(mode="json") for it in src.items],
+                    "last_eventid": src.last_eventid,
+                    "complete": src.complete,
+                }
+                for name, src in self._sources.items()
+            },
+        }
+
+    def _adopt(self, state: Dict[str, Any]) -> None:
+        """Take over instances another worker has seen further into, for the same day."""
+        if int(state["day_start"]) != self.day_start:
+            return
+        for name, doc in state["sources"].items():
+            ours = self._sources.get(name)
+            theirs = doc["last_eventid"] or 0
+            if ours is not None and (ours.last_eventid or 0, ours.capacity) >= (theirs, doc["capacity"]):
+                continue
+            src = _Source(int(doc["capacity"]))
+            src.items = [AlertItem.model_validate(it) for it in doc["items"]]
+            src.last_eventid = doc["last_eventid"]
+            src.complete = bool(doc["complete"])
+            self._sources[name] = src
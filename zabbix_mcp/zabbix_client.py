@@ -15,10 +15,27 @@ limitations under the License.
 """
 
 import asyncio
-from typing import Any, Dict, List, Optional
+import logging
+import math
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Tuple
 
 import httpx
 
+from . import deadline
+from .jsonstream import ResultArrayParser
+from .metadata import MetadataCache
+
+# Must be sent without credentials.
+_NO_AUTH_METHODS = {"apiinfo.version", "user.login"}
+# Streamed events are enriched with trigger details this many at a time.
+EVENT_BATCH = 500
+# Narrowest time slice a sliced event.get will request.
+MIN_SLICE_SECONDS = 60
+# Before any density is known, slices are 1/(4 * parallel) of the window.
+FIRST_ROUND_SLICES_PER_WINDOW = 4
+
 
 class ZabbixAPIError(Exception):
     pass
@@ -34,6 +51,9 @@ class ZabbixClient:
         max_concurrency: int = 8,
         verify_ssl: bool = True,
         token: Optional[str] = None,
+        cache: Optional[MetadataCache] = None,
+        event_slices: int = 0,
+        slice_min_window: int = 259200,
     ) -> None:
         self.base_url = base_url.rstrip("/") + "/api_jsonrpc.php"
         self.username = username
@@ -42,39 +62,197 @@ class ZabbixClient:
         self._token: Optional[str] = None
         self._client = httpx.AsyncClient(timeout=timeout, verify=verify_ssl)
         self._sem = asyncio.Semaphore(max_concurrency)
+        self._max_concurrency = max(1, max_concurrency)
+        # Windows of at least slice_min_window seconds are fetched as event_slices concurrent slices (0 = off).
+        self.event_slices = event_slices
+        self.slice_min_window = slice_min_window
+        # Without a shared cache every client keeps (and loses) its own metadata.
+        self._shared = cache is not None
+        self._cache = cache or MetadataCache(ttl=float("inf"))
+        self._groupid_cache = self._cache.groupids
+        self._hostid_cache = self._cache.hostids
+        # True when this client created the session itself and must end it.
+        self._owns_session = False
         if token:
             self._token = token
 
-    async def _rpc(self, method: str, params: Dict[str, Any]) -> Any:
-        payload = {
+    def _version(self) -> Tuple[int, ...]:
+        try:
+            return tuple(int(x) for x in (self._cache.api_version or "").split(".")[:2])
+        except ValueError:
+            return ()
+
+    def _request(self, method: str, params: Dict[str, Any]) -> Tuple[Dict[str, Any], Optional[Dict[str, str]]]:
+        payload: Dict[str, Any] = {
             "jsonrpc": "2.0",
             "method": method,
             "params": params,
             "id": 1,
-            "auth": self._token,
         }
-        async with self._sem:
-            resp = await self._client.post(self.base_url, json=payload)
+        headers: Optional[Dict[str, str]] = None
+        if self._token and method not in _NO_AUTH_METHODS:
+            if self._version() >= (6, 4):
+                # "auth" in the body is deprecated since 6.4 and gone in 7.2.
+                headers = {"Authorization": f"Bearer {self._token}"}
+            else:
+                payload["auth"] = self._token
+        return payload, headers
+
+    def _error_text(self, err: Dict[str, Any]) -> str:
+        return f"{err.get('message')}: {err.get('data')}"
+
+    async def _rpc(self, method: str, params: Dict[str, Any], retry_login: bool = True) -> Any:
+        payload, headers = self._request(method, params)
+        budget = deadline.check(method)
+        try:
+            if budget is None:
+                async with self._sem:
+                    resp = await self._client.post(self.base_url, json=payload, headers=headers)
+            else:
+                # The remaining request budget bounds both the semaphore wait and the call.
+                resp = await asyncio.wait_for(self._post(payload, headers, budget), timeout=budget)
+        except asyncio.TimeoutError:
+            raise deadline.DeadlineExceeded(f"deadline exceeded during {method}")
+        except httpx.TimeoutException as e:
+            raise self._timeout_error(method, e)
         if resp.status_code != 200:
             raise ZabbixAPIError(f"HTTP {resp.status_code}")
         data = resp.json()
         if "error" in data:
-            err = data["error"]
-            raise ZabbixAPIError(f"{err.get('message')}: {err.get('data')}")
+            text = self._error_text(data["error"])
+            if retry_login and self._relogin_possible(text):
+                # A shared session expired or was terminated: log in again once.
+                await self._relogin()
+                return await self._rpc(method, params, retry_login=False)
+            raise ZabbixAPIError(text)
         return data.get("result")
 
+    async def _post(
+        self, payload: Dict[str, Any], headers: Optional[Dict[str, str]], budget: float
+    ) -> httpx.Response:
+        async with self._sem:
+            return await self._client.post(
+                self.base_url, json=payload, headers=headers, timeout=min(float(self.timeout), budget)
+            )
+
+    async def _rpc_iter(self, method: str, params: Dict[str, Any], retry_login: bool = True) -> AsyncIterator[Any]:
+        """Like ``_rpc`` for list results, but parses the body as it arrives.
+
+        Elements of ``result`` are yielded one by one, so neither the raw body
+        nor the full decoded list is ever held in memory. The concurrency slot
+        is released once the response headers arrive: Zabbix has finished its
+        work by then, and callers may issue further RPCs while consuming.
+        """
+        payload, headers = self._request(method, params)
+        budget = deadline.check(method)
+        timeout = float(self.timeout) if budget is None else min(float(self.timeout), budget)
+        try:
+            if budget is None:
+                resp = await self._open(payload, headers, timeout)
+            else:
+                resp = await asyncio.wait_for(self._open(payload, headers, timeout), timeout=budget)
+        except asyncio.TimeoutError:
+            raise deadline.DeadlineExceeded(f"deadline exceeded during {method}")
+        except httpx.TimeoutException as e:
+            raise self._timeout_error(method, e)
+        parser = ResultArrayParser()
+        try:
+            if resp.status_code != 200:
+                raise ZabbixAPIError(f"HTTP {resp.status_code}")
+            async for chunk in resp.aiter_text():
+                for item in parser.feed(chunk):
+                    yield item
+                if budget is not None:
+                    deadline.check(method)
+        except httpx.TimeoutException as e:
+            raise self._timeout_error(method, e)
+        finally:
+            await resp.aclose()
+        try:
+            parser.close()
+        except ValueError as e:
+            raise ZabbixAPIError(str(e))
+        if "error" in parser.fields:
+            text = self._error_text(parser.fields["error"])
+            if retry_login and self._relogin_possible(text):
+                await self._relogin()
+                async for item in self._rpc_iter(method, params, retry_login=False):
+                    yield item
+                return
+            raise ZabbixAPIError(text)
+        if "result" in parser.fields:
+            raise ZabbixAPIError(f"{method} did not return a list")
+
+    def _timeout_error(self, method: str, e: httpx.TimeoutException) -> Exception:
+        """A request budget that ran out is a 504; a slow Zabbix within budget is an upstream error."""
+        left = deadline.remaining()
+        if left is not None and left <= 0:
+            return deadline.DeadlineExceeded(f"deadline exceeded during {method}")
+        return ZabbixAPIError(f"{method} timed out: {type(e).__name__}")
+
+    async def _open(
+        self, payload: Dict[str, Any], headers: Optional[Dict[str, str]], timeout: float
+    ) -> httpx.Response:
+        async with self._sem:
+            request = self._client.build_request(
+                "POST", self.base_url, json=payload, headers=headers, timeout=timeout
+            )
+            return await self._client.send(request, stream=True)
+
+    def _relogin_possible(self, error: str) -> bool:
+        return bool(
+            self.username
+            and self.password
+            and self._token
+            and self._token == self._cache.session
+            and ("re-login" in error or "Not authori" in error)
+        )
+
+    async def _relogin(self) -> None:
+        stale = self._token
+        async with self._cache.session_lock:
+            if self._cache.session == stale:
+                self._cache.session = None
+                if await self._cache.shared_get("session") == stale:
+                    await self._cache.shared_delete("session")
+            self._token = None
+            await self.login()
+
     async def login(self) -> None:
         if self._token:
             return
-        result = await self._rpc(
-            "user.login", {"user": self.username, "password": self.password}
-        )
+        if self._cache.session:
+            self._token = self._cache.session
+            return
+        if self._shared:
+            # Another worker may already hold a session for this account.
+            session = await self._cache.shared_get("session")
+            if session:
+                self._token = self._cache.session = session
+                return
+        if self._cache.api_version is None:
+            await self.api_version()
+        # 5.4 renamed "user" to "username"; 6.4 dropped the old name.
+        field = "username" if self._version() >= (5, 4) else "user"
+        result = await self._rpc("user.login", {field: self.username, "password": self.password})
         self._token = result
+        if not self._shared:
+            self._owns_session = True
+            return
+        if not await self._cache.shared_set("session", result, only_if_absent=True):
+            winner = await self._cache.shared_get("session")
+            if winner and winner != result:
+                # Lost a login race with another worker: end ours and use theirs.
+                await self._rpc("user.logout", {}, retry_login=False)
+                self._token = winner
+        self._cache.session = self._token
 
     async def logout(self) -> None:
-        if self._token and self.username and self.password:
-            await self._rpc("user.logout", {})
-        await self._client.aclose()
+        with deadline.suspended():
+            # Shared sessions and API tokens outlive this client; only end our own.
+            if self._token and self._owns_session:
+                await self._rpc("user.logout", {}, retry_login=False)
+            await self._client.aclose()
 
     async def get_hostgroups(self, names: Optional[List[str]] = None) -> List[Dict[str, Any]]:
         params: Dict[str, Any] = {"output": ["name", "groupid"]}
@@ -82,13 +260,53 @@ class ZabbixClient:
             params["filter"] = {"name": names}
         return await self._rpc("hostgroup.get", params)
 
+    async def get_host_group_index(self) -> Dict[str, List[str]]:
+        """hostid -> hostgroup names, from a single hostgroup.get (cached)."""
+        self._cache.expire_if_stale()
+        if self._cache.host_groups is not None:
+            return self._cache.host_groups
+        index = await self._cache.shared_get("host_groups") if self._shared else None
+        if index is None:
+            groups = await self._rpc("hostgroup.get", {"output": ["name"], "selectHosts": ["hostid"]})
+            index = {}
+            for g in groups:
+                for h in g.get("hosts") or []:
+                    index.setdefault(str(h["hostid"]), []).append(g["name"])
+            if self._shared:
+                await self._cache.shared_set("host_groups", index, ttl=self._cache.ttl)
+        self._cache.host_groups = index
+        return index
+
+    async def resolve_groupids(self, names: List[str]) -> List[str]:
+        """Map hostgroup names to ids, querying Zabbix only for unseen names."""
+        self._cache.expire_if_stale()
+        async with self._cache.lock:
+            missing = [n for n in names if n not in self._groupid_cache]
+            if missing:
+                for g in await self.get_hostgroups(missing):
+                    self._groupid_cache[g["name"]] = g["groupid"]
+                for n in missing:
+                    self._groupid_cache.setdefault(n, None)
+        return [gid for gid in (self._groupid_cache.get(n) for n in names) if gid]
+
+    async def resolve_hostids(self, names: List[str]) -> List[str]:
+        """Map technical host names to ids, querying Zabbix only for unseen names."""
+        self._cache.expire_if_stale()
+        async with self._cache.lock:
+            missing = [n for n in names if n not in self._hostid_cache]
+            if missing:
+                for h in await self.get_hosts(names=missing):
+                    self._hostid_cache[h["host"]] = h["hostid"]
+                for n in missing:
+                    self._hostid_cache.setdefault(n, None)
+        return [hid for hid in (self._hostid_cache.get(n) for n in names) if hid]
+
     async def get_hosts(
         self, groups: Optional[List[str]] = None, names: Optional[List[str]] = None
     ) -> List[Dict[str, Any]]:
         params: Dict[str, Any] = {"output": ["host", "hostid", "name"], "selectInterfaces": ["ip"]}
         if groups:
-            groups_res = await self.get_hostgroups(groups)
-            params["groupids"] = [g["groupid"] for g in groups_res]
+            params["groupids"] = await self.resolve_groupids(groups)
         if names:
             params.setdefault("filter", {})["host"] = names
         return await self._rpc("host.get", params)
@@ -105,22 +323,77 @@ class ZabbixClient:
         if severities is not None:
             params["filter"]["priority"] = severities
         if hosts:
-            host_res = await self.get_hosts(names=hosts)
-            params["hostids"] = [h["hostid"] for h in host_res]
+            params["hostids"] = await self.resolve_hostids(hosts)
         return await self._rpc("trigger.get", params)
 
-    async def get_events(
+    async def get_items(
         self,
-        time_from: Optional[int] = None,
-        time_till: Optional[int] = None,
-        severities: Optional[List[int]] = None,
-        group_names: Optional[List[str]] = None,
         host_names: Optional[List[str]] = None,
-        limit: int = 100,
+        itemids: Optional[List[str]] = None,
+        key: Optional[str] = None,
+        search: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        params: Dict[str, Any] = {
+            "output": ["itemid", "name", "key_", "value_type", "units", "lastvalue", "lastclock"],
+            "selectHosts": ["host"],
+            "sortfield": "name",
+        }
+        if itemids:
+            params["itemids"] = itemids
+        if host_names:
+            hostids = await self.resolve_hostids(host_names)
+            if not hostids:
+                # An empty hostids filter would match every host.
+                return []
+            params["hostids"] = hostids
+        if key:
+            params["filter"] = {"key_": key}
+        if search:
+            params["search"] = {"name": search, "key_": search}
+            params["searchByAny"] = True
+        if limit:
+            params["limit"] = limit
+        return await self._rpc("item.get", params)
+
+    async def get_history(
+        self, itemids: List[str], value_type: int, time_from: int, time_till: int
     ) -> List[Dict[str, Any]]:
+        params = {
+            "output": ["itemid", "clock", "value"],
+            "history": value_type,
+            "itemids": itemids,
+            "time_from": time_from,
+            "time_till": time_till,
+            "sortfield": "clock",
+            "sortorder": "ASC",
+        }
+        return [r async for r in self._rpc_iter("history.get", params)]
+
+    async def get_trends(self, itemids: List[str], time_from: int, time_till: int) -> List[Dict[str, Any]]:
+        """Hourly min/avg/max per item (numeric items only), in no particular order."""
+        params = {
+            "output": ["itemid", "clock", "num", "value_min", "value_avg", "value_max"],
+            "itemids": itemids,
+            "time_from": time_from,
+            "time_till": time_till,
+        }
+        return [r async for r in self._rpc_iter("trend.get", params)]
+
+    async def _event_params(
+        self,
+        time_from: Optional[int],
+        time_till: Optional[int],
+        group_names: Optional[List[str]],
+        host_names: Optional[List[str]],
+        limit: int,
+        eventid_from: Optional[str],
+        eventid_till: Optional[str],
+        search: Optional[List[str]],
+    ) -> Dict[str, Any]:
         params: Dict[str, Any] = {
             "output": ["eventid", "clock", "name", "objectid"],
-            "selectHosts": ["host", "name"],
+            "selectHosts": ["hostid", "host", "name"],
             "sortfield": "clock",
             "sortorder": "DESC",
             "limit": limit,
@@ -129,33 +402,354 @@ class ZabbixClient:
             params["time_from"] = time_from
         if time_till is not None:
             params["time_till"] = time_till
+        if eventid_from is not None:
+            params["eventid_from"] = eventid_from
+        if eventid_till is not None:
+            params["eventid_till"] = eventid_till
+        if search:
+            # Zabbix search is a case-insensitive LIKE; searchByAny ORs the patterns.
+            params["search"] = {"name": search}
+            params["searchByAny"] = True
         if group_names:
-            groups = await self.get_hostgroups(group_names)
-            params["groupids"] = [g["groupid"] for g in groups]
+            params["groupids"] = await self.resolve_groupids(group_names)
         if host_names:
-            hosts = await self.get_hosts(names=host_names)
-            params["hostids"] = [h["hostid"] for h in hosts]
+            params["hostids"] = await self.resolve_hostids(host_names)
+        return params
 
-        events = await self._rpc("event.get", params)
-        trigger_ids = list({e["objectid"] for e in events if e.get("objectid")})
-        triggers = await self._rpc(
-            "trigger.get",
-            {
-                "output": ["triggerid", "priority", "description"],
-                "triggerids": trigger_ids,
-            },
-        )
-        by_id = {t["triggerid"]: t for t in triggers}
+    async def _enrich(self, events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        by_id = await self._triggers({e["objectid"] for e in events if e.get("objectid")})
         for e in events:
             tr = by_id.get(e.get("objectid"))
             if tr:
                 e["severity"] = tr.get("priority", 0)
                 e["trigger_description"] = tr.get("description")
-        return events
+        return await self._attach_groups(events)
+
+    async def _attach_groups(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Set ``groups`` (names, in host order) on each event from the cached host->groups index.
+
+        event.get and problem.get cannot select host groups, and a per-host
+        lookup would cost a call per page; the index is one hostgroup.get per
+        metadata TTL (usually already loaded by the warm-up).
+        """
+        if not rows:
+            return rows
+        try:
+            index = await self.get_host_group_index()
+        except ZabbixAPIError as e:
+            # Groups are a nicety: users without hostgroup.get rights still get their events.
+            logging.getLogger("zabbix_client").warning(f"host group index unavailable: {e}")
+            # Remember the miss until the metadata TTL instead of retrying on every batch.
+            self._cache.host_groups = {}
+            return rows
+        for r in rows:
+            names: List[str] = []
+            for h in r.get("hosts") or []:
+                names.extend(g for g in index.get(str(h.get("hostid")), ()) if g not in names)
+            r["groups"] = names
+        return rows
+
+    async def iter_events(
+        self,
+        time_from: Optional[int] = None,
+        time_till: Optional[int] = None,
+        severities: Optional[List[int]] = None,
+        group_names: Optional[List[str]] = None,
+        host_names: Optional[List[str]] = None,
+        limit: int = 100,
+        eventid_from: Optional[str] = None,
+        eventid_till: Optional[str] = None,
+        search: Optional[List[str]] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Events as ``get_events`` returns them, streamed from the response.
+
+        Events are enriched and yielded ``EVENT_BATCH`` at a time, so memory
+        stays bounded by the batch instead of the response size.
+        """
+        params = await self._event_params(
+            time_from, time_till, group_names, host_names, limit, eventid_from, eventid_till, search
+        )
+        batch: List[Dict[str, Any]] = []
+        stream = self._event_stream(params)
+        try:
+            async for e in stream:
+                batch.append(e)
+                if len(batch) >= EVENT_BATCH:
+                    for e in await self._enrich(batch):
+                        yield e
+                    batch = []
+        finally:
+            await stream.aclose()
+        if batch:
+            for e in await self._enrich(batch):
+                yield e
+
+    async def get_events(
+        self,
+        time_from: Optional[int] = None,
+        time_till: Optional[int] = None,
+        severities: Optional[List[int]] = None,
+        group_names: Optional[List[str]] = None,
+        host_names: Optional[List[str]] = None,
+        limit: int = 100,
+        eventid_from: Optional[str] = None,
+        eventid_till: Optional[str] = None,
+        search: Optional[List[str]] = None,
+    ) -> List[Dict[str, Any]]:
+        params = await self._event_params(
+            time_from, time_till, group_names, host_names, limit, eventid_from, eventid_till, search
+        )
+        # Parsed incrementally: the raw body is never held next to the decoded list.
+        return await self._enrich([e async for e in self._event_stream(params)])
+
+    def _event_stream(self, params: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+        """Raw events newest first: one event.get, or time slices for wide windows."""
+        time_from = params.get("time_from")
+        if self.event_slices > 1 and time_from is not None:
+            time_till = params.get("time_till")
+            if time_till is None:
+                time_till = int(time.time())
+            if time_till - time_from >= self.slice_min_window:
+                return self._sliced_events(params, time_from, time_till)
+        return self._rpc_iter("event.get", params)
+
+    async def _collect(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        return [e async for e in self._rpc_iter("event.get", params)]
+
+    async def _sliced_events(
+        self, params: Dict[str, Any], time_from: int, time_till: int
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Walk ``[time_from, time_till]`` newest first as concurrent time slices.
+
+        Slices are disjoint, so concatenating them newest first keeps the
+        clock DESC order of a single call. The newest slice is fetched on its
+        own first, so a small ``limit`` it already satisfies costs one call.
+        Only when it comes up short do up to ``event_slices`` slices (capped
+        by the concurrency limit and by the events still missing) go out at
+        once, sized from the event density seen so far to hold the rest in
+        one round, so sparse windows are crossed in a few wide slices. Once
+        the completed newest slices hold ``limit`` events the rest are
+        cancelled.
+        """
+        limit = int(params.get("limit") or 0) or None
+        parallel = min(self.event_slices, self._max_concurrency)
+        window = time_till - time_from + 1
+        span = max(MIN_SLICE_SECONDS, -(-window // (FIRST_ROUND_SLICES_PER_WINDOW * parallel)))
+        pending: Deque[Tuple["asyncio.Future[List[Dict[str, Any]]]", int, int]] = deque()
+        cursor = time_till
+        seen = 0
+        found = 0
+        covered = 0
+        try:
+            while True:
+                want = limit - seen if limit else None
+                # The newest slice goes alone; no more slices than events still missing.
+                width = min(parallel, want) if want else parallel
+                if not covered:
+                    width = 1
+                while cursor >= time_from and len(pending) < width:
+                    if want and covered:
+                        # Events per second over the part of the window already read.
+                        density = max(found, 1) / covered
+                        target = -(-want // width)
+                        span = int(min(max(MIN_SLICE_SECONDS, target / density), window))
+                    start = max(time_from, cursor - span + 1)
+                    sliced = dict(params, time_from=start, time_till=cursor)
+                    if want:
+                        sliced["limit"] = want
+                    pending.append((asyncio.ensure_future(self._collect(sliced)), start, cursor))
+                    cursor = start - 1
+                if not pending:
+                    return
+                task, start, end = pending.popleft()
+                rows = await task
+                found += len(rows)
+                covered += end - start + 1
+                for e in rows[: limit - seen] if limit else rows:
+                    yield e
+                seen += len(rows)
+                if limit and seen >= limit:
+                    return
+        finally:
+            for task, *_ in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*(t for t, *_ in pending), return_exceptions=True)
+
+    async def _triggers(self, ids: Any) -> Dict[str, Dict[str, Any]]:
+        """Trigger details by id; only ids missing from the cache hit trigger.get."""
+        self._cache.expire_if_stale()
+        cached = self._cache.triggers
+        missing = [t for t in ids if t not in cached]
+        if missing:
+            for t in await self._rpc(
+                "trigger.get",
+                {
+                    "output": ["triggerid", "priority", "description"],
+                    "triggerids": missing,
+                    "selectHosts": ["hostid", "host", "name"],
+                },
+            ):
+                cached[t["triggerid"]] = t
+        return {t: cached[t] for t in ids if t in cached}
+
+    async def count_events(
+        self,
+        time_from: Optional[int] = None,
+        time_till: Optional[int] = None,
+        severities: Optional[List[int]] = None,
+        group_names: Optional[List[str]] = None,
+        host_names: Optional[List[str]] = None,
+    ) -> int:
+        """Number of matching trigger events, counted server-side via countOutput."""
+        params: Dict[str, Any] = {"countOutput": True, "source": 0, "object": 0}
+        if time_from is not None:
+            params["time_from"] = time_from
+        if time_till is not None:
+            params["time_till"] = time_till
+        if severities is not None:
+            params["severities"] = severities
+        if group_names:
+            params["groupids"] = await self.resolve_groupids(group_names)
+        if host_names:
+            params["hostids"] = await self.resolve_hostids(host_names)
+        return int(await self._rpc("event.get", params))
+
+    async def event_ids(
+        self,
+        time_from: Optional[int] = None,
+        time_till: Optional[int] = None,
+        group_names: Optional[List[str]] = None,
+        host_names: Optional[List[str]] = None,
+        limit: int = 100,
+    ) -> List[Dict[str, Any]]:
+        """Id and clock of each event ``get_events`` would return, without hosts or enrichment."""
+        params = await self._event_params(time_from, time_till, group_names, host_names, limit, None, None, None)
+        params["output"] = ["eventid", "clock"]
+        del params["selectHosts"]
+        return [e async for e in self._event_stream(params)]
+
+    async def get_problems(
+        self,
+        time_from: Optional[int] = None,
+        recent: bool = False,
+        severities: Optional[List[int]] = None,
+        group_names: Optional[List[str]] = None,
+        host_names: Optional[List[str]] = None,
+        eventid_from: Optional[str] = None,
+        eventids: Optional[List[str]] = None,
+        enrich: bool = True,
+    ) -> List[Dict[str, Any]]:
+        """Currently open trigger problems via problem.get.
+
+        With ``enrich`` the result is shaped like ``get_events`` output (hosts
+        with interfaces, severity, trigger_description); ``enrich=False`` returns
+        bare problem rows, which is enough to check which ids are still open.
+        """
+        params: Dict[str, Any] = {
+            "output": ["eventid", "objectid", "clock", "name", "severity"] if enrich else ["eventid"],
+            "source": 0,
+            "object": 0,
+            "recent": recent,
+            "sortfield": ["eventid"],
+            "sortorder": "DESC",
+        }
+        if time_from is not None:
+            params["time_from"] = time_from
+        if severities is not None:
+            params["severities"] = severities
+        if eventid_from is not None:
+            params["eventid_from"] = eventid_from
+        if eventids is not None:
+            params["eventids"] = eventids
+        if group_names:
+            params["groupids"] = await self.resolve_groupids(group_names)
+        if host_names:
+            params["hostids"] = await self.resolve_hostids(host_names)
+        problems = await self._rpc("problem.get", params)
+        if not enrich or not problems:
+            return problems
+
+        # problem.get has no selectHosts: map trigger -> hosts, then host -> interfaces.
+        by_trigger = await self._triggers({p["objectid"] for p in problems})
+        interfaces = self._cache.interfaces
+        hostids = list(
+            {h["hostid"] for t in by_trigger.values() for h in t.get("hosts") or []} - set(interfaces)
+        )
+        if hostids:
+            hosts = await self._rpc(
+                "host.get", {"output": ["hostid"], "hostids": hostids, "selectInterfaces": ["ip"]}
+            )
+            interfaces.update({h["hostid"]: h.get("interfaces") or [] for h in hosts})
+        for p in problems:
+            tr = by_trigger.get(p.get("objectid")) or {}
+            p["trigger_description"] = tr.get("description")
+            p["hosts"] = [
+                dict(h, interfaces=interfaces.get(h["hostid"], [])) for h in tr.get("hosts") or []
+            ]
+        return await self._attach_groups(problems)
 
     async def api_version(self) -> str:
-        res = await self._rpc("apiinfo.version", {})
-        return str(res)
+        if self._cache.api_version is None:
+            version = await self._cache.shared_get("api_version") if self._shared else None
+            if version is None:
+                version = str(await self._rpc("apiinfo.version", {}))
+                if self._shared:
+                    await self._cache.shared_set("api_version", version, ttl=self._cache.ttl)
+            self._cache.api_version = version
+        return self._cache.api_version
+
+    async def prefetch(self) -> Dict[str, str]:
+        """Warm the metadata cache: version, session, then names, groups and triggers.
+
+        Steps after login run concurrently; each reports ``ok`` or its error.
+        """
+        status: Dict[str, str] = {}
+
+        async def step(name: str, coro: Any) -> None:
+            try:
+                await coro
+                status[name] = "ok"
+            except deadline.DeadlineExceeded:
+                status[name] = "timeout"
+            except Exception as e:
+                status[name] = f"error: {e}"
+
+        # The version decides the login field name and how credentials are sent.
+        await step("api_version", self.api_version())
+        await step("login", self.login())
+        if status["login"] != "ok":
+            return status
+
+        async def hostgroups() -> None:
+            for g in await self.get_hostgroups():
+                self._groupid_cache[g["name"]] = g["groupid"]
+
+        async def hosts() -> None:
+            for h in await self.get_hosts():
+                self._hostid_cache[h["host"]] = h["hostid"]
+                self._cache.interfaces[h["hostid"]] = h.get("interfaces") or []
+
+        async def triggers() -> None:
+            # Only triggers currently in problem state: the ones new events refer to.
+            for t in await self._rpc(
+                "trigger.get",
+                {
+                    "output": ["triggerid", "priority", "description"],
+                    "selectHosts": ["hostid", "host", "name"],
+                    "only_true": True,
+                    "monitored": True,
+                },
+            ):
+                self._cache.triggers[t["triggerid"]] = t
+
+        await asyncio.gather(
+            step("hostgroups", hostgroups()),
+            step("hosts", hosts()),
+            step("host_groups", self.get_host_group_index()),
+            step("triggers", triggers()),
+        )
+        return status
 
 
 class MockZabbixClient:
@@ -168,6 +762,93 @@ class MockZabbixClient:
     async def logout(self) -> None:
         return None
 
+    async def get_hostgroups(self, names: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        groups = [
+            {"groupid": "1", "name": "Web servers"},
+            {"groupid": "2", "name": "Database servers"},
+            {"groupid": "3", "name": "API servers"},
+        ]
+        return [g for g in groups if not names or g["name"] in names]
+
+    async def get_hosts(
+        self, groups: Optional[List[str]] = None, names: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        hosts = [
+            {"hostid": "101", "host": "web-01", "name": "web-01", "interfaces": [{"ip": "10.0.0.11"}]},
+            {"hostid": "102", "host": "db-01", "name": "db-01", "interfaces": [{"ip": "10.0.0.21"}]},
+            {"hostid": "103", "host": "api-01", "name": "api-01", "interfaces": [{"ip": "10.0.0.31"}]},
+        ]
+        return [h for h in hosts if not names or h["host"] in names]
+
+    async def get_host_group_index(self) -> Dict[str, List[str]]:
+        return {"101": ["Web servers"], "102": ["Database servers"], "103": ["API servers"]}
+
+    async def get_items(
+        self,
+        host_names: Optional[List[str]] = None,
+        itemids: Optional[List[str]] = None,
+        key: Optional[str] = None,
+        search: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        items = []
+        for n, host in enumerate(["web-01", "db-01", "api-01"]):
+            for m, (name, item_key, units) in enumerate(
+                [("CPU utilization", "system.cpu.util", "%"), ("Available memory", "vm.memory.size[available]", "B")]
+            ):
+                items.append(
+                    {
+                        "itemid": str(30001 + n * 10 + m),
+                        "name": name,
+                        "key_": item_key,
+                        "value_type": "0" if m == 0 else "3",
+                        "units": units,
+                        "lastvalue": "0",
+                        "lastclock": "1732680000",
+                        "hosts": [{"host": host}],
+                    }
+                )
+        if itemids:
+            items = [i for i in items if i["itemid"] in itemids]
+        if host_names:
+            items = [i for i in items if i["hosts"][0]["host"] in host_names]
+        if key:
+            items = [i for i in items if i["key_"] == key]
+        if search:
+            items = [i for i in items if search.lower() in (i["name"] + i["key_"]).lower()]
+        return items[:limit] if limit else items
+
+    async def get_history(
+        self, itemids: List[str], value_type: int, time_from: int, time_till: int
+    ) -> List[Dict[str, Any]]:
+        # One sample a minute: a daily wave plus a spike every six hours.
+        rows = []
+        for itemid in itemids:
+            for clock in range(time_from - time_from % 60 + 60, time_till + 1, 60):
+                value = 50 + 30 * math.sin(clock / 13751.0) + (40 if clock % 21600 < 60 else 0)
+                rows.append({"itemid": itemid, "clock": str(clock), "value": f"{value:.4f}"})
+        return rows
+
+    async def get_trends(self, itemids: List[str], time_from: int, time_till: int) -> List[Dict[str, Any]]:
+        rows = []
+        for itemid in itemids:
+            for clock in range(time_from - time_from % 3600 + 3600, time_till + 1, 3600):
+                avg = 50 + 30 * math.sin(clock / 13751.0)
+                rows.append(
+                    {
+                        "itemid": itemid,
+                        "clock": str(clock),
+                        "num": "60",
+                        "value_min": f"{avg - 10:.4f}",
+                        "value_avg": f"{avg:.4f}",
+                        "value_max": f"{avg + 40:.4f}",
+                    }
+                )
+        return rows
+
+    async def prefetch(self) -> Dict[str, str]:
+        return {"mock": "ok"}
+
     async def get_events(
         self,
         time_from: Optional[int] = None,
@@ -176,6 +857,9 @@ class MockZabbixClient:
         group_names: Optional[List[str]] = None,
         host_names: Optional[List[str]] = None,
         limit: int = 100,
+        eventid_from: Optional[str] = None,
+        eventid_till: Optional[str] = None,
+        search: Optional[List[str]] = None,
     ) -> List[Dict[str, Any]]:
         base = [
             {
@@ -183,29 +867,39 @@ class MockZabbixClient:
                 "clock": time_till or 1732680000,
                 "name": "CPU usage high",
                 "objectid": 20001,
-                "hosts": [{"host": "web-01", "name": "web-01", "interfaces": [{"ip": "10.0.0.11"}]}],
+                "hosts": [{"hostid": "101", "host": "web-01", "name": "web-01", "interfaces": [{"ip": "10.0.0.11"}]}],
                 "severity": 4,
                 "trigger_description": "High CPU on web-01",
+                "groups": ["Web servers"],
             },
             {
                 "eventid": 10002,
                 "clock": (time_till or 1732680000) - 120,
                 "name": "Disk space low",
                 "objectid": 20002,
-                "hosts": [{"host": "db-01", "name": "db-01", "interfaces": [{"ip": "10.0.0.21"}]}],
+                "hosts": [{"hostid": "102", "host": "db-01", "name": "db-01", "interfaces": [{"ip": "10.0.0.21"}]}],
                 "severity": 5,
                 "trigger_description": "Critical disk usage on db-01",
+                "groups": ["Database servers"],
             },
             {
                 "eventid": 10003,
                 "clock": (time_till or 1732680000) - 360,
                 "name": "Service timeout",
                 "objectid": 20003,
-                "hosts": [{"host": "api-01", "name": "api-01", "interfaces": [{"ip": "10.0.0.31"}]}],
+                "hosts": [{"hostid": "103", "host": "api-01", "name": "api-01", "interfaces": [{"ip": "10.0.0.31"}]}],
                 "severity": 3,
                 "trigger_description": "Service timeout detected",
+                "groups": ["API servers"],
             },
         ]
+        if eventid_from is not None:
+            base = [e for e in base if int(e["eventid"]) >= int(eventid_from)]
+        if eventid_till is not None:
+            base = [e for e in base if int(e["eventid"]) <= int(eventid_till)]
+        if search:
+            lowered = [k.lower() for k in search]
+            base = [e for e in base if any(k in e["name"].lower() for k in lowered)]
         data = base[:limit]
         if severities:
             data = [e for e in data if int(e.get("severity", 0)) in severities]
@@ -214,3 +908,58 @@ class MockZabbixClient:
         if group_names:
             data = data  # Mock does not filter by groups
         return data
+
+    async def count_events(
+        self,
+        time_from: Optional[int] = None,
+        time_till: Optional[int] = None,
+        severities: Optional[List[int]] = None,
+        group_names: Optional[List[str]] = None,
+        host_names: Optional[List[str]] = None,
+    ) -> int:
+        events = await self.get_events(
+            time_from=time_from,
+            time_till=time_till,
+            severities=severities,
+            group_names=group_names,
+            host_names=host_names,
+            limit=1000,
+        )
+        if time_from is not None:
+            events = [e for e in events if int(e["clock"]) >= time_from]
+        return len(events)
+
+    async def get_problems(
+        self,
+        time_from: Optional[int] = None,
+        recent: bool = False,
+        severities: Optional[List[int]] = None,
+        group_names: Optional[List[str]] = None,
+        host_names: Optional[List[str]] = None,
+        eventid_from: Optional[str] = None,
+        eventids: Optional[List[str]] = None,
+        enrich: bool = True,
+    ) -> List[Dict[str, Any]]:
+        data = await self.get_events(
+            time_from=time_from,
+            severities=severities,
+            group_names=group_names,
+            host_names=host_names,
+            eventid_from=eventid_from,
+        )
+        if eventids is not None:
+            data = [e for e in data if str(e["eventid"]) in eventids]
+        return data
+
+    async def event_ids(
+        self,
+        time_from: Optional[int] = None,
+        time_till: Optional[int] = None,
+        group_names: Optional[List[str]] = None,
+        host_names: Optional[List[str]] = None,
+        limit: int = 100,
+    ) -> List[Dict[str, Any]]:
+        data = await self.get_events(
+            time_from=time_from, time_till=time_till, group_names=group_names, host_names=host_names, limit=limit
+        )
+        return [{"eventid": e["eventid"], "clock": e["clock"]} for e in data]